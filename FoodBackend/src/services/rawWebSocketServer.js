@@ -1,18 +1,84 @@
 import { WebSocketServer } from 'ws';
 import { getIo } from './socket.js';
 
+// Subprotocols offered by the drone bridge (see drone-bridge/drone/communication/codec.py)
+const SUBPROTOCOL_TELEMETRY_V1 = 'drone-bridge.telemetry.v1';
+const SUBPROTOCOL_JSON = 'drone-bridge.json';
+
+const FLOAT64_FIELDS = ['latitude_deg', 'longitude_deg'];
+const FLOAT32_FIELDS = [
+  'absolute_altitude_m', 'relative_altitude_m', 'battery_percent',
+  'battery_voltage_v', 'velocity_north_m_s', 'velocity_east_m_s',
+  'velocity_down_m_s', 'ground_speed_m_s', 'heading_deg'
+];
+const HEALTH_FIELDS = ['is_global_position_ok', 'is_home_position_ok', 'is_armable'];
+const FLIGHT_MODES = [
+  'UNKNOWN', 'READY', 'TAKEOFF', 'HOLD', 'MISSION', 'RETURN_TO_LAUNCH', 'LAND',
+  'OFFBOARD', 'FOLLOW_ME', 'MANUAL', 'ALTCTL', 'POSCTL', 'ACRO', 'STABILIZED', 'RATTITUDE'
+];
+const LANDED_STATES = ['UNKNOWN', 'ON_GROUND', 'IN_AIR', 'TAKING_OFF', 'LANDING'];
+
+// Decodes a schema v1 binary telemetry frame into a drone_telemetry message
+export function decodeTelemetryFrame(buffer) {
+  const view = new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+  const version = view.getUint8(0);
+  const kind = view.getUint8(1);
+  if (version !== 1 || kind !== 1) {
+    throw new Error(`Unsupported telemetry frame (version=${version}, kind=${kind})`);
+  }
+  const idLength = view.getUint8(2);
+  const payload = { droneId: buffer.toString('utf8', 3, 3 + idLength) };
+  let offset = 3 + idLength;
+
+  for (const key of FLOAT64_FIELDS) {
+    const value = view.getFloat64(offset, true);
+    if (!Number.isNaN(value)) payload[key] = value;
+    offset += 8;
+  }
+  for (const key of FLOAT32_FIELDS) {
+    const value = view.getFloat32(offset, true);
+    if (!Number.isNaN(value)) payload[key] = value;
+    offset += 4;
+  }
+
+  const modeCode = view.getUint8(offset);
+  const flags = view.getUint8(offset + 1);
+  payload.flight_mode = FLIGHT_MODES[modeCode] || 'UNKNOWN';
+  if (flags & 0x10) payload.armed = Boolean(flags & 0x01);
+  if (flags & 0x20) {
+    HEALTH_FIELDS.forEach((key, index) => {
+      payload[key] = Boolean(flags & (1 << (index + 1)));
+    });
+  }
+  if (flags & 0x80) payload.in_air = Boolean(flags & 0x40);
+  // The landed state byte is optional: frames from older bridges end after the flags
+  if (buffer.byteLength > offset + 2) {
+    const landedCode = view.getUint8(offset + 2);
+    if (landedCode) payload.landed_state = LANDED_STATES[landedCode] || 'UNKNOWN';
+  }
+  return { type: 'drone_telemetry', payload };
+}
+
 class RawWebSocketServer {
   constructor(server) {
     this.server = server;
     this.wss = null;
     this.io = null;
+    // Latest merged telemetry per drone, used to expand batched deltas
+    this.droneTelemetry = new Map();
   }
 
   initialize() {
     // Create raw WebSocket server for drone bridge connections
     this.wss = new WebSocketServer({ 
       server: this.server,
-      path: '/drone-bridge'
+      path: '/drone-bridge',
+      // Accept the compact telemetry encoding when the bridge offers it; otherwise stay on JSON
+      handleProtocols: (protocols) => {
+        if (protocols.has(SUBPROTOCOL_TELEMETRY_V1)) return SUBPROTOCOL_TELEMETRY_V1;
+        if (protocols.has(SUBPROTOCOL_JSON)) return SUBPROTOCOL_JSON;
+        return false;
+      }
     });
 
     this.io = getIo();
@@ -20,9 +86,9 @@ class RawWebSocketServer {
     this.wss.on('connection', (ws, req) => {
       console.log('🚁 Raw WebSocket: Drone bridge connected');
       
-      ws.on('message', (data) => {
+      ws.on('message', (data, isBinary) => {
         try {
-          const message = JSON.parse(data);
+          const message = isBinary ? decodeTelemetryFrame(data) : JSON.parse(data);
           console.log('📡 Raw WebSocket: Received message:', message.type);
           
           // Forward messages to Socket.IO clients
@@ -63,6 +129,17 @@ class RawWebSocketServer {
         userIo.emit('drone_telemetry', message.payload);
         break;
         
+      case 'drone_telemetry_batch':
+        // One frame carries per-drone deltas; merge them and broadcast full telemetry per drone
+        for (const entry of message.payload || []) {
+          const { keyframe, ...fields } = entry;
+          const previous = keyframe ? {} : (this.droneTelemetry.get(entry.droneId) || {});
+          const merged = { ...previous, ...fields };
+          this.droneTelemetry.set(entry.droneId, merged);
+          userIo.emit('drone_telemetry', merged);
+        }
+        break;
+
       case 'mission_update':
         // Broadcast mission updates to all frontend clients
         userIo.emit('mission_update', message.payload);
@@ -12,6 +12,15 @@ class Config:
     # to this server, pushing telemetry and mission updates.
     # FIXED: The port is now correctly set to 8000 and the path includes the '/drone-bridge' namespace.
     BACKEND_WS_URL = os.getenv("BACKEND_WS_URL", "ws://localhost:8000/drone-bridge")
+    # Maximum number of ordered best-effort messages (e.g. separation alerts) buffered
+    # while the backend is slow or disconnected. The oldest are dropped beyond this.
+    WS_OUTBOUND_QUEUE_SIZE = int(os.getenv("WS_OUTBOUND_QUEUE_SIZE", 1000))
+    # Maximum number of mission updates buffered while the backend is slow or away.
+    # Senders never wait: beyond this the oldest is dropped and logged as an error.
+    WS_MISSION_QUEUE_SIZE = int(os.getenv("WS_MISSION_QUEUE_SIZE", 10000))
+    # Telemetry wire encoding: "json" (default) or "binary" to offer the compact
+    # fixed-layout telemetry frames. JSON is used unless the backend accepts binary.
+    WS_TELEMETRY_ENCODING = os.getenv("WS_TELEMETRY_ENCODING", "json")
 
     # --- Drone Bridge Server ---
     # The host and port for the drone bridge's own HTTP server. The Node.js backend
@@ -28,7 +37,139 @@ class Config:
     # --- Identification ---
     # A unique identifier for this drone instance.
     DRONE_ID = os.getenv("DRONE_ID", "DRONE-001")
+
+    # --- Fleet Mode ---
+    # Path to a JSON file listing the drones this process should host, e.g.
+    # [{"id": "DRONE-001", "address": "udp://:14540", "mavsdk_port": 50051}, ...].
+    # When set, start.py runs all of them in one event loop behind one HTTP server.
+    FLEET_CONFIG_FILE = os.getenv("FLEET_CONFIG_FILE", "")
+    # Number of worker processes the fleet is sharded across. With more than one,
+    # a supervisor owns HTTP_PORT and forwards commands to the shard hosting the drone.
+    FLEET_SHARDS = int(os.getenv("FLEET_SHARDS", 1))
+    # Shards listen on Unix sockets in this directory (defaults to the system temp dir);
+    # on platforms without Unix sockets they use loopback ports from FLEET_SHARD_BASE_PORT.
+    FLEET_IPC_DIR = os.getenv("FLEET_IPC_DIR", "")
+    FLEET_SHARD_BASE_PORT = int(os.getenv("FLEET_SHARD_BASE_PORT", 18100))
+
+    # --- Separation Monitoring (fleet mode) ---
+    # Airborne drones closer than this (3D, meters) raise a separation_alert.
+    SEPARATION_MIN_M = float(os.getenv("SEPARATION_MIN_M", 10.0))
+    SEPARATION_CHECK_INTERVAL_S = float(os.getenv("SEPARATION_CHECK_INTERVAL_S", 0.5))
+    # Cell size of the spatial index used for proximity queries, in meters.
+    SPATIAL_INDEX_CELL_M = float(os.getenv("SPATIAL_INDEX_CELL_M", 50.0))
+
+    # --- Kinematic Simulator ---
+    # Drones whose address is "sim://" run in the built-in simulator instead of PX4.
+    # Fixed update step, and simulated seconds per real second (0 = as fast as possible).
+    SIM_STEP_S = float(os.getenv("SIM_STEP_S", 0.05))
+    SIM_TIME_SCALE = float(os.getenv("SIM_TIME_SCALE", 1.0))
+    # Rate of the simulated MAVSDK telemetry streams, per drone.
+    SIM_TELEMETRY_HZ = float(os.getenv("SIM_TELEMETRY_HZ", 10.0))
+    # Default home of simulated drones (further drones are placed 25 m east of each other).
+    SIM_HOME_LAT = float(os.getenv("SIM_HOME_LAT", 47.3977))
+    SIM_HOME_LNG = float(os.getenv("SIM_HOME_LNG", 8.5456))
+    # --- AirSim ---
+    # Persistent AirSim clients shared by the camera and weather services, one per
+    # worker thread, and how long a call may take before the caller gives up (seconds).
+    AIRSIM_POOL_SIZE = int(os.getenv("AIRSIM_POOL_SIZE", 2))
+    AIRSIM_CALL_TIMEOUT_S = float(os.getenv("AIRSIM_CALL_TIMEOUT_S", 5.0))
+    # --- Camera ---
+    # Where proof photos are written, their JPEG quality, and the threads that
+    # convert and encode captured frames in parallel.
+    CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+    # Photos are stored by content hash; the oldest are evicted beyond this size
+    # (megabytes) or age (hours, 0 = keep).
+    CAPTURE_MAX_MB = float(os.getenv("CAPTURE_MAX_MB", 500))
+    CAPTURE_MAX_AGE_H = float(os.getenv("CAPTURE_MAX_AGE_H", 72))
+    # Backend endpoint receiving each photo as a multipart POST, in the background.
+    # Empty = photos stay local only.
+    CAPTURE_UPLOAD_URL = os.getenv("CAPTURE_UPLOAD_URL", "")
+    CAPTURE_UPLOAD_QUEUE = int(os.getenv("CAPTURE_UPLOAD_QUEUE", 200))
+    CAPTURE_UPLOAD_CONCURRENCY = int(os.getenv("CAPTURE_UPLOAD_CONCURRENCY", 2))
+    CAPTURE_UPLOAD_RETRIES = int(os.getenv("CAPTURE_UPLOAD_RETRIES", 5))
+    CAMERA_JPEG_QUALITY = int(os.getenv("CAMERA_JPEG_QUALITY", 95))
+    CAMERA_ENCODE_WORKERS = int(os.getenv("CAMERA_ENCODE_WORKERS", 3))
+    # A captured frame (and its JPEG encoding) is reused by other captures and
+    # streams for this long, in seconds, instead of asking AirSim again.
+    CAMERA_FRAME_TTL_S = float(os.getenv("CAMERA_FRAME_TTL_S", 0.25))
+    # Live MJPEG streams at /api/v1/drones/{id}/camera/{type}/stream (single-drone mode).
+    # Frame rate and JPEG quality adapt between these bounds to what viewers keep up
+    # with; each viewer buffers at most CAMERA_STREAM_BUFFER frames.
+    CAMERA_STREAM_ENABLED = os.getenv("CAMERA_STREAM_ENABLED", "false").lower() == "true"
+    CAMERA_STREAM_MAX_FPS = float(os.getenv("CAMERA_STREAM_MAX_FPS", 15.0))
+    CAMERA_STREAM_MIN_FPS = float(os.getenv("CAMERA_STREAM_MIN_FPS", 2.0))
+    CAMERA_STREAM_QUALITY = int(os.getenv("CAMERA_STREAM_QUALITY", 80))
+    CAMERA_STREAM_MIN_QUALITY = int(os.getenv("CAMERA_STREAM_MIN_QUALITY", 40))
+    CAMERA_STREAM_BUFFER = int(os.getenv("CAMERA_STREAM_BUFFER", 2))
+    # --- Delivery QR Codes ---
+    # Text encoded in the delivery QR code, before the order id.
+    QR_TEXT_PREFIX = os.getenv("QR_TEXT_PREFIX", "Delivery Confirmed: Package ")
+    QR_WINDOW_TITLE = os.getenv("QR_WINDOW_TITLE", "Delivery QR Code")
+    # Verify QR codes without opening a window (set to false to show it and wait for a key).
+    QR_HEADLESS = os.getenv("QR_HEADLESS", "true").lower() == "true"
+    # Worker processes rendering QR codes (and threads decoding them), and how many
+    # rendered codes are kept for repeated requests.
+    QR_WORKERS = int(os.getenv("QR_WORKERS", 2))
+    QR_RENDER_CACHE_SIZE = int(os.getenv("QR_RENDER_CACHE_SIZE", 128))
+    # Scanning live camera frames for the delivery QR code, served at
+    # POST /api/v1/drones/{id}/delivery/scan (single-drone mode): camera, frames
+    # scanned per second at most, decode threads, give-up time in seconds, and the
+    # size (pixels) frames and crops are downscaled to before decoding.
+    QR_SCAN_ENABLED = os.getenv("QR_SCAN_ENABLED", "false").lower() == "true"
+    QR_SCAN_CAMERA = os.getenv("QR_SCAN_CAMERA", "bottom")
+    QR_SCAN_MAX_FPS = float(os.getenv("QR_SCAN_MAX_FPS", 5.0))
+    QR_SCAN_WORKERS = int(os.getenv("QR_SCAN_WORKERS", 2))
+    QR_SCAN_TIMEOUT_S = float(os.getenv("QR_SCAN_TIMEOUT_S", 30.0))
+    QR_SCAN_MAX_SIDE = int(os.getenv("QR_SCAN_MAX_SIDE", 640))
     
     # --- Mission Parameters ---
     # Default altitude for missions in meters.
-    DEFAULT_MISSION_ALTITUDE = float(os.getenv("DEFAULT_MISSION_ALTITUDE", 15.0))
\ No newline at end of file
+    DEFAULT_MISSION_ALTITUDE = float(os.getenv("DEFAULT_MISSION_ALTITUDE", 15.0))
+    # A waypoint counts as reached within this horizontal distance, in meters.
+    MISSION_ACCEPTANCE_RADIUS_M = float(os.getenv("DRONE_REACH_TOLERANCE", 2.0))
+    # Expected horizontal speed, used to size the per-leg arrival timeout.
+    MISSION_CRUISE_SPEED_M_S = float(os.getenv("MISSION_CRUISE_SPEED_M_S", 5.0))
+    # Extra time allowed on every leg for acceleration, braking and climbing, in seconds.
+    MISSION_LEG_TIMEOUT_MARGIN_S = float(os.getenv("MISSION_LEG_TIMEOUT_MARGIN_S", 20.0))
+    # Time spent on the ground at each waypoint once landed, in seconds.
+    MISSION_GROUND_DWELL_S = float(os.getenv("MISSION_GROUND_DWELL_S", 0.0))
+    # How missions are flown: "stepwise" (goto/land/takeoff per waypoint, driven by the
+    # bridge) or "native" (one MAVLink mission upload flown by the autopilot).
+    MISSION_MODE = os.getenv("MISSION_MODE", "stepwise")
+    # Hover time at each waypoint in native mode, standing in for the landing.
+    MISSION_NATIVE_LOITER_S = float(os.getenv("MISSION_NATIVE_LOITER_S", 5.0))
+    # --- Telemetry Publishing ---
+    # Maximum number of telemetry frames sent to the backend per second, per drone.
+    TELEMETRY_MAX_RATE_HZ = float(os.getenv("TELEMETRY_MAX_RATE_HZ", 5.0))
+    # A full telemetry frame is always sent at least this often, even if nothing changed.
+    TELEMETRY_KEYFRAME_SECONDS = float(os.getenv("TELEMETRY_KEYFRAME_SECONDS", 5.0))
+    # When > 0, telemetry from all drones in this process is packed into one
+    # batched frame per interval (seconds) instead of one frame per drone.
+    TELEMETRY_BATCH_INTERVAL_S = float(os.getenv("TELEMETRY_BATCH_INTERVAL_S", 0.0))
+    # Minimum change per field before a new frame is worth sending.
+    TELEMETRY_DEADBAND_ALT_M = float(os.getenv("TELEMETRY_DEADBAND_ALT_M", 0.5))
+    TELEMETRY_DEADBAND_BATTERY_PCT = float(os.getenv("TELEMETRY_DEADBAND_BATTERY_PCT", 1.0))
+    TELEMETRY_DEADBAND_LATLNG_DEG = float(os.getenv("TELEMETRY_DEADBAND_LATLNG_DEG", 1e-6))
+    TELEMETRY_DEADBAND_SPEED_M_S = float(os.getenv("TELEMETRY_DEADBAND_SPEED_M_S", 0.2))
+    TELEMETRY_DEADBAND_HEADING_DEG = float(os.getenv("TELEMETRY_DEADBAND_HEADING_DEG", 1.0))
+    # Recent telemetry kept in memory per drone for /telemetry/history: number of
+    # samples, and minimum spacing between samples in seconds (3000 x 0.2s = 10 min).
+    TELEMETRY_HISTORY_SIZE = int(os.getenv("TELEMETRY_HISTORY_SIZE", 3000))
+    TELEMETRY_HISTORY_INTERVAL_S = float(os.getenv("TELEMETRY_HISTORY_INTERVAL_S", 0.2))
+    # --- Flight Recorder ---
+    # Directory for the binary per-flight logs (telemetry + mission events). Empty = off.
+    FLIGHT_RECORDER_DIR = os.getenv("FLIGHT_RECORDER_DIR", "")
+    # How often buffered records are written and fsync'd, in seconds.
+    FLIGHT_RECORDER_FLUSH_S = float(os.getenv("FLIGHT_RECORDER_FLUSH_S", 1.0))
+    # --- Replay (load testing without PX4) ---
+    # When set, the bridge replays this flight log instead of connecting to a drone.
+    REPLAY_FLIGHT_FILE = os.getenv("REPLAY_FLIGHT_FILE", "")
+    # Number of synthetic drones fed from the one recording, their id prefix and grid spacing.
+    REPLAY_DRONES = int(os.getenv("REPLAY_DRONES", 1))
+    REPLAY_ID_PREFIX = os.getenv("REPLAY_ID_PREFIX", "REPLAY")
+    REPLAY_SPACING_M = float(os.getenv("REPLAY_SPACING_M", 50.0))
+    # Time multiplier (1 = real time, 10 = ten times faster, 0 = as fast as the link allows).
+    REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", 1.0))
+    REPLAY_LOOP = os.getenv("REPLAY_LOOP", "false").lower() == "true"
+    # How long to wait at the end for queued messages to reach the backend, in seconds.
+    REPLAY_DRAIN_TIMEOUT_S = float(os.getenv("REPLAY_DRAIN_TIMEOUT_S", 30.0))
@@ -0,0 +1,158 @@
+"""
+Wire encodings for messages sent to the backend over the WebSocket.
+
+JSON text frames are the default and always understood by the backend. When both
+sides agree on the `drone-bridge.telemetry.v1` subprotocol at connect time,
+`drone_telemetry` messages are sent as compact fixed-layout binary frames instead;
+every other message type stays JSON.
+
+Binary telemetry frame, schema version 1 (little endian):
+
+    uint8   schema version (1)
+    uint8   message kind (1 = drone_telemetry)
+    uint8   drone id length N
+    N bytes drone id (utf-8)
+    float64 latitude_deg, longitude_deg
+    float32 absolute_altitude_m, relative_altitude_m, battery_percent,
+            battery_voltage_v, velocity_north_m_s, velocity_east_m_s,
+            velocity_down_m_s, ground_speed_m_s, heading_deg
+    uint8   flight mode code (index into FLIGHT_MODES)
+    uint8   flags (bit0 armed, bit1 is_global_position_ok, bit2 is_home_position_ok,
+            bit3 is_armable, bit4 armed is valid, bit5 health is valid,
+            bit6 in_air, bit7 in_air is valid)
+    uint8   landed state code (index into LANDED_STATES, 0 if unknown)
+
+Missing numeric fields are encoded as NaN and omitted again when decoding. The
+landed state byte was appended later; decoders that stop after the flags byte
+still read the rest of the frame correctly.
+"""
+import json
+import math
+import struct
+
+SUBPROTOCOL_JSON = "drone-bridge.json"
+SUBPROTOCOL_TELEMETRY_V1 = "drone-bridge.telemetry.v1"
+
+SCHEMA_VERSION = 1
+KIND_TELEMETRY = 1
+
+FLOAT64_FIELDS = ("latitude_deg", "longitude_deg")
+FLOAT32_FIELDS = (
+    "absolute_altitude_m", "relative_altitude_m", "battery_percent",
+    "battery_voltage_v", "velocity_north_m_s", "velocity_east_m_s",
+    "velocity_down_m_s", "ground_speed_m_s", "heading_deg",
+)
+HEALTH_FIELDS = ("is_global_position_ok", "is_home_position_ok", "is_armable")
+FLIGHT_MODES = (
+    "UNKNOWN", "READY", "TAKEOFF", "HOLD", "MISSION", "RETURN_TO_LAUNCH", "LAND",
+    "OFFBOARD", "FOLLOW_ME", "MANUAL", "ALTCTL", "POSCTL", "ACRO", "STABILIZED", "RATTITUDE",
+)
+_FLIGHT_MODE_CODES = {name: code for code, name in enumerate(FLIGHT_MODES)}
+LANDED_STATES = ("UNKNOWN", "ON_GROUND", "IN_AIR", "TAKING_OFF", "LANDING")
+_LANDED_STATE_CODES = {name: code for code, name in enumerate(LANDED_STATES)}
+
+KNOWN_FIELDS = frozenset(("droneId", "flight_mode", "armed", "in_air", "landed_state")
+                         + FLOAT64_FIELDS + FLOAT32_FIELDS + HEALTH_FIELDS)
+
+_HEADER = struct.Struct("<BBB")
+_BODY = struct.Struct(f"<{len(FLOAT64_FIELDS)}d{len(FLOAT32_FIELDS)}fBB")
+_LANDED = struct.Struct("<B")
+_NAN = float("nan")
+
+
+class JsonCodec:
+    """Default encoding: every message is a JSON text frame."""
+    subprotocol = SUBPROTOCOL_JSON
+
+    def encode(self, message: dict):
+        return json.dumps(message)
+
+
+class TelemetryStructCodec(JsonCodec):
+    """Encodes `drone_telemetry` messages as fixed-layout binary frames, everything else as JSON."""
+    subprotocol = SUBPROTOCOL_TELEMETRY_V1
+
+    def encode(self, message: dict):
+        payload = message.get("payload")
+        if message.get("type") != "drone_telemetry" or not isinstance(payload, dict) or not KNOWN_FIELDS.issuperset(payload):
+            # Anything the fixed layout cannot represent goes out as JSON unchanged
+            return super().encode(message)
+        return encode_telemetry(payload)
+
+
+def flight_mode_code(mode) -> int:
+    """Index of a flight mode (name or MAVSDK enum) in FLIGHT_MODES, 0 if unknown."""
+    return _FLIGHT_MODE_CODES.get(str(mode).rsplit(".", 1)[-1], 0) if mode is not None else 0
+
+
+def landed_state_code(state) -> int:
+    """Index of a landed state (name or MAVSDK enum) in LANDED_STATES, 0 if unknown."""
+    return _LANDED_STATE_CODES.get(str(state).rsplit(".", 1)[-1], 0) if state is not None else 0
+
+
+def encode_telemetry(payload: dict) -> bytes:
+    """Packs a telemetry payload into a schema v1 binary frame."""
+    drone_id = str(payload.get("droneId", "")).encode("utf-8")[:255]
+    numbers = [_NAN if payload.get(key) is None else payload[key] for key in FLOAT64_FIELDS + FLOAT32_FIELDS]
+
+    mode_code = flight_mode_code(payload.get("flight_mode"))
+
+    flags = 0
+    armed = payload.get("armed")
+    if armed is not None:
+        flags |= 0x10 | (0x01 if armed else 0)
+    if payload.get("is_global_position_ok") is not None:
+        flags |= 0x20
+        for bit, key in enumerate(HEALTH_FIELDS, start=1):
+            if payload.get(key):
+                flags |= 1 << bit
+    in_air = payload.get("in_air")
+    if in_air is not None:
+        flags |= 0x80 | (0x40 if in_air else 0)
+
+    return (_HEADER.pack(SCHEMA_VERSION, KIND_TELEMETRY, len(drone_id)) + drone_id
+            + _BODY.pack(*numbers, mode_code, flags) + _LANDED.pack(landed_state_code(payload.get("landed_state"))))
+
+
+def decode_telemetry(frame: bytes) -> dict:
+    """Unpacks a schema v1 binary telemetry frame back into a payload dict."""
+    version, kind, id_len = _HEADER.unpack_from(frame, 0)
+    if version != SCHEMA_VERSION or kind != KIND_TELEMETRY:
+        raise ValueError(f"Unsupported telemetry frame (version={version}, kind={kind})")
+    offset = _HEADER.size
+    payload = {"droneId": bytes(frame[offset:offset + id_len]).decode("utf-8")}
+    offset += id_len
+    *numbers, mode_code, flags = _BODY.unpack_from(frame, offset)
+    offset += _BODY.size
+
+    for key, value in zip(FLOAT64_FIELDS + FLOAT32_FIELDS, numbers):
+        if not math.isnan(value):
+            payload[key] = value
+    payload["flight_mode"] = FLIGHT_MODES[mode_code] if mode_code < len(FLIGHT_MODES) else "UNKNOWN"
+    if flags & 0x10:
+        payload["armed"] = bool(flags & 0x01)
+    if flags & 0x20:
+        for bit, key in enumerate(HEALTH_FIELDS, start=1):
+            payload[key] = bool(flags & (1 << bit))
+    if flags & 0x80:
+        payload["in_air"] = bool(flags & 0x40)
+    if len(frame) >= offset + _LANDED.size:
+        landed_code, = _LANDED.unpack_from(frame, offset)
+        if landed_code:
+            payload["landed_state"] = LANDED_STATES[landed_code] if landed_code < len(LANDED_STATES) else "UNKNOWN"
+    return payload
+
+
+CODECS = {codec.subprotocol: codec for codec in (JsonCodec(), TelemetryStructCodec())}
+
+
+def codec_for(subprotocol) -> JsonCodec:
+    """Returns the codec for a negotiated subprotocol, falling back to JSON."""
+    return CODECS.get(subprotocol, CODECS[SUBPROTOCOL_JSON])
+
+
+def offered_subprotocols(encoding: str) -> list:
+    """Subprotocols to offer at connect time for the configured telemetry encoding."""
+    if encoding == "binary":
+        return [SUBPROTOCOL_TELEMETRY_V1, SUBPROTOCOL_JSON]
+    return []
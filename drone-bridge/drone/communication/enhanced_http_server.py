@@ -1,15 +1,47 @@
 import asyncio
+import math
+import time
 from aiohttp import web
 import logging
 
 class EnhancedHTTPServer:
     """
     An asynchronous HTTP server using aiohttp to receive commands from the backend.
+    Commands are accepted under /api/v1/commands/... for the default drone, and under
+    /api/v1/drones/{drone_id}/commands/... when several drones share this server.
     """
-    def __init__(self, host, port, mission_manager):
+    COMMAND_ROUTES = (
+        ('start-mission', 'handle_start_mission'),
+        ('return-to-launch', 'handle_return_to_launch'),
+        ('takeoff', 'handle_takeoff'),
+        ('land', 'handle_land'),
+        ('demo-mission', 'handle_demo_mission'),
+        ('mission', 'handle_mission'),
+        ('reset', 'handle_reset'),
+    )
+
+    def __init__(self, host, port, mission_manager=None, mission_managers: dict = None, ws_client=None, unix_path: str = None,
+                 separation=None, loop_monitor=None, camera_streams=None, qr_scanner=None):
         self.host = host
         self.port = port
+        # When set, listen on a local Unix socket instead of TCP (used by fleet shards)
+        self.unix_path = unix_path
+        self.mission_managers = mission_managers or {}
+        # With a single hosted drone the un-prefixed routes keep working as before
+        if mission_manager is None and len(self.mission_managers) == 1:
+            mission_manager = next(iter(self.mission_managers.values()))
+        # ...and a single drone is also reachable under /api/v1/drones/{its id}/...
+        if mission_manager is not None and not self.mission_managers and getattr(mission_manager, 'drone_id', None):
+            self.mission_managers = {mission_manager.drone_id: mission_manager}
         self.mission_manager = mission_manager
+        self.ws_client = ws_client or getattr(mission_manager, 'ws_client', None)
+        # SeparationService of the hosted fleet, for proximity queries
+        self.separation = separation
+        self.loop_monitor = loop_monitor
+        # CameraStreamHub serving live MJPEG streams, when enabled
+        self.camera_streams = camera_streams
+        # QRScanner verifying deliveries from live camera frames, when enabled
+        self.qr_scanner = qr_scanner
         self.app = web.Application()
         self._setup_routes()
 
@@ -17,17 +49,39 @@ class EnhancedHTTPServer:
         """Configures the API routes for drone control."""
         router = self.app.router
         # Define routes with a /api/v1 prefix for consistency
-        api_v1 = web.Application()
-        api_v1.router.add_post('/commands/start-mission', self.handle_start_mission)
-        api_v1.router.add_post('/commands/return-to-launch', self.handle_return_to_launch)
-        api_v1.router.add_post('/commands/takeoff', self.handle_takeoff)
-        api_v1.router.add_post('/commands/land', self.handle_land)
-        api_v1.router.add_post('/commands/demo-mission', self.handle_demo_mission)
-        api_v1.router.add_post('/commands/mission', self.handle_mission)
-        api_v1.router.add_post('/commands/reset', self.handle_reset)
+        api_v1 = web.Application(middlewares=[self._resolve_mission_manager])
+        for prefix in ('', '/drones/{drone_id}'):
+            for command, handler in self.COMMAND_ROUTES:
+                api_v1.router.add_post(f'{prefix}/commands/{command}', getattr(self, handler))
+            api_v1.router.add_get(f'{prefix}/status', self.handle_drone_status)
+            api_v1.router.add_get(f'{prefix}/telemetry/history', self.handle_telemetry_history)
+            api_v1.router.add_get(f'{prefix}/nearby', self.handle_nearby)
+            api_v1.router.add_get(f'{prefix}/camera/{{camera_type}}/stream', self.handle_camera_stream)
+            api_v1.router.add_post(f'{prefix}/delivery/scan', self.handle_delivery_scan)
+        api_v1.router.add_get('/drones', self.handle_list_drones)
+        api_v1.router.add_get('/positions', self.handle_positions)
+        api_v1.router.add_get('/status/link', self.handle_link_status)
+        api_v1.router.add_get('/status/tasks', self.handle_flight_tasks)
+        api_v1.router.add_get('/status/separation', self.handle_separation_status)
+        api_v1.router.add_get('/status/loop', self.handle_loop_status)
+        api_v1.router.add_get('/status/camera', self.handle_camera_status)
         self.app.add_subapp('/api/v1/', api_v1)
         logging.info("HTTP routes configured under /api/v1")
 
+    @web.middleware
+    async def _resolve_mission_manager(self, request, handler):
+        """Picks the MissionManager for the drone addressed by the request path."""
+        drone_id = request.match_info.get('drone_id')
+        if drone_id is not None:
+            mission_manager = self.mission_managers.get(drone_id)
+            if mission_manager is None:
+                return web.json_response({'error': f'Unknown drone: {drone_id}'}, status=404)
+        else:
+            mission_manager = self.mission_manager
+            if mission_manager is None and '/commands/' in request.path:
+                return web.json_response({'error': 'Several drones are hosted here, use /api/v1/drones/{id}/commands/...'}, status=404)
+        request['mission_manager'] = mission_manager
+        return await handler(request)
 
     async def handle_start_mission(self, request):
         """Handles requests to start a new mission."""
@@ -38,7 +92,11 @@ class EnhancedHTTPServer:
                 return web.json_response({'error': 'Waypoints are required and must be a list.'}, status=400)
             
             # Start the mission in the background without blocking the HTTP response
-            asyncio.create_task(self.mission_manager.run_mission(waypoints))
+            mission_manager = request['mission_manager']
+            task = await mission_manager.launch(mission_manager.start_mission(waypoints, data.get('mode')),
+                                                name='mission', preempt=bool(data.get('preempt')))
+            if task is None:
+                return self._busy_response()
             
             return web.json_response({'status': 'success', 'message': 'Mission start command received.'}, status=202)
         except Exception as e:
@@ -49,7 +107,7 @@ class EnhancedHTTPServer:
         """Handles requests to command the drone to return to launch."""
         try:
             # Start the RTL command in the background
-            result = await self.mission_manager.return_to_launch()
+            result = await request['mission_manager'].return_to_launch()
             if result.get("status") == "success":
                 return web.json_response(result, status=202)
             else:
@@ -68,7 +126,9 @@ class EnhancedHTTPServer:
             logging.info(f"Takeoff command received - altitude: {altitude}m")
             
             # Start takeoff in background
-            asyncio.create_task(self.mission_manager.simple_takeoff(altitude))
+            mission_manager = request['mission_manager']
+            if await mission_manager.launch(mission_manager.simple_takeoff(altitude), name='takeoff') is None:
+                return self._busy_response()
             
             return web.json_response({
                 'status': 'success', 
@@ -83,8 +143,9 @@ class EnhancedHTTPServer:
         try:
             logging.info("Land command received")
             
-            # Start landing in background
-            asyncio.create_task(self.mission_manager.simple_land())
+            # Start landing in background, preempting any running mission
+            mission_manager = request['mission_manager']
+            await mission_manager.launch(mission_manager.simple_land(), name='land', preempt=True)
             
             return web.json_response({
                 'status': 'success', 
@@ -107,7 +168,9 @@ class EnhancedHTTPServer:
             ]
             
             # Start demo mission in background
-            asyncio.create_task(self.mission_manager.run_mission(demo_waypoints))
+            mission_manager = request['mission_manager']
+            if await mission_manager.launch(mission_manager.run_mission(demo_waypoints), name='demo-mission') is None:
+                return self._busy_response()
             
             return web.json_response({
                 'status': 'success', 
@@ -134,7 +197,11 @@ class EnhancedHTTPServer:
                 }, status=400)
             
             # Start mission in background
-            asyncio.create_task(self.mission_manager.run_mission(waypoints))
+            mission_manager = request['mission_manager']
+            task = await mission_manager.launch(mission_manager.start_mission(waypoints, data.get('mode')),
+                                                name='mission', preempt=bool(data.get('preempt')))
+            if task is None:
+                return self._busy_response()
             
             return web.json_response({
                 'status': 'success', 
@@ -150,8 +217,9 @@ class EnhancedHTTPServer:
         try:
             logging.info("Reset drone request received")
             
-            # Reset drone state in background
-            asyncio.create_task(self.mission_manager.reset_drone_state())
+            # Reset drone state in background, preempting any running mission
+            mission_manager = request['mission_manager']
+            await mission_manager.launch(mission_manager.reset_drone_state(), name='reset', preempt=True)
             
             return web.json_response({
                 'status': 'success', 
@@ -161,10 +229,216 @@ class EnhancedHTTPServer:
             logging.error(f"Error handling reset request: {e}")
             return web.json_response({'error': 'Internal server error'}, status=500)
 
+    def _busy_response(self):
+        """Response for commands refused because another flight task is running."""
+        return web.json_response({
+            'status': 'error',
+            'message': 'Another flight task is running for this drone. Send "preempt": true or return-to-launch first.'
+        }, status=409)
+
+    async def handle_flight_tasks(self, request):
+        """Reports the running flight task of each drone."""
+        mission_manager = self.mission_manager or next(iter(self.mission_managers.values()), None)
+        if mission_manager is None:
+            return web.json_response({'running': {}})
+        return web.json_response(mission_manager.tasks.stats())
+
+    async def handle_drone_status(self, request):
+        """
+        Returns the drone's state snapshot. With `?since=<version>` the request waits
+        (up to `wait` seconds, default 25) for a newer version before answering, so
+        clients can long-poll instead of polling on a timer.
+        """
+        mission_manager = request['mission_manager']
+        if mission_manager is None:
+            return web.json_response({'error': 'Several drones are hosted here, use /api/v1/drones/{id}/status'}, status=404)
+        store = mission_manager.state_store
+        try:
+            since = request.query.get('since')
+            if since is None:
+                return web.json_response(store.snapshot(mission_manager.drone_id))
+            wait = min(float(request.query.get('wait', 25)), 60.0)
+            snapshot = await store.changed(mission_manager.drone_id, int(since), timeout=wait)
+            if snapshot is None:
+                return web.Response(status=304)
+            return web.json_response(snapshot)
+        except ValueError:
+            return web.json_response({'error': '`since` must be an integer and `wait` a number.'}, status=400)
+
+    async def handle_telemetry_history(self, request):
+        """
+        Returns the drone's recent telemetry as columns (t, lat, lng, alt, battery, speed).
+        `since` is a Unix timestamp, or a negative number of seconds before now;
+        `max_points` thins the result evenly.
+        """
+        mission_manager = request['mission_manager']
+        if mission_manager is None:
+            return web.json_response({'error': 'Several drones are hosted here, use /api/v1/drones/{id}/telemetry/history'}, status=404)
+        history = mission_manager.state_store.record(mission_manager.drone_id).history
+        if history is None:
+            return web.json_response({'error': 'No telemetry history for this drone'}, status=404)
+        try:
+            since = request.query.get('since')
+            since = float(since) if since is not None else None
+            if since is not None and since < 0:
+                since += time.time()
+            max_points = int(request.query['max_points']) if 'max_points' in request.query else None
+        except ValueError:
+            return web.json_response({'error': '`since` and `max_points` must be numbers.'}, status=400)
+        if max_points is not None and max_points < 1:
+            return web.json_response({'error': '`max_points` must be at least 1.'}, status=400)
+        return web.json_response(history.to_dict(since, max_points))
+
+    async def handle_nearby(self, request):
+        """
+        Lists the airborne drones near this one: within `radius` meters (default 50),
+        or the `k` nearest when `k` is given.
+        """
+        mission_manager = request['mission_manager']
+        if self.separation is None or mission_manager is None:
+            return web.json_response({'error': 'Proximity queries are only available in fleet mode'}, status=404)
+        try:
+            k = int(request.query['k']) if 'k' in request.query else None
+            radius = float(request.query.get('radius', 50))
+        except ValueError:
+            return web.json_response({'error': '`radius` and `k` must be numbers.'}, status=400)
+        if k is not None and k < 1:
+            return web.json_response({'error': '`k` must be at least 1.'}, status=400)
+        if not 0 < radius < math.inf:
+            return web.json_response({'error': '`radius` must be a positive number of meters.'}, status=400)
+        if k is not None:
+            found = self.separation.index.nearest(mission_manager.drone_id, k)
+        else:
+            found = self.separation.index.neighbours(mission_manager.drone_id, radius)
+        return web.json_response({
+            'droneId': mission_manager.drone_id,
+            'tracked': mission_manager.drone_id in self.separation.index,
+            'nearby': [{'droneId': drone_id, 'distanceM': round(distance, 1)} for drone_id, distance in found],
+        })
+
+    async def handle_positions(self, request):
+        """Airborne drones with fresh positions; the fleet supervisor polls this for separation checks."""
+        if self.separation is None:
+            return web.json_response({'error': 'Positions are only available in fleet mode'}, status=404)
+        return web.json_response({'drones': [
+            {'droneId': drone_id, 'lat': lat, 'lng': lng, 'alt': alt}
+            for drone_id, lat, lng, alt in self.separation.positions()
+        ]})
+
+    async def handle_separation_status(self, request):
+        """Reports the current separation conflicts between hosted drones."""
+        if self.separation is None:
+            return web.json_response({'error': 'Separation monitoring is only available in fleet mode'}, status=404)
+        return web.json_response(self.separation.status())
+
+    async def handle_loop_status(self, request):
+        """Reports event-loop lag, to spot anything blocking the loop."""
+        if self.loop_monitor is None:
+            return web.json_response({'error': 'Loop monitoring is disabled'}, status=404)
+        return web.json_response(self.loop_monitor.stats())
+
+    async def handle_camera_stream(self, request):
+        """
+        Streams a drone camera as multipart MJPEG (viewable in a browser <img> tag).
+        Every viewer shares one capture per camera; a viewer that falls behind
+        skips frames instead of slowing the others down.
+        """
+        mission_manager = request['mission_manager']
+        camera_type = request.match_info['camera_type']
+        if self.camera_streams is None:
+            return web.json_response({'error': 'Camera streaming is disabled'}, status=404)
+        if mission_manager is None:
+            return web.json_response({'error': 'Several drones are hosted here, use /api/v1/drones/{id}/camera/{type}/stream'}, status=404)
+        if camera_type not in self.camera_streams.camera_types():
+            return web.json_response({'error': f'Unknown camera: {camera_type}'}, status=404)
+        if not self.camera_streams.available:
+            return web.json_response({'error': 'AirSim is not available'}, status=503)
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+            'Cache-Control': 'no-cache, no-store',
+        })
+        await response.prepare(request)
+        viewer = self.camera_streams.subscribe(mission_manager.drone_id, camera_type)
+        try:
+            while True:
+                # aiohttp doesn't cancel the handler when the viewer goes away, and no
+                # write fails while the capture is backing off, so check the connection
+                try:
+                    frame = await asyncio.wait_for(viewer.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    frame = None
+                if request.transport is None or request.transport.is_closing():
+                    break
+                if frame is None:
+                    continue
+                await response.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(frame)
+                                     + frame + b'\r\n')
+        except (ConnectionResetError, ConnectionError):
+            pass
+        finally:
+            self.camera_streams.unsubscribe(viewer)
+        return response
+
+    async def handle_delivery_scan(self, request):
+        """
+        Confirms a delivery from the drone's camera: scans live frames until the
+        order's QR code is seen or the scan times out, then reports the outcome.
+        Body: {"orderId": ..., "timeoutS": optional, "camera": optional}.
+        """
+        mission_manager = request['mission_manager']
+        if self.qr_scanner is None:
+            return web.json_response({'error': 'QR scanning is disabled'}, status=404)
+        if mission_manager is None:
+            return web.json_response({'error': 'Several drones are hosted here, use /api/v1/drones/{id}/delivery/scan'}, status=404)
+        from ..services.camera_service import CAMERA_IDS
+        try:
+            data = await request.json()
+            order_id = data.get('orderId')
+            if not order_id:
+                return web.json_response({'error': 'orderId is required.'}, status=400)
+            camera_type = data.get('camera')
+            if camera_type is not None and camera_type not in CAMERA_IDS:
+                return web.json_response({'error': f'Unknown camera: {camera_type}'}, status=404)
+            if not self.qr_scanner.camera.available:
+                return web.json_response({'error': 'AirSim is not available'}, status=503)
+            timeout_s = float(data['timeoutS']) if data.get('timeoutS') is not None else None
+            result = await self.qr_scanner.scan_for(str(order_id), timeout_s=timeout_s, camera_type=camera_type)
+            return web.json_response(dict(result, droneId=mission_manager.drone_id))
+        except (ValueError, TypeError):
+            return web.json_response({'error': 'Body must be JSON with a numeric timeoutS.'}, status=400)
+        except Exception as e:
+            logging.error(f"Error handling delivery scan request: {e}")
+            return web.json_response({'error': 'Internal server error'}, status=500)
+
+    async def handle_camera_status(self, request):
+        """Reports the live camera streams, their viewers and adaptive rate/quality."""
+        if self.camera_streams is None:
+            return web.json_response({'error': 'Camera streaming is disabled'}, status=404)
+        return web.json_response(self.camera_streams.stats())
+
+    async def handle_list_drones(self, request):
+        """Lists the drones hosted by this server."""
+        drone_ids = list(self.mission_managers) or [getattr(self.mission_manager, 'drone_id', None)]
+        return web.json_response({'drones': [drone_id for drone_id in drone_ids if drone_id]})
+
+    async def handle_link_status(self, request):
+        """Reports the backend link state and outbound queue statistics."""
+        try:
+            return web.json_response(self.ws_client.stats())
+        except Exception as e:
+            logging.error(f"Error handling link status request: {e}")
+            return web.json_response({'error': 'Internal server error'}, status=500)
+
     async def start(self):
         """Starts the aiohttp server."""
         runner = web.AppRunner(self.app)
         await runner.setup()
+        if self.unix_path:
+            site = web.UnixSite(runner, self.unix_path)
+            await site.start()
+            logging.info(f"HTTP server started on unix://{self.unix_path}")
+            return
         site = web.TCPSite(runner, self.host, self.port)
         await site.start()
         logging.info(f"HTTP server started on http://{self.host}:{self.port}")
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+from config.config import Config
+
+
+class TelemetryBatcher:
+    """
+    Packs the telemetry of every drone hosted by this process into one
+    `drone_telemetry_batch` frame per tick over a single WebSocketClient.
+
+    Publishers hand it full telemetry payloads through `send_telemetry`, the same
+    call they would make on WebSocketClient. Each batch entry carries only the
+    fields that changed since that drone's previous entry, plus a full keyframe
+    every `keyframe_seconds` so the backend can recover from a missed batch.
+    """
+    def __init__(self, ws_client, interval_s: float = None, keyframe_seconds: float = None):
+        config = Config()
+        self.ws_client = ws_client
+        self.interval_s = interval_s or config.TELEMETRY_BATCH_INTERVAL_S or 0.2
+        self.keyframe_seconds = keyframe_seconds or config.TELEMETRY_KEYFRAME_SECONDS
+        self.batches_sent = 0
+        self._pending = {}
+        self._last_sent = {}
+        self._last_keyframe_at = {}
+
+    async def send_telemetry(self, telemetry_data):
+        """Stages a drone's latest telemetry for the next batch."""
+        drone_id = telemetry_data.get("droneId")
+        staged = self._pending.setdefault(drone_id, {})
+        staged.update(telemetry_data)
+
+    def _delta(self, drone_id, payload: dict, now: float) -> dict:
+        """Builds the batch entry for one drone: changed fields, or everything on a keyframe."""
+        previous = self._last_sent.setdefault(drone_id, {})
+        keyframe = now - self._last_keyframe_at.get(drone_id, 0.0) >= self.keyframe_seconds
+        if keyframe:
+            entry = dict(payload)
+            self._last_keyframe_at[drone_id] = now
+        else:
+            entry = {key: value for key, value in payload.items() if previous.get(key) != value}
+        previous.update(payload)
+        entry["droneId"] = drone_id
+        entry["keyframe"] = keyframe
+        return entry
+
+    def build_batch(self) -> list:
+        """Drains the staged telemetry into a list of per-drone deltas."""
+        now = time.monotonic()
+        pending, self._pending = self._pending, {}
+        batch = []
+        for drone_id, payload in pending.items():
+            entry = self._delta(drone_id, payload, now)
+            # Skip drones whose only "change" is the bookkeeping fields
+            if entry["keyframe"] or len(entry) > 2:
+                batch.append(entry)
+        return batch
+
+    async def flush(self) -> int:
+        """Sends one batched frame if anything is staged. Returns the number of drones in it."""
+        batch = self.build_batch()
+        if not batch:
+            return 0
+        await self.ws_client.send_message({"type": "drone_telemetry_batch", "payload": batch})
+        self.batches_sent += 1
+        return len(batch)
+
+    async def run(self):
+        """Flushes a batch every tick until cancelled."""
+        logging.info(f"Telemetry batcher started (one frame every {self.interval_s}s).")
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Error sending telemetry batch: {e}")
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from config.config import Config
+
+
+def default_deadbands(config: Config = None) -> dict:
+    """Builds the per-field deadbands for the telemetry cache fields from the configuration."""
+    config = config or Config()
+    return {
+        "latitude_deg": config.TELEMETRY_DEADBAND_LATLNG_DEG,
+        "longitude_deg": config.TELEMETRY_DEADBAND_LATLNG_DEG,
+        "absolute_altitude_m": config.TELEMETRY_DEADBAND_ALT_M,
+        "relative_altitude_m": config.TELEMETRY_DEADBAND_ALT_M,
+        "battery_percent": config.TELEMETRY_DEADBAND_BATTERY_PCT,
+        "battery_voltage_v": 0.05,
+        "velocity_north_m_s": config.TELEMETRY_DEADBAND_SPEED_M_S,
+        "velocity_east_m_s": config.TELEMETRY_DEADBAND_SPEED_M_S,
+        "velocity_down_m_s": config.TELEMETRY_DEADBAND_SPEED_M_S,
+        "ground_speed_m_s": config.TELEMETRY_DEADBAND_SPEED_M_S,
+        "heading_deg": config.TELEMETRY_DEADBAND_HEADING_DEG,
+    }
+
+
+class DeadbandFilter:
+    """
+    Decides whether a telemetry sample differs enough from the last one sent.
+    Numeric fields listed in `deadbands` must move by at least their deadband;
+    any other field counts as changed as soon as its value differs.
+    """
+    def __init__(self, deadbands: dict):
+        self.deadbands = deadbands
+
+    def changed_fields(self, previous: dict, current: dict) -> list:
+        """Returns the names of the fields whose change exceeds their deadband."""
+        if not previous:
+            return list(current)
+        changed = []
+        for key, value in current.items():
+            old = previous.get(key)
+            if old is None:
+                if value is not None:
+                    changed.append(key)
+                continue
+            band = self.deadbands.get(key)
+            if band is not None and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                if abs(value - old) >= band:
+                    changed.append(key)
+            elif value != old:
+                changed.append(key)
+        return changed
+
+    def is_significant(self, previous: dict, current: dict) -> bool:
+        """True if at least one field moved past its deadband."""
+        return bool(self.changed_fields(previous, current))
+
+
+class TelemetryPublisher:
+    """
+    Coalescing, rate-limited stage between a TelemetryCache and the WebSocket client.
+    Sends at most `max_rate_hz` frames per second, skips frames whose fields all stay
+    within their deadbands, and forces a full keyframe every `keyframe_seconds`.
+    """
+    def __init__(self, cache, ws_client, max_rate_hz: float = None, keyframe_seconds: float = None, deadbands: dict = None):
+        config = Config()
+        self.cache = cache
+        self.ws_client = ws_client
+        self.max_rate_hz = max_rate_hz or config.TELEMETRY_MAX_RATE_HZ
+        self.keyframe_seconds = keyframe_seconds or config.TELEMETRY_KEYFRAME_SECONDS
+        self.filter = DeadbandFilter(deadbands if deadbands is not None else default_deadbands(config))
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self._last_sent = {}
+        self._last_sent_at = 0.0
+        self._last_keyframe_at = 0.0
+
+    def _payload(self, sample: dict) -> dict:
+        """Tags a telemetry sample with the drone id before it goes on the wire."""
+        payload = {"droneId": self.cache.drone_id}
+        payload.update(sample)
+        return payload
+
+    async def publish_once(self) -> bool:
+        """Sends the current cache contents if they are new enough. Returns True if a frame was sent."""
+        now = time.monotonic()
+        sample = self.cache.snapshot()
+        if not sample:
+            return False
+        keyframe = now - self._last_keyframe_at >= self.keyframe_seconds
+        if not keyframe and not self.filter.is_significant(self._last_sent, sample):
+            self.frames_skipped += 1
+            return False
+
+        await self.ws_client.send_telemetry(self._payload(sample))
+        self.frames_sent += 1
+        self._last_sent = sample
+        self._last_sent_at = now
+        if keyframe:
+            self._last_keyframe_at = now
+        return True
+
+    async def run(self):
+        """Publishes cache updates until cancelled."""
+        min_interval = 1.0 / self.max_rate_hz
+        logging.info(f"Telemetry publisher started for {self.cache.drone_id} "
+                     f"(max {self.max_rate_hz} Hz, keyframe every {self.keyframe_seconds}s).")
+        try:
+            while True:
+                # Wake on new data, or at keyframe time if the drone has gone quiet
+                await self.cache.wait_for_update(timeout=self.keyframe_seconds)
+
+                # Hold back until the rate limit allows another frame; updates
+                # arriving meanwhile are coalesced into the next snapshot.
+                wait = self._last_sent_at + min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                try:
+                    await self.publish_once()
+                except Exception as e:
+                    logging.error(f"Error publishing telemetry for {self.cache.drone_id}: {e}")
+        except asyncio.CancelledError:
+            logging.info(f"Telemetry publisher for {self.cache.drone_id} stopped "
+                         f"({self.frames_sent} sent, {self.frames_skipped} skipped).")
+            raise
@@ -1,26 +1,83 @@
 import asyncio
+import collections
 import websockets
-import json
 import logging
+from config.config import Config
+from .codec import codec_for, offered_subprotocols
+
+# Delivery policies for outbound message types
+MUST_DELIVER = "must_deliver"   # queued in order, replayed after a reconnect, only dropped past a large bound
+ORDERED = "ordered"             # queued in order, replayed after a reconnect, oldest dropped when full
+LATEST_WINS = "latest_wins"     # only the newest message per drone is kept
+MERGE_BATCH = "merge_batch"     # pending batches are merged per drone, never dropped whole
+
+MESSAGE_POLICIES = {
+    "drone_telemetry": LATEST_WINS,
+    "drone_telemetry_batch": MERGE_BATCH,
+    "mission_update": MUST_DELIVER,
+}
+
+
+def merge_batches(older: list, newer: list) -> list:
+    """Merges two lists of per-drone telemetry deltas; newer fields win."""
+    merged = {entry.get("droneId"): dict(entry) for entry in older}
+    for entry in newer:
+        current = merged.setdefault(entry.get("droneId"), {})
+        keyframe = current.get("keyframe", False) or entry.get("keyframe", False)
+        current.update(entry)
+        current["keyframe"] = keyframe
+    return list(merged.values())
 
 class WebSocketClient:
     """
     Manages the WebSocket connection to the Node.js backend, handling sending
     of structured messages like telemetry and mission updates.
+
+    Outbound messages are queued and written by a single writer task, so callers
+    never wait on network I/O. Mission updates are must-deliver: they survive a
+    reconnect and a failed send, and are only dropped (oldest first, logged as an
+    error) once WS_MISSION_QUEUE_SIZE of them are waiting. Other untyped messages
+    are ordered but bounded by WS_OUTBOUND_QUEUE_SIZE, losing the oldest first.
+    Telemetry is latest-wins and may be dropped under backpressure.
+
+    The wire encoding is negotiated per connection through the WebSocket
+    subprotocol; JSON is used whenever the backend does not pick a compact one.
     """
-    def __init__(self, uri):
+    def __init__(self, uri, max_queue_size: int = None, encoding: str = None, max_mission_queue_size: int = None):
+        config = Config()
         self.uri = uri
         self.websocket = None
         self.is_connected = False
+        self.max_queue_size = max_queue_size or config.WS_OUTBOUND_QUEUE_SIZE
+        self.max_mission_queue_size = max_mission_queue_size or config.WS_MISSION_QUEUE_SIZE
+        self.subprotocols = offered_subprotocols(encoding or config.WS_TELEMETRY_ENCODING)
+        self.codec = codec_for(None)
+        self._must_deliver = collections.deque()
+        self._ordered = collections.deque()
+        self._latest = {}
+        self._pending = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._writer_task = None
+        self.sent_count = 0
+        self.dropped = {"mission_overflow": 0, "ordered_overflow": 0, "encode_failed": 0,
+                        "telemetry_superseded": 0, "telemetry_batches_merged": 0,
+                        "telemetry_send_failed": 0}
 
     async def connect(self):
         """Establishes connection to the backend and keeps it alive."""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer())
         while True:
             try:
                 logging.info(f"Attempting to connect to WebSocket at {self.uri}...")
-                self.websocket = await websockets.connect(self.uri)
+                self.websocket = await websockets.connect(self.uri, subprotocols=self.subprotocols or None)
+                self.codec = codec_for(self.websocket.subprotocol)
                 self.is_connected = True
-                logging.info(f"Successfully connected to WebSocket at {self.uri}")
+                self._connected.set()
+                logging.info(f"Successfully connected to WebSocket at {self.uri} (encoding: {self.codec.subprotocol})")
+                if self._must_deliver or self._ordered:
+                    logging.info(f"Replaying {len(self._must_deliver) + len(self._ordered)} queued messages after reconnect.")
                 # Keep the connection alive by waiting for it to close
                 await self.websocket.wait_closed()
             except (websockets.exceptions.ConnectionClosedError, ConnectionRefusedError) as e:
@@ -29,17 +86,117 @@ class WebSocketClient:
                 logging.error(f"An unexpected WebSocket error occurred: {e}. Retrying in 5 seconds...")
             finally:
                 self.is_connected = False
+                self._connected.clear()
                 await asyncio.sleep(5)
 
-    async def send_message(self, data):
-        """Sends a JSON-formatted message to the backend if connected."""
-        if self.is_connected and self.websocket:
+    def enqueue(self, data):
+        """Queues a message for the writer task without blocking."""
+        policy = MESSAGE_POLICIES.get(data.get("type"), ORDERED)
+        if policy == LATEST_WINS:
+            key = (data.get("type"), (data.get("payload") or {}).get("droneId"))
+            if key in self._latest:
+                self.dropped["telemetry_superseded"] += 1
+            self._latest[key] = data
+        elif policy == MERGE_BATCH:
+            key = (data.get("type"), None)
+            pending = self._latest.get(key)
+            if pending is not None:
+                self.dropped["telemetry_batches_merged"] += 1
+                data = {"type": data["type"], "payload": merge_batches(pending["payload"], data["payload"])}
+            self._latest[key] = data
+        elif policy == MUST_DELIVER:
+            if len(self._must_deliver) >= self.max_mission_queue_size:
+                self._must_deliver.popleft()
+                self.dropped["mission_overflow"] += 1
+                logging.error(f"Mission update queue full ({self.max_mission_queue_size} waiting), "
+                              f"dropped the oldest mission update.")
+            self._must_deliver.append(data)
+        else:
+            if len(self._ordered) >= self.max_queue_size:
+                self._ordered.popleft()
+                self.dropped["ordered_overflow"] += 1
+                logging.warning("Outbound queue full, dropped the oldest queued message.")
+            self._ordered.append(data)
+        self._drained.clear()
+        self._pending.set()
+
+    def _next_message(self):
+        """Picks the next message to write: must-deliver first, then ordered, then the oldest pending telemetry."""
+        if self._must_deliver:
+            return MUST_DELIVER, self._must_deliver.popleft()
+        if self._ordered:
+            return ORDERED, self._ordered.popleft()
+        if self._latest:
+            key = next(iter(self._latest))
+            return MESSAGE_POLICIES.get(key[0], LATEST_WINS), self._latest.pop(key)
+        return None, None
+
+    async def _writer(self):
+        """Single task that drains the outbound queue onto the socket."""
+        while True:
+            await self._pending.wait()
+            await self._connected.wait()
+            policy, data = self._next_message()
+            if data is None:
+                self._pending.clear()
+                self._drained.set()
+                continue
             try:
-                await self.websocket.send(json.dumps(data))
+                frame = self.codec.encode(data)
+            except Exception as e:
+                # Retrying would fail the same way, so the message is dropped
+                self.dropped["encode_failed"] += 1
+                logging.error(f"Failed to encode {data.get('type')} message, dropped it: {e}")
+                continue
+            try:
+                await self.websocket.send(frame)
+                self.sent_count += 1
             except websockets.exceptions.ConnectionClosed:
-                logging.warning("Failed to send message, WebSocket is closed.")
+                self._requeue(policy, data)
+                self.is_connected = False
+                self._connected.clear()
+                logging.warning("Failed to send message, WebSocket is closed. Waiting for reconnect.")
+            except Exception as e:
+                self._requeue(policy, data)
+                logging.error(f"Failed to send message: {e}. Retrying in 1 second...")
+                await asyncio.sleep(1)
+
+    def _requeue(self, policy, data):
+        """Puts a message that failed to send back at the head, so it is written first next time."""
+        if policy == MUST_DELIVER:
+            self._must_deliver.appendleft(data)
+        elif policy == ORDERED:
+            self._ordered.appendleft(data)
         else:
-            logging.warning("Cannot send message, WebSocket is not connected.")
+            self.dropped["telemetry_send_failed"] += 1
+
+    async def wait_drained(self):
+        """Waits until every queued message has been written (used for backpressure)."""
+        if self.queue_depth():
+            await self._drained.wait()
+
+    def queue_depth(self) -> int:
+        """Number of messages waiting to be written."""
+        return len(self._must_deliver) + len(self._ordered) + len(self._latest)
+
+    def stats(self) -> dict:
+        """Outbound queue statistics for status endpoints."""
+        return {
+            "connected": self.is_connected,
+            "encoding": self.codec.subprotocol,
+            "queueDepth": self.queue_depth(),
+            "mustDeliverQueued": len(self._must_deliver),
+            "orderedQueued": len(self._ordered),
+            "telemetryPending": len(self._latest),
+            "maxQueueSize": self.max_queue_size,
+            "maxMissionQueueSize": self.max_mission_queue_size,
+            "sent": self.sent_count,
+            "dropped": dict(self.dropped),
+        }
+
+    async def send_message(self, data):
+        """Queues a message for the backend and returns at once."""
+        self.enqueue(data)
 
     async def send_telemetry(self, telemetry_data):
         """Specifically sends telemetry data under the 'drone_telemetry' event."""
@@ -55,4 +212,4 @@ class WebSocketClient:
             "type": "mission_update",
             "payload": update_data
         }
-        await self.send_message(message)
\ No newline at end of file
+        await self.send_message(message)
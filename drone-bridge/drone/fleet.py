@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import List
+from config.config import Config
+from .mavsdk_client import MAVSDKClient
+from .mission_manager import MissionManager
+from .state_store import StateStore
+from .mission_registry import MissionTaskRegistry
+from .communication.ws_client import WebSocketClient
+from .communication.telemetry_batcher import TelemetryBatcher
+from .communication.enhanced_http_server import EnhancedHTTPServer
+from .services.separation_service import SeparationService
+from .loop_monitor import LoopLagMonitor
+
+
+@dataclass
+class FleetDroneConfig:
+    id: str
+    address: str
+    mavsdk_port: int = None
+
+
+def load_fleet_config(path: str) -> List[FleetDroneConfig]:
+    """Reads the list of drones to host from a JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    drones = [FleetDroneConfig(id=e["id"], address=e["address"], mavsdk_port=e.get("mavsdk_port")) for e in entries]
+    ids = [d.id for d in drones]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate drone ids in fleet config {path}")
+    return drones
+
+
+class FleetDrone:
+    """The per-drone objects hosted by a fleet runner."""
+    __slots__ = ("id", "mavsdk_client", "mission_manager")
+
+    def __init__(self, spec: FleetDroneConfig, ws_client: WebSocketClient, telemetry_sink, tasks: MissionTaskRegistry,
+                 state_store: StateStore):
+        self.id = spec.id
+        self.mavsdk_client = MAVSDKClient(
+            mavsdk_server_address=spec.address,
+            ws_client=ws_client,
+            drone_id=spec.id,
+            telemetry_sink=telemetry_sink,
+            mavsdk_server_port=spec.mavsdk_port,
+            state_store=state_store
+        )
+        self.mission_manager = MissionManager(
+            drone=self.mavsdk_client.drone,
+            ws_client=ws_client,
+            telemetry=self.mavsdk_client.telemetry,
+            drone_id=spec.id,
+            state_store=state_store,
+            tasks=tasks,
+            recorder=self.mavsdk_client.recorder
+        )
+
+
+class FleetRunner:
+    """
+    Hosts many drones in one asyncio loop: one MAVSDKClient and MissionManager per
+    drone, one shared WebSocketClient with batched telemetry, and one HTTP server
+    routing /api/v1/drones/{id}/commands/... to the right drone.
+    """
+    def __init__(self, drones: List[FleetDroneConfig], config: Config = None, http_port: int = None, http_host: str = None,
+                 unix_path: str = None, watch_separation: bool = True):
+        self.config = config or Config()
+        # Shards leave the checks to the supervisor, which sees the whole fleet
+        self.watch_separation = watch_separation
+        self.ws_client = WebSocketClient(uri=self.config.BACKEND_WS_URL)
+        self.batcher = TelemetryBatcher(self.ws_client)
+        self.tasks = MissionTaskRegistry()
+        self.state_store = StateStore()
+        self.drones = {spec.id: FleetDrone(spec, self.ws_client, self.batcher, self.tasks, self.state_store) for spec in drones}
+        self.separation = SeparationService(self.state_store, self.ws_client)
+        self.loop_monitor = LoopLagMonitor()
+        self.http_server = EnhancedHTTPServer(
+            host=http_host or self.config.HTTP_HOST,
+            port=http_port or self.config.HTTP_PORT,
+            mission_managers={drone_id: d.mission_manager for drone_id, d in self.drones.items()},
+            ws_client=self.ws_client,
+            unix_path=unix_path,
+            separation=self.separation,
+            loop_monitor=self.loop_monitor
+        )
+
+    async def _connect_drone(self, drone: FleetDrone):
+        """Connects one drone, retrying without affecting the others."""
+        while True:
+            try:
+                await drone.mavsdk_client.connect()
+                logging.info(f"[{drone.id}] Connected and streaming telemetry.")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"[{drone.id}] Connection failed: {e}. Retrying in 5 seconds...")
+                await asyncio.sleep(5)
+
+    async def run(self):
+        """Starts the shared services and connects every drone concurrently."""
+        logging.info(f"Starting fleet of {len(self.drones)} drones: {', '.join(self.drones)}")
+        await self.http_server.start()
+        try:
+            await asyncio.gather(
+                self.ws_client.connect(),
+                self.batcher.run(),
+                *([self.separation.watch()] if self.watch_separation else []),
+                self.loop_monitor.run(),
+                *(self._connect_drone(drone) for drone in self.drones.values())
+            )
+        finally:
+            await self.tasks.cancel_all()
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from dataclasses import asdict
+from typing import List
+
+import aiohttp
+from aiohttp import web
+
+from config.config import Config
+from .communication.ws_client import WebSocketClient
+from .fleet import FleetDroneConfig, FleetRunner
+from .services.separation_service import SeparationService
+
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+# A shard that stays up this long before crashing is restarted without the accumulated backoff
+SHARD_STABLE_AFTER_S = 60
+
+
+async def _run_shard(runner: FleetRunner, supervisor_pid: int):
+    """Runs the shard's fleet until it fails or the supervisor process goes away."""
+    async def watch_supervisor():
+        while os.getppid() == supervisor_pid:
+            await asyncio.sleep(2)
+        logging.warning("Supervisor exited, shutting down shard.")
+
+    tasks = [asyncio.create_task(runner.run()), asyncio.create_task(watch_supervisor())]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    for task in done:
+        task.result()
+
+
+def _shard_main(index: int, drones: list, unix_path: str, port: int, supervisor_pid: int):
+    """Entry point of a shard process: runs a FleetRunner for its slice of the fleet."""
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - shard{index} - %(levelname)s - %(message)s')
+    specs = [FleetDroneConfig(**d) for d in drones]
+    runner = FleetRunner(specs, http_host="127.0.0.1", http_port=port, unix_path=unix_path, watch_separation=False)
+    try:
+        asyncio.run(_run_shard(runner, supervisor_pid))
+    except KeyboardInterrupt:
+        pass
+
+
+class Shard:
+    """One worker process hosting a slice of the fleet, reachable over a local endpoint."""
+    def __init__(self, index: int, drones: List[FleetDroneConfig], unix_path: str = None, port: int = None):
+        self.index = index
+        self.drones = drones
+        self.unix_path = unix_path
+        self.port = port
+        self.process = None
+        self.session = None
+        self.restarts = 0
+        self.crash_streak = 0  # crashes since the shard last stayed up for a while; sets the backoff
+        self.started_at = None
+        self.next_restart_at = None  # loop time at which a crashed shard is respawned
+        self.positions = []  # airborne drone positions from the last successful poll
+        self.positions_at = None
+
+    @property
+    def base_url(self) -> str:
+        # The host part is ignored when connecting through a Unix socket
+        return "http://shard" if self.unix_path else f"http://127.0.0.1:{self.port}"
+
+    def start(self, context):
+        """Spawns (or respawns) the shard process."""
+        self.process = context.Process(
+            target=_shard_main,
+            args=(self.index, [asdict(d) for d in self.drones], self.unix_path, self.port, os.getpid()),
+            name=f"fleet-shard-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+        logging.info(f"Shard {self.index} started (pid {self.process.pid}) with drones: {', '.join(d.id for d in self.drones)}")
+
+    def open_session(self):
+        """Creates the pooled HTTP session used to forward commands to this shard."""
+        connector = aiohttp.UnixConnector(path=self.unix_path) if self.unix_path else aiohttp.TCPConnector()
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+
+    def stop(self):
+        """Terminates the shard process."""
+        if self.process and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+
+
+class FleetSupervisor:
+    """
+    Shards a fleet across several worker processes, each running a FleetRunner.
+    The supervisor owns the public HTTP port, forwards /api/v1/drones/{id}/... to
+    the shard hosting that drone over a local socket, answers /api/v1/status/...
+    with every shard's report, and restarts crashed shards without touching the
+    others.
+
+    Separation is checked here rather than in the shards, so that drones hosted
+    by different shards are compared too: the supervisor polls every shard's
+    airborne positions into one SeparationService and sends its alerts to the
+    backend over its own WebSocket connection.
+    """
+    def __init__(self, drones: List[FleetDroneConfig], shard_count: int = None, config: Config = None):
+        self.config = config or Config()
+        shard_count = max(1, min(shard_count or self.config.FLEET_SHARDS, len(drones)))
+        ipc_dir = self.config.FLEET_IPC_DIR or tempfile.gettempdir()
+        self.shards = []
+        for index in range(shard_count):
+            if HAS_UNIX_SOCKETS:
+                endpoint = {"unix_path": os.path.join(ipc_dir, f"drone-bridge-{os.getpid()}-shard{index}.sock")}
+            else:
+                endpoint = {"port": self.config.FLEET_SHARD_BASE_PORT + index}
+            # Round-robin keeps shards balanced whatever the order of the fleet file
+            self.shards.append(Shard(index, drones[index::shard_count], **endpoint))
+        self.shard_for_drone = {d.id: shard for shard in self.shards for d in shard.drones}
+        # Spawned processes do not inherit the parent's gRPC/asyncio state
+        self._context = multiprocessing.get_context("spawn")
+        self.ws_client = WebSocketClient(uri=self.config.BACKEND_WS_URL)
+        self.separation = SeparationService(None, self.ws_client, source=self._collect_positions)
+        self.app = web.Application()
+        self.app.router.add_get('/api/v1/drones', self.handle_list_drones)
+        self.app.router.add_get('/api/v1/shards', self.handle_list_shards)
+        self.app.router.add_get('/api/v1/status/separation', self.handle_separation_status)
+        self.app.router.add_get('/api/v1/status/{name}', self.handle_fleet_status)
+        self.app.router.add_get('/api/v1/drones/{drone_id}/nearby', self.handle_nearby)
+        self.app.router.add_route('*', '/api/v1/drones/{drone_id}/{tail:.*}', self.handle_forward)
+
+    async def handle_list_drones(self, request):
+        """Lists every drone in the fleet."""
+        return web.json_response({'drones': list(self.shard_for_drone)})
+
+    async def handle_list_shards(self, request):
+        """Reports shard health and restart counts."""
+        return web.json_response({'shards': [{
+            'index': shard.index,
+            'pid': shard.process.pid if shard.process else None,
+            'alive': bool(shard.process and shard.process.is_alive()),
+            'restarts': shard.restarts,
+            'crashStreak': shard.crash_streak,
+            'drones': [d.id for d in shard.drones],
+        } for shard in self.shards]})
+
+    async def _shard_status(self, shard: Shard, path: str):
+        """One shard's answer to a status request, or the reason it has none."""
+        try:
+            async with shard.session.get(f"{shard.base_url}{path}", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status != 200:
+                    return {'error': f'HTTP {response.status}'}
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {'error': f'Shard unavailable: {e}'}
+
+    async def handle_fleet_status(self, request):
+        """Asks every shard for the same status report and returns them keyed by shard index."""
+        path = str(request.rel_url)
+        reports = await asyncio.gather(*(self._shard_status(shard, path) for shard in self.shards))
+        return web.json_response({'shards': {str(shard.index): report for shard, report in zip(self.shards, reports)}})
+
+    async def _shard_positions(self, shard: Shard) -> list:
+        """
+        Airborne drone positions reported by one shard. While it is unavailable its
+        last known positions are used for up to SeparationService.STALE_AFTER_S, so
+        a missed poll doesn't drop its drones and clear their conflicts.
+        """
+        report = await self._shard_status(shard, '/api/v1/positions')
+        if 'drones' in report:
+            shard.positions = [(d['droneId'], d['lat'], d['lng'], d['alt']) for d in report['drones']]
+            shard.positions_at = time.monotonic()
+        elif shard.positions and time.monotonic() - shard.positions_at > SeparationService.STALE_AFTER_S:
+            logging.warning(f"Shard {shard.index} positions are stale ({report.get('error')}), "
+                            f"no longer checking separation for its drones.")
+            shard.positions = []
+        return shard.positions
+
+    async def _collect_positions(self) -> list:
+        """Positions of the airborne drones of every shard, for the separation checks."""
+        reports = await asyncio.gather(*(self._shard_positions(shard) for shard in self.shards))
+        return [position for report in reports for position in report]
+
+    async def handle_separation_status(self, request):
+        """Reports the current separation conflicts across the whole fleet."""
+        return web.json_response(self.separation.status())
+
+    async def handle_nearby(self, request):
+        """Lists the airborne drones near one drone, whichever shard hosts them."""
+        drone_id = request.match_info['drone_id']
+        if drone_id not in self.shard_for_drone:
+            return web.json_response({'error': f'Unknown drone: {drone_id}'}, status=404)
+        index = self.separation.index
+        try:
+            k = int(request.query['k']) if 'k' in request.query else None
+            radius = float(request.query.get('radius', 50))
+        except ValueError:
+            return web.json_response({'error': '`radius` and `k` must be numbers.'}, status=400)
+        if k is not None and k < 1:
+            return web.json_response({'error': '`k` must be at least 1.'}, status=400)
+        if not 0 < radius < math.inf:
+            return web.json_response({'error': '`radius` must be a positive number of meters.'}, status=400)
+        found = index.nearest(drone_id, k) if k is not None else index.neighbours(drone_id, radius)
+        return web.json_response({
+            'droneId': drone_id,
+            'tracked': drone_id in index,
+            'nearby': [{'droneId': other, 'distanceM': round(distance, 1)} for other, distance in found],
+        })
+
+    async def handle_forward(self, request):
+        """Forwards a drone command to the shard that hosts the drone."""
+        drone_id = request.match_info['drone_id']
+        shard = self.shard_for_drone.get(drone_id)
+        if shard is None:
+            return web.json_response({'error': f'Unknown drone: {drone_id}'}, status=404)
+        try:
+            body = await request.read()
+            headers = {'Content-Type': request.headers.get('Content-Type', 'application/json')}
+            async with shard.session.request(request.method, f"{shard.base_url}{request.rel_url}", data=body, headers=headers) as response:
+                payload = await response.read()
+                return web.Response(body=payload, status=response.status, content_type=response.content_type)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"Shard {shard.index} unavailable for {drone_id}: {e}")
+            return web.json_response({'error': f'Shard for {drone_id} is unavailable, retry shortly'}, status=503)
+
+    async def _watch_shards(self):
+        """Restarts any shard whose process has exited, each on its own backoff."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(1)
+            for shard in self.shards:
+                if not shard.process or shard.process.is_alive():
+                    continue
+                if shard.next_restart_at is None:
+                    shard.restarts += 1
+                    # Back off a little if a shard keeps crashing; one that ran for a while starts over
+                    if time.monotonic() - shard.started_at >= SHARD_STABLE_AFTER_S:
+                        shard.crash_streak = 0
+                    shard.crash_streak += 1
+                    backoff = min(30, shard.crash_streak)
+                    shard.next_restart_at = loop.time() + backoff
+                    logging.error(f"Shard {shard.index} exited with code {shard.process.exitcode}. "
+                                  f"Restarting in {backoff}s (restart #{shard.restarts})...")
+                elif loop.time() >= shard.next_restart_at:
+                    shard.next_restart_at = None
+                    shard.start(self._context)
+
+    async def run(self):
+        """Starts the shards and serves the public HTTP API until cancelled."""
+        logging.info(f"Sharding {len(self.shard_for_drone)} drones across {len(self.shards)} processes.")
+        for shard in self.shards:
+            shard.start(self._context)
+            shard.open_session()
+
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        site = web.TCPSite(runner, self.config.HTTP_HOST, self.config.HTTP_PORT)
+        await site.start()
+        logging.info(f"Fleet supervisor listening on http://{self.config.HTTP_HOST}:{self.config.HTTP_PORT}")
+        background = [asyncio.create_task(self.ws_client.connect()), asyncio.create_task(self.separation.watch())]
+        try:
+            await self._watch_shards()
+        finally:
+            for task in background:
+                task.cancel()
+            for shard in self.shards:
+                shard.stop()
+                await shard.session.close()
+            await runner.cleanup()
@@ -0,0 +1,276 @@
+"""
+Append-only binary flight log: every telemetry sample and mission event of one
+drone, one file per flight (a new file is started each time the drone arms).
+
+File layout (little endian):
+
+    header, 128 bytes
+        4s      magic b"DBFR"
+        uint16  format version (1), header size (128), record size (64)
+        32s     drone id (utf-8, NUL padded)
+        float64 start time (Unix seconds)
+        uint64  record count
+        float64 time of the last record
+    records, 64 bytes each, in time order
+        float64 t (Unix seconds)
+        uint8   kind (1 = telemetry, 2 = mission event)
+        uint8   flags (telemetry: bit0 armed, bit1 in_air, bit4 armed valid, bit5 in_air valid)
+        uint16  code (telemetry: flight mode index in codec.FLIGHT_MODES in the low
+                byte, landed state index in codec.LANDED_STATES in the high byte;
+                event: status index in MISSION_STATUSES)
+        float64 latitude_deg, longitude_deg
+        float32 x 8 (telemetry: absolute_altitude_m, relative_altitude_m,
+                battery_percent, battery_voltage_v, velocity_north_m_s,
+                velocity_east_m_s, velocity_down_m_s, heading_deg;
+                event: current waypoint, total waypoints, progress, then NaN)
+
+The header's record count is rewritten after each flush, so a log cut short by a
+crash is still readable up to the last complete record. Missing values are NaN.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+
+from .communication.codec import FLIGHT_MODES, LANDED_STATES, flight_mode_code, landed_state_code
+
+MAGIC = b"DBFR"
+FORMAT_VERSION = 1
+KIND_TELEMETRY = 1
+KIND_EVENT = 2
+
+HEADER = struct.Struct("<4sHHH32sdQd")
+HEADER_SIZE = 128
+COUNTERS = struct.Struct("<Qd")
+COUNTERS_OFFSET = HEADER.size - COUNTERS.size
+RECORD = struct.Struct("<dBBH2d8f4x")
+
+TELEMETRY_FIELDS = (
+    "absolute_altitude_m", "relative_altitude_m", "battery_percent", "battery_voltage_v",
+    "velocity_north_m_s", "velocity_east_m_s", "velocity_down_m_s", "heading_deg",
+)
+MISSION_STATUSES = (
+    "UNKNOWN", "ARMING", "TAKING_OFF", "HOVERING", "HEADING_TO_WAYPOINT", "REACHED_WAYPOINT",
+    "PREPARING_NEXT_LEG", "RETURNING_TO_LAUNCH", "LANDING", "LANDED", "MISSION_COMPLETE", "ERROR",
+)
+_STATUS_CODES = {name: code for code, name in enumerate(MISSION_STATUSES)}
+_NAN = float("nan")
+
+
+def _number(value) -> float:
+    return _NAN if value is None else value
+
+
+class FlightRecorder:
+    """
+    Buffers records in memory and appends them to the current flight file from a
+    worker thread every `flush_interval_s`, followed by an fsync. Recording is a
+    struct.pack into a bytearray, so it never waits on the disk.
+    """
+    def __init__(self, drone_id: str, directory: str, flush_interval_s: float = 1.0):
+        self.drone_id = drone_id
+        self.directory = directory
+        self.flush_interval_s = flush_interval_s
+        self.path = None
+        self.records_written = 0
+        self._buffer = bytearray()
+        self._chunks = []  # (path, data, record count, last t) waiting for the writer
+        self._last_t = 0.0
+        self._armed = None
+        self._file = None
+        self._file_path = None
+        self._file_count = 0
+        self._writing = None  # executor future of the write in progress
+
+    def new_flight(self, t: float = None):
+        """Starts a new flight file; records after this call go into it."""
+        self._seal()
+        t = t or time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(t)) + f"-{int(t * 1000) % 1000:03d}"
+        self.path = os.path.join(self.directory, f"{self.drone_id}-{stamp}.flight")
+        logging.info(f"[{self.drone_id}] Recording flight to {self.path}")
+
+    def _append(self, t: float, kind: int, flags: int, code: int, lat: float, lng: float, numbers):
+        if self.path is None:
+            self.new_flight(t)
+        self._buffer += RECORD.pack(t, kind, flags, code, lat, lng, *numbers)
+        self._last_t = t
+
+    def _seal(self):
+        """Moves the buffered records to the writer queue."""
+        if self._buffer:
+            self._chunks.append((self.path, bytes(self._buffer), len(self._buffer) // RECORD.size, self._last_t))
+            self._buffer.clear()
+
+    def record_telemetry(self, telemetry, t: float = None):
+        """Records the latest values of a TelemetryCache (or a telemetry dict)."""
+        t = time.time() if t is None else t
+        get = telemetry.get
+        armed, in_air = get("armed"), get("in_air")
+        # Each arming starts a new flight log
+        if armed and self._armed is False:
+            self.new_flight(t)
+        if armed is not None:
+            self._armed = armed
+        flags = 0
+        if armed is not None:
+            flags |= 0x10 | (0x01 if armed else 0)
+        if in_air is not None:
+            flags |= 0x20 | (0x02 if in_air else 0)
+        code = flight_mode_code(get("flight_mode")) | landed_state_code(get("landed_state")) << 8
+        self._append(t, KIND_TELEMETRY, flags, code,
+                     _number(get("latitude_deg")), _number(get("longitude_deg")),
+                     [_number(get(key)) for key in TELEMETRY_FIELDS])
+
+    def record_event(self, payload: dict, t: float = None):
+        """Records a mission status update as sent by MissionManager."""
+        numbers = [_number(payload.get("currentWaypoint")), _number(payload.get("totalWaypoints")),
+                   _number(payload.get("progress"))] + [_NAN] * 5
+        self._append(time.time() if t is None else t, KIND_EVENT, 0,
+                     _STATUS_CODES.get(payload.get("status"), 0), _NAN, _NAN, numbers)
+
+    def _write_chunks(self, chunks):
+        """Appends chunks to their flight files and fsyncs. Runs in a worker thread."""
+        for path, data, count, last_t in chunks:
+            if path != self._file_path:
+                self._close_file()
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._file = open(path, "w+b")
+                self._file_path = path
+                self._file_count = 0
+                header = HEADER.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE, RECORD.size,
+                                     self.drone_id.encode("utf-8")[:32], RECORD.unpack_from(data)[0], 0, 0.0)
+                self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(data)
+            self._file_count += count
+            # Only count records once they are in the file
+            self._file.seek(COUNTERS_OFFSET)
+            self._file.write(COUNTERS.pack(self._file_count, last_t))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.records_written += count
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_path = None
+
+    async def _writer_idle(self):
+        """Waits until no write is in progress. Cancelling the waiter leaves the write running."""
+        while self._writing is not None and not self._writing.done():
+            await asyncio.wait({self._writing})
+
+    async def flush(self):
+        """Writes everything recorded so far to disk without blocking the event loop."""
+        self._seal()
+        # The file is only ever touched by one worker thread at a time
+        await self._writer_idle()
+        if not self._chunks:
+            return
+        chunks, self._chunks = self._chunks, []
+        self._writing = asyncio.get_running_loop().run_in_executor(None, self._write_chunks, chunks)
+        # A cancelled flush must not abandon the write halfway; run() waits for it before closing
+        await asyncio.shield(self._writing)
+
+    async def run(self):
+        """Flushes on a timer until cancelled, then writes the remainder and closes the file."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval_s)
+                try:
+                    await self.flush()
+                except OSError as e:
+                    logging.error(f"[{self.drone_id}] Flight recorder write failed: {e}")
+        finally:
+            # flush() waits for a write still running from a flush cancelled mid-write
+            await self.flush()
+            await self._writer_idle()
+            self._close_file()
+
+
+class FlightLog:
+    """
+    Read-only view of a flight file through mmap. Records are unpacked on access,
+    so scanning a long flight does not load it into memory.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size, record_size, drone_id, started_at, count, last_t = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} flight log")
+        self.header_size = header_size
+        self.drone_id = drone_id.rstrip(b"\0").decode("utf-8")
+        self.started_at = started_at
+        # Trust the header, but never beyond the records actually on disk
+        self.count = min(count, (len(self._map) - header_size) // RECORD.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _time_at(self, index: int) -> float:
+        return struct.unpack_from("<d", self._map, self.header_size + index * RECORD.size)[0]
+
+    def index_at(self, t: float) -> int:
+        """Index of the first record at or after time t (binary search)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_at(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def raw(self, start: float = None, end: float = None):
+        """Yields raw record tuples between two times (inclusive start, exclusive end)."""
+        first = 0 if start is None else self.index_at(start)
+        last = self.count if end is None else self.index_at(end)
+        view = memoryview(self._map)[self.header_size + first * RECORD.size:self.header_size + last * RECORD.size]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def records(self, start: float = None, end: float = None):
+        """Yields decoded records: telemetry dicts and mission event dicts, with a `t` key."""
+        for t, kind, flags, code, lat, lng, *numbers in self.raw(start, end):
+            if kind == KIND_TELEMETRY:
+                mode_code, landed_code = code & 0xFF, code >> 8
+                record = {"t": t, "kind": "telemetry",
+                          "flight_mode": FLIGHT_MODES[mode_code] if mode_code < len(FLIGHT_MODES) else "UNKNOWN"}
+                if landed_code:
+                    record["landed_state"] = LANDED_STATES[landed_code] if landed_code < len(LANDED_STATES) else "UNKNOWN"
+                if lat == lat and lng == lng:
+                    record["latitude_deg"], record["longitude_deg"] = lat, lng
+                for key, value in zip(TELEMETRY_FIELDS, numbers):
+                    if value == value:
+                        record[key] = value
+                if flags & 0x10:
+                    record["armed"] = bool(flags & 0x01)
+                if flags & 0x20:
+                    record["in_air"] = bool(flags & 0x02)
+            else:
+                current, total, progress = numbers[:3]
+                record = {"t": t, "kind": "event",
+                          "status": MISSION_STATUSES[code] if code < len(MISSION_STATUSES) else "UNKNOWN",
+                          "currentWaypoint": int(current) if current == current else None,
+                          "totalWaypoints": int(total) if total == total else None,
+                          "progress": progress if progress == progress else None}
+            yield record
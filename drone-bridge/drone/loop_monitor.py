@@ -0,0 +1,43 @@
+import asyncio
+import collections
+import logging
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a periodic `asyncio.sleep` wakes up.
+    Anything that blocks the loop (a synchronous RPC, disk I/O, heavy CPU work)
+    shows up here as lag, and delays telemetry, HTTP handlers and WebSocket sends
+    by the same amount.
+    """
+    def __init__(self, interval_s: float = 0.05, window: int = 1200, warn_ms: float = 100.0):
+        self.interval_s = interval_s
+        self.warn_ms = warn_ms
+        self.samples = collections.deque(maxlen=window)
+        self.max_lag_ms = 0.0
+
+    def record(self, lag_ms: float):
+        self.samples.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms >= self.warn_ms:
+            logging.warning(f"Event loop blocked for {lag_ms:.0f} ms.")
+
+    async def run(self):
+        """Samples the lag every `interval_s` until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_s)
+            self.record(max(0.0, (loop.time() - started - self.interval_s) * 1000.0))
+
+    def stats(self) -> dict:
+        """Lag over the recent window, in milliseconds."""
+        if not self.samples:
+            return {"samples": 0, "meanMs": 0.0, "p99Ms": 0.0, "maxMs": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "samples": len(ordered),
+            "meanMs": round(sum(ordered) / len(ordered), 2),
+            "p99Ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+            "maxMs": round(self.max_lag_ms, 2),
+        }
@@ -2,51 +2,155 @@ import asyncio
 import logging
 from mavsdk import System
 from .communication.ws_client import WebSocketClient
+from .communication.telemetry_publisher import TelemetryPublisher
+from .telemetry_cache import TelemetryCache
+from .telemetry_history import TelemetryHistory
+from .flight_recorder import FlightRecorder
+from .state_store import StateStore, store as default_store
+from config.config import Config
 
 class MAVSDKClient:
     """
     Handles the connection to the drone via MAVSDK and streams telemetry.
+    Each MAVSDK telemetry stream is drained by its own subscriber task into a
+    shared TelemetryCache, so readers never wait on gRPC.
     """
-    def __init__(self, mavsdk_server_address: str, ws_client: WebSocketClient):
-        self.drone = System()
+    def __init__(self, mavsdk_server_address: str, ws_client: WebSocketClient, drone_id: str = "DRONE-001",
+                 telemetry_sink=None, mavsdk_server_port: int = None, state_store: StateStore = None):
+        if mavsdk_server_address.startswith("sim://"):
+            # In-process kinematic simulator, no PX4 or mavsdk_server needed
+            from .simulator import system_for_address
+            self.drone = system_for_address(mavsdk_server_address, drone_id)
+        else:
+            # Each drone hosted in one process needs its own mavsdk_server gRPC port
+            self.drone = System(port=mavsdk_server_port) if mavsdk_server_port else System()
         self.mavsdk_server_address = mavsdk_server_address
         self.ws_client = ws_client
+        self.drone_id = drone_id
+        self.telemetry = TelemetryCache(drone_id)
+        config = Config()
+        self.history = TelemetryHistory(drone_id, config.TELEMETRY_HISTORY_SIZE, config.TELEMETRY_HISTORY_INTERVAL_S)
+        self.recorder = FlightRecorder(drone_id, config.FLIGHT_RECORDER_DIR, config.FLIGHT_RECORDER_FLUSH_S) \
+            if config.FLIGHT_RECORDER_DIR else None
+        # Status readers find the live telemetry and link health through the state store
+        self.state_store = state_store or default_store
+        self.state_store.attach_telemetry(drone_id, self.telemetry)
+        self.state_store.attach_history(drone_id, self.history)
+        # Telemetry goes straight to the WebSocket client unless a batcher is given
+        self.publisher = TelemetryPublisher(self.telemetry, telemetry_sink or ws_client)
+        self._subscriber_tasks = []
 
     async def connect(self):
         """Connects to the drone."""
         logging.info(f"Connecting to drone at {self.mavsdk_server_address}...")
         await self.drone.connect(system_address=self.mavsdk_server_address)
-        
+
         logging.info("Waiting for drone to connect...")
         async for state in self.drone.core.connection_state():
             if state.is_connected:
                 logging.info("Drone discovered!")
+                self.state_store.update_link(self.drone_id, px4_connected=True)
                 break
-        
+
         logging.info("Waiting for drone to have a global position estimate...")
         async for health in self.drone.telemetry.health():
             if health.is_global_position_ok and health.is_home_position_ok:
                 logging.info("Global position estimate OK.")
                 break
-        
+
         # Start streaming telemetry in the background
         asyncio.ensure_future(self.stream_telemetry())
 
+    def _subscriptions(self):
+        """Maps each subscriber name to its MAVSDK stream and a cache-field converter."""
+        telemetry = self.drone.telemetry
+        return {
+            "position": (telemetry.position, lambda p: {
+                "latitude_deg": p.latitude_deg,
+                "longitude_deg": p.longitude_deg,
+                "absolute_altitude_m": p.absolute_altitude_m,
+                "relative_altitude_m": p.relative_altitude_m,
+            }),
+            "battery": (telemetry.battery, lambda b: {
+                # MAVSDK 1.x reports the remaining charge as a 0..1 fraction
+                "battery_percent": b.remaining_percent * 100.0,
+                "battery_voltage_v": b.voltage_v,
+            }),
+            "velocity_ned": (telemetry.velocity_ned, lambda v: {
+                "velocity_north_m_s": v.north_m_s,
+                "velocity_east_m_s": v.east_m_s,
+                "velocity_down_m_s": v.down_m_s,
+                "ground_speed_m_s": (v.north_m_s ** 2 + v.east_m_s ** 2) ** 0.5,
+            }),
+            "heading": (telemetry.heading, lambda h: {"heading_deg": h.heading_deg}),
+            "flight_mode": (telemetry.flight_mode, lambda m: {"flight_mode": str(m)}),
+            "armed": (telemetry.armed, lambda a: {"armed": a}),
+            "in_air": (telemetry.in_air, lambda a: {"in_air": a}),
+            "landed_state": (telemetry.landed_state, lambda s: {"landed_state": str(s)}),
+            "health": (telemetry.health, lambda h: {
+                "is_global_position_ok": h.is_global_position_ok,
+                "is_home_position_ok": h.is_home_position_ok,
+                "is_armable": h.is_armable,
+            }),
+        }
+
+    async def _subscribe(self, name, stream_factory, convert):
+        """Drains one MAVSDK stream into the cache, resubscribing if the stream fails."""
+        while True:
+            try:
+                async for sample in stream_factory():
+                    self.telemetry.update(**convert(sample))
+                    # Position drives the history; other fields are sampled alongside it
+                    if name == "position":
+                        self.history.record(self.telemetry)
+                        if self.recorder is not None:
+                            self.recorder.record_telemetry(self.telemetry)
+                logging.warning(f"Telemetry stream '{name}' ended. Resubscribing...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error in telemetry stream '{name}': {e}. Resubscribing in 1 second...")
+            await asyncio.sleep(1)
+
+    async def _watch_link(self):
+        """Mirrors the flight controller connection state into the state store."""
+        while True:
+            try:
+                async for state in self.drone.core.connection_state():
+                    self.state_store.update_link(self.drone_id, px4_connected=state.is_connected)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Error in connection state stream: {e}. Resubscribing in 1 second...")
+            await asyncio.sleep(1)
+
+    def start_telemetry(self):
+        """Starts one subscriber task per telemetry stream (idempotent)."""
+        if self._subscriber_tasks:
+            return
+        for name, (stream_factory, convert) in self._subscriptions().items():
+            task = asyncio.create_task(self._subscribe(name, stream_factory, convert))
+            self._subscriber_tasks.append(task)
+        self._subscriber_tasks.append(asyncio.create_task(self._watch_link()))
+        if self.recorder is not None:
+            self._subscriber_tasks.append(asyncio.create_task(self.recorder.run()))
+        logging.info(f"Started {len(self._subscriber_tasks)} telemetry subscribers.")
+
+    async def stop_telemetry(self):
+        """Cancels all subscriber tasks."""
+        for task in self._subscriber_tasks:
+            task.cancel()
+        await asyncio.gather(*self._subscriber_tasks, return_exceptions=True)
+        self._subscriber_tasks = []
+
     async def stream_telemetry(self):
-        """Streams telemetry data from the drone to the WebSocket client."""
+        """Starts the subscribers and publishes the cached telemetry to the WebSocket client."""
         logging.info("Starting telemetry streaming.")
+        self.start_telemetry()
         try:
-            async for position in self.drone.telemetry.position():
-                telemetry_data = {
-                    "latitude_deg": position.latitude_deg,
-                    "longitude_deg": position.longitude_deg,
-                    "absolute_altitude_m": position.absolute_altitude_m,
-                    "relative_altitude_m": position.relative_altitude_m
-                }
-                # Emit telemetry via the WebSocket client
-                await self.ws_client.send_telemetry(telemetry_data)
-                await asyncio.sleep(1)  # Send updates every 1 second
+            await self.publisher.run()
         except asyncio.CancelledError:
             logging.info("Telemetry streaming task was cancelled.")
+            await self.stop_telemetry()
         except Exception as e:
-            logging.error(f"Error in telemetry streaming: {e}")
\ No newline at end of file
+            logging.error(f"Error in telemetry streaming: {e}")
@@ -1,9 +1,15 @@
 import asyncio
 import logging
+import time
 from mavsdk import System
-from .state_store import mission_state
+from mavsdk.mission import MissionItem, MissionPlan
+from .state_store import StateStore, store as default_store
 from .communication.ws_client import WebSocketClient
+from .telemetry_cache import TelemetryCache
+from .mission_registry import MissionTaskRegistry
+from .flight_recorder import FlightRecorder
 from config.config import Config
+from utils.geo import haversine_m
 
 class MissionManager:
     """
@@ -12,10 +18,93 @@ class MissionManager:
     feedback to the backend via WebSockets.
     """
 
-    def __init__(self, drone: System, ws_client: WebSocketClient):
+    def __init__(self, drone: System, ws_client: WebSocketClient, telemetry: TelemetryCache = None,
+                 drone_id: str = None, state_store: StateStore = None, tasks: MissionTaskRegistry = None,
+                 recorder: FlightRecorder = None):
         self.drone = drone
         self.ws_client = ws_client
+        self.telemetry = telemetry
         self.config = Config()
+        self.drone_id = drone_id or (telemetry.drone_id if telemetry is not None else self.config.DRONE_ID)
+        # Mission progress lives in this drone's record of the shared state store
+        self.state_store = state_store or default_store
+        self.mission_state = self.state_store.record(self.drone_id).mission
+        # Flight tasks of every drone in this process, so commands can preempt each other
+        self.tasks = tasks or MissionTaskRegistry()
+        # Mission events go into the drone's flight log next to its telemetry
+        self.recorder = recorder
+
+    async def launch(self, coro, name: str, preempt: bool = False):
+        """Runs a flight coroutine as this drone's tracked task. Returns None if refused."""
+        return await self.tasks.start(self.drone_id, coro, name=name, preempt=preempt)
+
+    async def _is_drone_connected(self) -> bool:
+        """Checks the link using the telemetry cache, falling back to the MAVSDK stream."""
+        if self.telemetry is not None:
+            return self.telemetry.last_update_age() < 5.0
+        async for state in self.drone.core.connection_state():
+            return state.is_connected
+        return False
+
+    def _position(self):
+        """Latest (lat, lng) from the telemetry cache, or None if unknown."""
+        if self.telemetry is None:
+            return None
+        lat, lng = self.telemetry.get("latitude_deg"), self.telemetry.get("longitude_deg")
+        return None if lat is None or lng is None else (lat, lng)
+
+    def _distance_to(self, lat: float, lng: float):
+        """Horizontal distance in meters from the drone to a point, or None if unknown."""
+        position = self._position()
+        return None if position is None else haversine_m(position[0], position[1], lat, lng)
+
+    def _leg_timeout(self, distance_m) -> float:
+        """Time allowed to cover a leg, from its length and the cruise speed."""
+        distance_m = distance_m if distance_m is not None else 0.0
+        return distance_m / self.config.MISSION_CRUISE_SPEED_M_S * 1.5 + self.config.MISSION_LEG_TIMEOUT_MARGIN_S
+
+    def _is_on_ground(self) -> bool:
+        """True once the landed state (or in_air flag) reports the drone on the ground."""
+        landed_state = self.telemetry.get("landed_state")
+        if landed_state is not None:
+            return landed_state.endswith("ON_GROUND")
+        return self.telemetry.get("in_air") is False
+
+    async def _wait_until(self, condition, timeout: float, fallback_sleep: float) -> bool:
+        """
+        Waits until `condition()` holds, re-checking on every telemetry update.
+        Returns False if `timeout` expires first. Without a telemetry cache it falls
+        back to sleeping for `fallback_sleep` seconds.
+        """
+        if self.telemetry is None:
+            await asyncio.sleep(fallback_sleep)
+            return True
+        deadline = time.monotonic() + timeout
+        while not condition():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await self.telemetry.wait_for_update(timeout=remaining)
+        return True
+
+    async def _wait_for_arrival(self, lat: float, lng: float, timeout: float) -> bool:
+        """Waits until the drone is within the acceptance radius of a point."""
+        radius = self.config.MISSION_ACCEPTANCE_RADIUS_M
+        def arrived():
+            distance = self._distance_to(lat, lng)
+            return distance is not None and distance <= radius
+        return await self._wait_until(arrived, timeout, fallback_sleep=15)
+
+    async def _wait_for_altitude(self, altitude_m: float, timeout: float = 30.0) -> bool:
+        """Waits until the drone has climbed to (nearly) the given relative altitude."""
+        def reached():
+            current = self.telemetry.get("relative_altitude_m")
+            return current is not None and current >= altitude_m * 0.9
+        return await self._wait_until(reached, timeout, fallback_sleep=8)
+
+    async def _wait_for_landed(self, timeout: float = 60.0, fallback_sleep: float = 5) -> bool:
+        """Waits until the drone reports being on the ground."""
+        return await self._wait_until(self._is_on_ground, timeout, fallback_sleep=fallback_sleep)
 
     async def reset_drone_state(self):
         """Reset drone to a clean state before mission."""
@@ -44,11 +133,11 @@ class MissionManager:
         """
         Executes a multi-stage mission where the drone lands at each waypoint.
         """
-        if mission_state["is_running"]:
+        if self.mission_state.is_running:
             logging.warning("A mission is already in progress. Ignoring new request.")
             return
 
-        mission_state.update({"is_running": True, "total_waypoints": len(waypoints), "current_waypoint": 0})
+        self.state_store.update_mission(self.drone_id, is_running=True, total_waypoints=len(waypoints), current_waypoint=0)
         logging.info(f"Starting mission with {len(waypoints)} waypoints.")
 
         try:
@@ -58,7 +147,8 @@ class MissionManager:
             # 0.5. Check if drone is connected and ready
             logging.info("-- Checking drone connection...")
             try:
-                await asyncio.wait_for(self.drone.core.connection_state(), timeout=5.0)
+                if not await asyncio.wait_for(self._is_drone_connected(), timeout=5.0):
+                    raise asyncio.TimeoutError()
                 logging.info("-- Drone connection verified.")
             except asyncio.TimeoutError:
                 logging.error("-- Drone connection check timed out. Mission aborted.")
@@ -97,26 +187,35 @@ class MissionManager:
                 await self._send_status_update("ERROR", f"Mission aborted due to an error: {e}")
                 return
                 
-            await asyncio.sleep(8)  # Allow time to stabilize
+            # Wait until the climb is (nearly) complete
+            if not await self._wait_for_altitude(self.config.DEFAULT_MISSION_ALTITUDE):
+                logging.warning("-- Takeoff altitude not confirmed by telemetry, continuing.")
+            launch_position = self._position()
 
             # 2. Iterate through each waypoint sequentially
             for i, point in enumerate(waypoints):
                 waypoint_num = i + 1
-                mission_state["current_waypoint"] = waypoint_num
+                self.state_store.update_mission(self.drone_id, current_waypoint=waypoint_num)
                 
                 await self._send_status_update("HEADING_TO_WAYPOINT", f"Flying to waypoint {waypoint_num}", waypoint_num)
                 
+                leg_timeout = self._leg_timeout(self._distance_to(point['lat'], point['lng']))
                 await self.drone.action.goto_location(
                     point['lat'], point['lng'], self.config.DEFAULT_MISSION_ALTITUDE, 0
                 )
-                await asyncio.sleep(15) # Simple wait for arrival, can be improved with distance checks
+                # Wait for telemetry to confirm arrival, bounded by the leg's expected duration
+                if not await self._wait_for_arrival(point['lat'], point['lng'], leg_timeout):
+                    logging.warning(f"-- Arrival at waypoint {waypoint_num} not confirmed within {leg_timeout:.0f}s, landing anyway.")
 
                 await self._send_status_update("REACHED_WAYPOINT", f"Arrived at waypoint {waypoint_num}. Landing now.", waypoint_num)
 
                 # 3. Land at the waypoint
                 await self.drone.action.land()
-                logging.info(f"-- Landed at waypoint {waypoint_num}. Pausing for 5 seconds.")
-                await asyncio.sleep(5)  # Pause on the ground
+                if not await self._wait_for_landed(timeout=self.config.DEFAULT_MISSION_ALTITUDE * 2 + 20):
+                    logging.warning(f"-- Touchdown at waypoint {waypoint_num} not confirmed by telemetry.")
+                logging.info(f"-- Landed at waypoint {waypoint_num}.")
+                if self.config.MISSION_GROUND_DWELL_S > 0:
+                    await asyncio.sleep(self.config.MISSION_GROUND_DWELL_S)  # Pause on the ground
 
                 # 4. Take off again if this is not the final destination
                 if waypoint_num < len(waypoints):
@@ -145,12 +244,18 @@ class MissionManager:
                         await self._send_status_update("ERROR", f"Mission aborted due to takeoff error from waypoint {waypoint_num}: {e}")
                         return
                     
-                    await asyncio.sleep(8)
+                    await self._wait_for_altitude(self.config.DEFAULT_MISSION_ALTITUDE)
 
             # 5. Mission stages complete, return home
             await self._send_status_update("RETURNING_TO_LAUNCH", "All waypoints visited. Returning to base.")
+            home_distance = self._distance_to(*launch_position) if launch_position else None
             await self.drone.action.return_to_launch()
-            await asyncio.sleep(20) # Allow time to return and land
+            # The drone starts RTL from the ground at the last waypoint, so wait for it
+            # to lift off before waiting for it to come home and land
+            await self._wait_until(lambda: not self._is_on_ground(), timeout=15.0, fallback_sleep=0)
+            rtl_timeout = self._leg_timeout(home_distance) + self.config.DEFAULT_MISSION_ALTITUDE * 2
+            if not await self._wait_for_landed(timeout=rtl_timeout, fallback_sleep=20):
+                logging.warning(f"-- Landing after RTL not confirmed within {rtl_timeout:.0f}s.")
 
             await self._send_status_update("MISSION_COMPLETE", "Drone has returned and landed safely. Mission finished.")
             logging.info("Mission successfully completed.")
@@ -159,22 +264,178 @@ class MissionManager:
             logging.error(f"Mission failed with an error: {e}", exc_info=True)
             await self._send_status_update("ERROR", f"Mission aborted due to an error: {e}")
         finally:
-            mission_state.update({"is_running": False, "current_waypoint": 0, "total_waypoints": 0})
+            self.state_store.reset_mission(self.drone_id)
+
+    async def start_mission(self, waypoints: list, mode: str = None):
+        """Runs a mission in the requested mode ("stepwise" or "native"), defaulting to MISSION_MODE."""
+        mode = (mode or self.config.MISSION_MODE).lower()
+        if mode == "native":
+            await self.run_native_mission(waypoints)
+        else:
+            await self.run_mission(waypoints)
+
+    def _build_mission_plan(self, waypoints: list) -> MissionPlan:
+        """Converts the waypoint list into a MAVSDK mission plan."""
+        nan = float('nan')
+        items = []
+        for point in waypoints:
+            # The mission plugin cannot land mid-mission, so every waypoint becomes a
+            # full stop with a loiter in place of the landing.
+            items.append(MissionItem(
+                latitude_deg=point['lat'],
+                longitude_deg=point['lng'],
+                relative_altitude_m=self.config.DEFAULT_MISSION_ALTITUDE,
+                speed_m_s=self.config.MISSION_CRUISE_SPEED_M_S,
+                is_fly_through=False,
+                gimbal_pitch_deg=nan,
+                gimbal_yaw_deg=nan,
+                camera_action=MissionItem.CameraAction.NONE,
+                loiter_time_s=self.config.MISSION_NATIVE_LOITER_S,
+                camera_photo_interval_s=nan,
+                acceptance_radius_m=self.config.MISSION_ACCEPTANCE_RADIUS_M,
+                yaw_deg=nan,
+                camera_photo_distance_m=nan
+            ))
+        return MissionPlan(items)
+
+    async def run_native_mission(self, waypoints: list):
+        """
+        Executes the mission as one MAVLink mission upload flown by the autopilot,
+        tracking progress through the mission_progress() stream instead of polling.
+        """
+        if self.mission_state.is_running:
+            logging.warning("A mission is already in progress. Ignoring new request.")
+            return
+
+        self.state_store.update_mission(self.drone_id, is_running=True, total_waypoints=len(waypoints), current_waypoint=0)
+        logging.info(f"Starting native mission with {len(waypoints)} waypoints.")
+
+        try:
+            if not await self._is_drone_connected():
+                logging.error("-- Drone not connected. Mission aborted.")
+                await self._send_status_update("ERROR", "Mission aborted: Drone not connected")
+                return
+
+            # 1. Upload the whole plan once and let the autopilot fly it
+            await self.drone.mission.set_return_to_launch_after_mission(True)
+            await self.drone.mission.upload_mission(self._build_mission_plan(waypoints))
+            logging.info("-- Mission plan uploaded.")
+
+            try:
+                await asyncio.wait_for(self.drone.action.arm(), timeout=10.0)
+            except Exception as e:
+                logging.error(f"-- Arming failed: {e}. Mission aborted.")
+                await self._send_status_update("ERROR", f"Mission aborted due to arming failure: {e}")
+                return
+            mission_timeout = self._native_mission_timeout(waypoints)
+            await self.drone.mission.start_mission()
+            launch_position = self._position()
+
+            # 2. Follow progress as the autopilot reports it, within the time the whole route should take
+            try:
+                await asyncio.wait_for(self._follow_native_progress(), timeout=mission_timeout)
+            except asyncio.TimeoutError:
+                logging.error(f"-- Native mission not finished within {mission_timeout:.0f}s, stopping it.")
+                await self._stop_native_mission()
+                await self._send_status_update("ERROR", f"Mission aborted: not finished within {mission_timeout:.0f}s")
+                return
+
+            # 3. The autopilot returns home on its own once the plan is finished
+            await self._send_status_update("RETURNING_TO_LAUNCH", "All waypoints visited. Returning to base.")
+            home_distance = self._distance_to(*launch_position) if launch_position else None
+            rtl_timeout = self._leg_timeout(home_distance) + self.config.DEFAULT_MISSION_ALTITUDE * 2
+            if not await self._wait_for_landed(timeout=rtl_timeout, fallback_sleep=20):
+                logging.warning(f"-- Landing after RTL not confirmed within {rtl_timeout:.0f}s.")
+
+            await self._send_status_update("MISSION_COMPLETE", "Drone has returned and landed safely. Mission finished.")
+            logging.info("Native mission successfully completed.")
+
+        except asyncio.CancelledError:
+            # The autopilot would keep flying the uploaded plan on its own: hold
+            # position and drop the plan so the preempting command takes over
+            logging.info("-- Native mission cancelled, pausing and clearing the uploaded plan.")
+            await self._stop_native_mission()
+            raise
+        except Exception as e:
+            logging.error(f"Native mission failed with an error: {e}", exc_info=True)
+            await self._send_status_update("ERROR", f"Mission aborted due to an error: {e}")
+        finally:
+            self.state_store.reset_mission(self.drone_id)
+
+    def _native_mission_timeout(self, waypoints: list) -> float:
+        """Time allowed for the autopilot to fly the whole plan: every leg at cruise speed, the climb and the loiters."""
+        start = self._position()
+        distance_m = 0.0
+        for point in waypoints:
+            if start is not None:
+                distance_m += haversine_m(start[0], start[1], point['lat'], point['lng'])
+            start = (point['lat'], point['lng'])
+        return (self._leg_timeout(distance_m) + self.config.DEFAULT_MISSION_ALTITUDE * 2
+                + len(waypoints) * self.config.MISSION_NATIVE_LOITER_S)
+
+    async def _follow_native_progress(self):
+        """Reports waypoint progress from the mission_progress() stream until the last item is done."""
+        reported = 0
+        async for progress in self.drone.mission.mission_progress():
+            # `current` is the 0-based index of the item being flown; items before it are done
+            flying = min(progress.current + 1, progress.total)
+            while reported < flying:
+                if reported > 0:
+                    await self._send_status_update("REACHED_WAYPOINT", f"Reached waypoint {reported}.", reported)
+                reported += 1
+                self.state_store.update_mission(self.drone_id, current_waypoint=reported)
+                await self._send_status_update("HEADING_TO_WAYPOINT", f"Flying to waypoint {reported}", reported)
+            if progress.total > 0 and progress.current >= progress.total:
+                await self._send_status_update("REACHED_WAYPOINT", f"Reached waypoint {progress.total}.", progress.total)
+                break
+
+    async def _stop_native_mission(self):
+        """Holds position and drops the uploaded plan, so the autopilot stops flying it."""
+        try:
+            await asyncio.wait_for(self.drone.mission.pause_mission(), timeout=5.0)
+            await asyncio.wait_for(self.drone.mission.clear_mission(), timeout=5.0)
+        except Exception as e:
+            logging.error(f"-- Failed to stop the native mission on the autopilot: {e}")
 
     async def return_to_launch(self):
-        """Commands the drone to immediately return to launch."""
+        """
+        Commands the drone to immediately return to launch. The return is itself a
+        flight task: it preempts whatever is running and keeps the drone busy until
+        it has landed, so a new mission cannot start halfway home.
+        """
         logging.info("RTL command received. Attempting to return to launch.")
+        sent = asyncio.get_running_loop().create_future()
         try:
-            await self._send_status_update("RETURNING_TO_LAUNCH", "RTL command initiated by user.")
-            await self.drone.action.return_to_launch()
-            # Reset the state as the current mission is now aborted.
-            mission_state.update({"is_running": False, "current_waypoint": 0, "total_waypoints": 0})
+            task = await self.launch(self._fly_home(sent), name='rtl', preempt=True)
+            if task is None:
+                raise Exception("the running flight task did not stop")
+            # Answer as soon as the autopilot has accepted the command
+            await asyncio.wait({sent, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not sent.done():
+                raise Exception("RTL was preempted before it was sent")
+            sent.result()
             return {"status": "success", "message": "Return-to-launch command sent."}
         except Exception as e:
             logging.error(f"Failed to execute return to launch: {e}")
             await self._send_status_update("ERROR", f"Failed to execute RTL: {e}")
             return {"status": "error", "message": str(e)}
 
+    async def _fly_home(self, sent: asyncio.Future):
+        """Flight task of an RTL command: sends it, resolves `sent`, then follows the drone down."""
+        try:
+            await self._send_status_update("RETURNING_TO_LAUNCH", "RTL command initiated by user.")
+            await self.drone.action.return_to_launch()
+        except Exception as e:
+            sent.set_exception(e)
+            return
+        sent.set_result(None)
+        # Reset the state as the current mission is now aborted.
+        self.state_store.reset_mission(self.drone_id)
+        # RTL may start from the ground (e.g. at a stepwise waypoint): wait for liftoff first
+        await self._wait_until(lambda: not self._is_on_ground(), timeout=15.0, fallback_sleep=0)
+        if not await self._wait_for_landed(timeout=600.0, fallback_sleep=0):
+            logging.warning("-- Landing after RTL not confirmed within 600s.")
+
     async def simple_takeoff(self, altitude=20):
         """Simple takeoff without mission - just arm and takeoff."""
         logging.info(f"Simple takeoff command - altitude: {altitude}m")
@@ -210,8 +471,8 @@ class MissionManager:
     async def _send_status_update(self, status: str, details: str, waypoint_num: int = None):
         """Helper function to format and send mission status updates."""
         progress = 0
-        total = mission_state["total_waypoints"]
-        current = waypoint_num if waypoint_num is not None else mission_state["current_waypoint"]
+        total = self.mission_state.total_waypoints
+        current = waypoint_num if waypoint_num is not None else self.mission_state.current_waypoint
 
         if total > 0 and current > 0:
             if status == "REACHED_WAYPOINT":
@@ -222,11 +483,15 @@ class MissionManager:
             progress = 100
 
         payload = {
+            "droneId": self.drone_id,
             "status": status,
             "details": details,
             "currentWaypoint": current,
             "totalWaypoints": total,
             "progress": round(progress)
         }
+        self.state_store.update_mission(self.drone_id, status_message=status)
+        if self.recorder is not None:
+            self.recorder.record_event(payload)
         await self.ws_client.send_mission_update(payload)
         logging.info(f"Sent mission update: {status} - {details}")
\ No newline at end of file
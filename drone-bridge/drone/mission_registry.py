@@ -0,0 +1,85 @@
+import asyncio
+import collections
+import logging
+from functools import partial
+
+
+class MissionTaskRegistry:
+    """
+    Keeps the handle of the flight task (mission, takeoff, landing...) running for
+    each drone, so a new command can be refused or preempt the old one instead of
+    piling up another coroutine next to it.
+    """
+    def __init__(self, cancel_timeout: float = 5.0):
+        self.cancel_timeout = cancel_timeout
+        self._tasks = {}
+        # Serializes start() per drone, so two preempting commands cannot both start
+        self._locks = collections.defaultdict(asyncio.Lock)
+        self.started = 0
+        self.cancelled = 0
+
+    def get(self, drone_id):
+        """Returns the drone's running task, if any."""
+        task = self._tasks.get(drone_id)
+        return task if task is not None and not task.done() else None
+
+    def is_busy(self, drone_id) -> bool:
+        """True while the drone has an unfinished flight task."""
+        return self.get(drone_id) is not None
+
+    async def start(self, drone_id, coro, name: str = "flight", preempt: bool = False):
+        """
+        Runs `coro` as the drone's flight task. If another task is still running it is
+        cancelled first when `preempt` is set; otherwise `coro` is discarded and None
+        is returned. None is also returned when the preempted task does not stop
+        within the cancel timeout, so two tasks never fly the same drone.
+        """
+        async with self._locks[drone_id]:
+            if self.is_busy(drone_id):
+                if not preempt:
+                    coro.close()
+                    logging.warning(f"[{drone_id}] Flight task already running, '{name}' refused.")
+                    return None
+                await self.cancel(drone_id)
+                if self.is_busy(drone_id):
+                    coro.close()
+                    logging.error(f"[{drone_id}] Previous flight task is still running, '{name}' refused.")
+                    return None
+            task = asyncio.create_task(coro)
+            task.flight_task_name = name
+            self._tasks[drone_id] = task
+            self.started += 1
+            task.add_done_callback(partial(self._on_done, drone_id))
+            return task
+
+    def _on_done(self, drone_id, task):
+        """Forgets finished tasks and surfaces errors that would otherwise go unnoticed."""
+        if self._tasks.get(drone_id) is task:
+            del self._tasks[drone_id]
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"[{drone_id}] Flight task '{task.flight_task_name}' failed: {task.exception()}")
+
+    async def cancel(self, drone_id) -> bool:
+        """Cancels the drone's running task and waits (bounded) for it to unwind."""
+        task = self.get(drone_id)
+        if task is None:
+            return False
+        logging.info(f"[{drone_id}] Cancelling flight task '{task.flight_task_name}'.")
+        task.cancel()
+        self.cancelled += 1
+        done, _ = await asyncio.wait({task}, timeout=self.cancel_timeout)
+        if not done:
+            logging.warning(f"[{drone_id}] Flight task '{task.flight_task_name}' did not stop within {self.cancel_timeout}s.")
+        return True
+
+    async def cancel_all(self):
+        """Cancels every running flight task (used on shutdown)."""
+        await asyncio.gather(*(self.cancel(drone_id) for drone_id in list(self._tasks)))
+
+    def stats(self) -> dict:
+        """Running tasks per drone and lifetime counters for status endpoints."""
+        return {
+            "running": {drone_id: task.flight_task_name for drone_id, task in self._tasks.items() if not task.done()},
+            "started": self.started,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import math
+import time
+
+from config.config import Config
+from .flight_recorder import FlightLog
+
+METERS_PER_DEG_LAT = 111320.0
+
+
+def grid_offsets(count: int, spacing_m: float, latitude_deg: float) -> list:
+    """(dlat, dlng) offsets placing `count` drones on a square grid `spacing_m` apart."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    meters_per_deg_lng = METERS_PER_DEG_LAT * max(math.cos(math.radians(latitude_deg)), 1e-6)
+    return [((index // columns) * spacing_m / METERS_PER_DEG_LAT,
+             (index % columns) * spacing_m / meters_per_deg_lng) for index in range(count)]
+
+
+def _first_latitude(log: FlightLog) -> float:
+    """Latitude of the first positioned record, used to scale longitude offsets."""
+    records = log.records()
+    try:
+        for record in records:
+            if "latitude_deg" in record:
+                return record["latitude_deg"]
+    finally:
+        records.close()
+    return 0.0
+
+
+class FlightReplayer:
+    """
+    Streams a recorded flight log through the normal outbound path, as if the
+    drones were live: telemetry to `telemetry_sink` (the WebSocketClient or a
+    TelemetryBatcher) and mission events to the WebSocketClient.
+
+    One recording is fanned out to `drone_count` synthetic drones named
+    `<id_prefix>-001`, `<id_prefix>-002`, ... and spread on a grid so they do not
+    overlap. `speed` is a time multiplier (1 = real time); 0 replays as fast as
+    the WebSocket writer drains, which is what throughput benchmarks want. Pass
+    no batcher as `telemetry_sink` at speed 0, or it merges frames per tick.
+    """
+    def __init__(self, log_path: str, ws_client, drone_count: int = 1, speed: float = 1.0,
+                 id_prefix: str = "REPLAY", spacing_m: float = 50.0, telemetry_sink=None, loop: bool = False):
+        self.log_path = log_path
+        self.ws_client = ws_client
+        self.telemetry_sink = telemetry_sink or ws_client
+        self.drone_count = drone_count
+        self.speed = speed
+        self.id_prefix = id_prefix
+        self.spacing_m = spacing_m
+        self.loop = loop
+        self.drone_ids = [f"{id_prefix}-{index + 1:03d}" for index in range(drone_count)]
+        self.records_replayed = 0
+        self.frames_sent = 0
+
+    def _telemetry_payload(self, record: dict, drone_id: str, offset) -> dict:
+        payload = {key: value for key, value in record.items() if key not in ("t", "kind")}
+        payload["droneId"] = drone_id
+        if "latitude_deg" in payload:
+            payload["latitude_deg"] += offset[0]
+            payload["longitude_deg"] += offset[1]
+        if "velocity_north_m_s" in payload and "velocity_east_m_s" in payload:
+            payload["ground_speed_m_s"] = math.hypot(payload["velocity_north_m_s"], payload["velocity_east_m_s"])
+        return payload
+
+    async def _emit(self, record: dict, offsets: list):
+        """Sends one recorded record on behalf of every synthetic drone."""
+        if record["kind"] == "telemetry":
+            for drone_id, offset in zip(self.drone_ids, offsets):
+                await self.telemetry_sink.send_telemetry(self._telemetry_payload(record, drone_id, offset))
+        else:
+            event = {key: value for key, value in record.items() if key not in ("t", "kind")}
+            event["details"] = f"Replayed {event['status']}"
+            for drone_id in self.drone_ids:
+                await self.ws_client.send_mission_update(dict(event, droneId=drone_id))
+        self.frames_sent += self.drone_count
+
+    async def replay_once(self):
+        """Replays the log one time, paced by the recorded timestamps."""
+        with FlightLog(self.log_path) as log:
+            if not len(log):
+                logging.warning(f"Flight log {self.log_path} is empty, nothing to replay.")
+                return
+            offsets = grid_offsets(self.drone_count, self.spacing_m, _first_latitude(log))
+            records = log.records()
+            try:
+                started, t0 = time.monotonic(), None
+                for record in records:
+                    t0 = record["t"] if t0 is None else t0
+                    delay = (record["t"] - t0) / self.speed - (time.monotonic() - started) if self.speed > 0 else 0
+                    await asyncio.sleep(max(delay, 0))
+                    await self._emit(record, offsets)
+                    self.records_replayed += 1
+                    if self.speed <= 0:
+                        # Max speed: let the writer drain so nothing is coalesced away
+                        await self.ws_client.wait_drained()
+            finally:
+                # Release the generator's view of the mapping before the log closes
+                records.close()
+
+    async def run(self):
+        """Replays the log (forever if `loop` is set) and logs the achieved rate."""
+        logging.info(f"Replaying {self.log_path} as {self.drone_count} drones at "
+                     f"{'max' if self.speed <= 0 else f'{self.speed:g}x'} speed.")
+        while True:
+            started = time.monotonic()
+            frames_before = self.frames_sent
+            await self.replay_once()
+            elapsed = max(time.monotonic() - started, 1e-9)
+            logging.info(f"Replay pass done: {self.frames_sent - frames_before} frames in {elapsed:.1f}s "
+                         f"({(self.frames_sent - frames_before) / elapsed:.0f} frames/s). Link: {self.ws_client.stats()}")
+            if not self.loop:
+                return
+
+
+def replayer_from_config(ws_client, telemetry_sink=None, config: Config = None) -> FlightReplayer:
+    """Builds the replayer configured by the REPLAY_* settings."""
+    config = config or Config()
+    return FlightReplayer(
+        config.REPLAY_FLIGHT_FILE,
+        ws_client,
+        drone_count=config.REPLAY_DRONES,
+        speed=config.REPLAY_SPEED,
+        id_prefix=config.REPLAY_ID_PREFIX,
+        spacing_m=config.REPLAY_SPACING_M,
+        telemetry_sink=telemetry_sink,
+        loop=config.REPLAY_LOOP,
+    )
@@ -0,0 +1,131 @@
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+
+from config.config import Config
+
+log = logging.getLogger("airsim_pool")
+
+try:
+    import airsim
+except Exception:
+    airsim = None
+
+
+def _is_connection_error(e: Exception) -> bool:
+    # msgpack-rpc raises its own TimeoutError/TransportError, which are not OSErrors
+    return isinstance(e, OSError) or type(e).__name__ in ("TimeoutError", "TransportError")
+
+
+class AirSimPool:
+    """
+    A few persistent AirSim clients, each confined to its own worker thread.
+
+    msgpack-RPC clients are neither thread-safe nor cheap to create, so instead of
+    sharing one client between coroutines (or connecting anew for every call),
+    calls are queued and picked up by whichever worker is free. A worker builds
+    its client on first use and rebuilds it after a connection error. Callers
+    await the result with a timeout, so a hung simulator cannot stall the loop.
+    """
+    def __init__(self, size: int = None, client_factory=None, timeout_s: float = None):
+        config = Config()
+        self.size = size or config.AIRSIM_POOL_SIZE
+        self.timeout_s = timeout_s or config.AIRSIM_CALL_TIMEOUT_S
+        if client_factory is None and airsim is not None:
+            client_factory = airsim.MultirotorClient
+        self.client_factory = client_factory
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.connects = 0
+        self._jobs = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.client_factory is not None
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.size:
+                thread = threading.Thread(target=self._work, name=f"airsim-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        """Worker thread: owns one client and runs queued calls against it."""
+        client = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            fn, args, kwargs, future = job
+            # Skip calls whose caller already gave up while they were queued
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if client is None:
+                    client = self.client_factory()
+                    client.confirmConnection()
+                    self.connects += 1
+                future.set_result(fn(client, *args, **kwargs))
+            except Exception as e:
+                self.errors += 1
+                if _is_connection_error(e):
+                    log.warning(f"AirSim connection lost on {threading.current_thread().name}: {e}")
+                    client = None
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        """Queues `fn(client, *args, **kwargs)` and returns a concurrent future (usable from any thread)."""
+        if not self.available:
+            raise RuntimeError("AirSim is not available")
+        self._start()
+        future = concurrent.futures.Future()
+        self.calls += 1
+        self._jobs.put((fn, args, kwargs, future))
+        return future
+
+    async def call(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Runs `fn(client, *args, **kwargs)` on a worker's client and returns its result.
+        Raises asyncio.TimeoutError after `timeout` seconds (default AIRSIM_CALL_TIMEOUT_S).
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def close(self):
+        """Stops the workers once the calls already queued have run."""
+        with self._lock:
+            for _ in self._threads:
+                self._jobs.put(None)
+            self._threads = []
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "workers": len(self._threads),
+            "queued": self._jobs.qsize(),
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+        }
+
+
+_shared_pool = None
+
+
+def shared_pool() -> AirSimPool:
+    """The process-wide pool, created on first use."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = AirSimPool()
+    return _shared_pool
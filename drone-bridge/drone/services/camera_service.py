@@ -1,8 +1,15 @@
-import os
 import cv2
 import asyncio
-from config.config import CAPTURE_DIR
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config.config import Config
+from .airsim_pool import shared_pool
+from .frame_cache import FrameCache
+from .capture_store import CaptureStore, CaptureUploader
 
 log = logging.getLogger("camera")
 
@@ -11,80 +18,169 @@ try:
 except Exception:
     airsim = None
 
+# Map camera types to AirSim camera IDs (AirSim uses string names)
+CAMERA_IDS = {
+    "front": "0",      # Front camera
+    "bottom": "1",     # Bottom camera
+    "back": "2"        # Back camera
+}
+
 class CameraService:
-    def __init__(self, airsim_client):
-        """Initialize with shared AirSim client"""
-        os.makedirs(CAPTURE_DIR, exist_ok=True)
+    """
+    Captures proof photos from the AirSim cameras.
+
+    All requested cameras are fetched with one batched simGetImages call; the
+    color conversion, overlay and JPEG encoding then run in parallel on a small
+    thread pool (OpenCV releases the GIL), and the files are written off the
+    event loop. Capturing every angle costs about as much as a single capture.
+    Frames younger than CAMERA_FRAME_TTL_S are reused from the FrameCache
+    instead of being fetched again. Photos are kept in a content-addressed
+    CaptureStore and, when CAPTURE_UPLOAD_URL is set, pushed to the backend in
+    the background.
+    """
+    def __init__(self, airsim_client, pool=None, executor=None, store=None, uploader=None):
+        """
+        `airsim_client` only tells whether AirSim is available; the RPCs themselves
+        go through `pool` (the shared AirSimPool by default), so they neither block
+        the event loop nor share a client between coroutines.
+        """
+        config = Config()
+        self.jpeg_quality = config.CAMERA_JPEG_QUALITY
+        self.store = store or CaptureStore(config.CAPTURE_DIR, int(config.CAPTURE_MAX_MB * 1024 * 1024), config.CAPTURE_MAX_AGE_H * 3600)
+        if uploader is None and config.CAPTURE_UPLOAD_URL:
+            uploader = CaptureUploader(config.CAPTURE_UPLOAD_URL, config.CAPTURE_UPLOAD_QUEUE,
+                                       config.CAPTURE_UPLOAD_CONCURRENCY, config.CAPTURE_UPLOAD_RETRIES, store=self.store)
+        self.uploader = uploader
         self.client = airsim_client
+        self.pool = pool or (shared_pool() if airsim_client else None)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=config.CAMERA_ENCODE_WORKERS, thread_name_prefix="camera")
+        self.frames = FrameCache(config.CAMERA_FRAME_TTL_S)
         self.current_camera = 0  # 0=front, 1=bottom, 2=back
 
-    async def capture_delivery_photo(self, drone_id: str, camera_type: str = "front") -> str:
+    @property
+    def available(self) -> bool:
+        return self.pool is not None and self.pool.available
+
+    async def _fetch(self, camera_types: list) -> list:
+        """One simGetImages round trip for all cameras; raw RGB responses in the same order."""
+        requests = [airsim.ImageRequest(CAMERA_IDS.get(camera_type, "0"), airsim.ImageType.Scene, False, False)
+                    for camera_type in camera_types]
+        responses = await self.pool.call(lambda client: client.simGetImages(requests))
+        if not responses or len(responses) != len(requests):
+            raise Exception("No valid image response from AirSim")
+        return responses
+
+    def _encode(self, img, quality: int = None) -> bytes:
+        ok, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality or self.jpeg_quality])
+        if not ok:
+            raise Exception("JPEG encoding failed")
+        return buffer.tobytes()
+
+    def _render_frame(self, frame, drone_id: str, camera_type: str, timestamp: int) -> bytes:
+        """Runs on the thread pool: a cached frame to an annotated JPEG."""
+        if frame is None:
+            raise Exception("Empty image from AirSim")
+        img_bgr = frame.bgr().copy()
+
+        # Add timestamp and camera info overlay
+        cv2.putText(img_bgr, f"Camera: {camera_type.upper()}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(img_bgr, f"Drone: {drone_id}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(img_bgr, f"Time: {timestamp}", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        return self._encode(img_bgr)
+
+    async def get_frame(self, camera_type: str, max_age: float = None):
+        """The latest raw frame of a camera (a CachedFrame), fetched if the cached one is older than `max_age`."""
+        if not self.available:
+            raise Exception("AirSim client not available")
+        frame = (await self.frames.get([camera_type], self._fetch, max_age))[0]
+        if frame is None:
+            raise Exception("Empty image from AirSim")
+        return frame
+
+    async def grab_frame(self, camera_type: str, quality: int = None, max_age: float = None) -> bytes:
         """
-        Capture a scene photo (AirSim) as proof with camera selection.
+        A live frame from a camera as JPEG bytes, without overlay or file (for
+        streaming). Reuses a cached frame, and its encoding, up to `max_age`
+        seconds old (default CAMERA_FRAME_TTL_S).
         """
-        timestamp = int(asyncio.get_event_loop().time())
-        filename = os.path.join(CAPTURE_DIR, f"{drone_id}_{camera_type}_{timestamp}.jpg")
-        
-        # Check if the shared client is available
-        if not self.client:
-            log.warning("AirSim client not available, creating placeholder image.")
-            # Create a blank image placeholder
-            import numpy as np
-            img = 255 * np.ones((480, 640, 3), dtype=np.uint8)
+        frame = await self.get_frame(camera_type, max_age)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, frame.jpeg, quality or self.jpeg_quality, self._encode)
+
+    def _render_placeholder(self, camera_type: str, error: str = None) -> bytes:
+        """Runs on the thread pool: a white placeholder explaining why there is no photo."""
+        img = 255 * np.ones((480, 640, 3), dtype=np.uint8)
+        if error is None:
             cv2.putText(img, "NO AIRSIM CONNECTION", (30, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,0), 2)
             cv2.putText(img, f"Camera: {camera_type}", (30, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
-            cv2.imwrite(filename, img)
-            return filename
-
-        # Map camera types to AirSim camera IDs (AirSim uses string names)
-        camera_map = {
-            "front": "0",      # Front camera
-            "bottom": "1",     # Bottom camera  
-            "back": "2"        # Back camera
-        }
-        
-        camera_id = camera_map.get(camera_type, "0")
-        
-        try:
-            # Try to get camera info first
-            camera_info = self.client.simGetCameraInfo(camera_id)
-            log.info(f"Camera {camera_id} info: {camera_info}")
-            
-            # Capture image
-            responses = self.client.simGetImages([
-                airsim.ImageRequest(camera_id, airsim.ImageType.Scene, False, False)
-            ])
-            
-            if responses and len(responses) > 0 and responses[0].height > 0:
-                response = responses[0]
-                # Convert AirSim image data to OpenCV format
-                import numpy as np
-                img1d = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
-                img_rgb = img1d.reshape(response.height, response.width, 3)
-                img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
-                
-                # Add timestamp and camera info overlay
-                cv2.putText(img_bgr, f"Camera: {camera_type.upper()}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(img_bgr, f"Drone: {drone_id}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(img_bgr, f"Time: {timestamp}", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                cv2.imwrite(filename, img_bgr)
-                log.info(f"Photo captured successfully: {filename}")
-            else:
-                raise Exception("No valid image response from AirSim")
-                
-        except Exception as e:
-            log.error(f"Failed to capture photo from {camera_type} camera: {e}")
-            # Create error placeholder with more details
-            import numpy as np
-            img = 255 * np.ones((480, 640, 3), dtype=np.uint8)
+        else:
             cv2.putText(img, "CAPTURE ERROR", (150, 200), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
             cv2.putText(img, f"Camera: {camera_type}", (150, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
-            cv2.putText(img, f"Error: {str(e)[:30]}...", (150, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
+            cv2.putText(img, f"Error: {error[:30]}...", (150, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
             cv2.putText(img, "Check AirSim connection", (150, 320), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 1)
-            cv2.imwrite(filename, img)
-            
-        return filename
+        return self._encode(img)
+
+    async def _render_and_store(self, render, *args, pin: bool = False) -> tuple:
+        """Renders a JPEG and stores it, both on the thread pool. Returns (digest, path)."""
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self.executor, render, *args)
+        return await loop.run_in_executor(self.executor, self.store.put, data, pin)
+
+    async def capture(self, drone_id: str, camera_types: list) -> list:
+        """
+        Capture a scene photo from each camera in `camera_types` with at most one
+        AirSim request (fresh cached frames are reused). Returns
+        [{"camera", "path", "sha256"}] in the same order; a camera that could not
+        be captured gets a placeholder image explaining why. Real photos are queued
+        for upload without waiting for it.
+        """
+        captured_at = time.time()
+        timestamp = int(captured_at)
+
+        # Check if the shared client is available
+        if not self.available:
+            log.warning("AirSim client not available, creating placeholder image.")
+            jobs = [self._save_placeholder(camera_type) for camera_type in camera_types]
+        else:
+            try:
+                frames = await self.frames.get(camera_types, self._fetch)
+            except Exception as e:
+                log.error(f"Failed to capture photos from {', '.join(camera_types)} cameras: {e}")
+                frames = [e] * len(camera_types)
+            jobs = [self._save_frame(frame, drone_id, camera_type, timestamp)
+                    for frame, camera_type in zip(frames, camera_types)]
+
+        photos = []
+        for camera_type, (digest, path, is_photo) in zip(camera_types, await asyncio.gather(*jobs)):
+            photos.append({"camera": camera_type, "path": path, "sha256": digest})
+            if is_photo and self.uploader is not None:
+                self.uploader.enqueue({"sha256": digest, "path": path, "droneId": drone_id,
+                                       "camera": camera_type, "capturedAt": captured_at})
+        return photos
+
+    async def _save_placeholder(self, camera_type: str, error: str = None) -> tuple:
+        return (*await self._render_and_store(self._render_placeholder, camera_type, error), False)
+
+    async def _save_frame(self, frame, drone_id: str, camera_type: str, timestamp: int) -> tuple:
+        if not isinstance(frame, Exception):
+            try:
+                # Pinned until uploaded, so eviction cannot delete it while it is queued
+                digest, path = await self._render_and_store(self._render_frame, frame, drone_id, camera_type, timestamp,
+                                                            pin=self.uploader is not None)
+                log.info(f"Photo captured successfully: {path}")
+                return digest, path, True
+            except Exception as e:
+                log.error(f"Failed to capture photo from {camera_type} camera: {e}")
+                frame = e
+        # Create error placeholder with more details
+        return await self._save_placeholder(camera_type, str(frame))
+
+    async def capture_delivery_photo(self, drone_id: str, camera_type: str = "front") -> str:
+        """
+        Capture a scene photo (AirSim) as proof with camera selection.
+        """
+        return (await self.capture(drone_id, [camera_type]))[0]["path"]
 
     async def switch_camera(self, camera_type: str):
         """Switch AirSim camera view"""
@@ -105,9 +201,12 @@ class CameraService:
             log.warning(f"Unknown camera type: {camera_type}")
 
     async def capture_multiple_angles(self, drone_id: str) -> list:
-        """Capture photos from multiple camera angles"""
-        photos = []
-        for camera_type in ["front", "bottom", "back"]:
-            photo_path = await self.capture_delivery_photo(drone_id, camera_type)
-            photos.append({"camera": camera_type, "path": photo_path})
-        return photos
+        """Capture photos from multiple camera angles in one batched request"""
+        return await self.capture(drone_id, list(CAMERA_IDS))
+
+    async def close(self):
+        """Stops the background uploads and the encode threads (if this service created them)."""
+        if self.uploader is not None:
+            await self.uploader.close()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+
+from config.config import Config
+from .camera_service import CAMERA_IDS
+
+log = logging.getLogger("camera_stream")
+
+
+class StreamViewer:
+    """One connected viewer: a small frame buffer that drops its oldest frame when full."""
+    __slots__ = ("key", "queue", "frames", "drops")
+
+    def __init__(self, key, buffer: int):
+        self.key = key
+        self.queue = asyncio.Queue(maxsize=buffer)
+        self.frames = 0
+        self.drops = 0
+
+    def offer(self, frame: bytes) -> bool:
+        """Queues a frame; returns False if an older frame had to be dropped for it."""
+        dropped = self.queue.full()
+        if dropped:
+            self.queue.get_nowait()
+            self.drops += 1
+        self.queue.put_nowait(frame)
+        self.frames += 1
+        return not dropped
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+
+class FrameProducer:
+    """
+    Captures one camera of one drone for all of its viewers.
+
+    Frames are grabbed once and offered to every viewer. The frame rate and JPEG
+    quality adapt to the viewers: when most of them are falling behind (their
+    buffers are full) both are lowered, and they climb back once everyone keeps
+    up. The rate never exceeds what the capture itself can sustain.
+    """
+    def __init__(self, camera, drone_id: str, camera_type: str, config: Config):
+        self.camera = camera
+        self.drone_id = drone_id
+        self.camera_type = camera_type
+        self.max_fps = config.CAMERA_STREAM_MAX_FPS
+        self.min_fps = config.CAMERA_STREAM_MIN_FPS
+        self.max_quality = config.CAMERA_STREAM_QUALITY
+        self.min_quality = config.CAMERA_STREAM_MIN_QUALITY
+        self.fps = self.max_fps
+        self.quality = self.max_quality
+        self.viewers = set()
+        self.latest = None
+        self.frames = 0
+        self.errors = 0
+        self.task = None
+
+    def _adapt(self, congested: float, capture_s: float):
+        if congested > 0.5:
+            self.fps = max(self.min_fps, self.fps * 0.8)
+            self.quality = max(self.min_quality, self.quality - 5)
+        elif congested == 0:
+            self.fps = min(self.max_fps, self.fps * 1.1)
+            self.quality = min(self.max_quality, self.quality + 2)
+        if capture_s > 0:
+            self.fps = max(self.min_fps, min(self.fps, 1.0 / capture_s))
+
+    async def run(self):
+        """Captures and fans out frames while anyone is watching."""
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+        log.info(f"[{self.drone_id}] Streaming {self.camera_type} camera.")
+        while self.viewers:
+            started = loop.time()
+            try:
+                # A frame captured within the last half tick (e.g. for a photo) is reused
+                frame = await self.camera.grab_frame(self.camera_type, int(self.quality), max_age=0.5 / self.fps)
+                backoff = 1.0
+            except Exception as e:
+                self.errors += 1
+                log.error(f"[{self.drone_id}] {self.camera_type} stream capture failed: {e}. Retrying in {backoff:.0f}s.")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            capture_s = loop.time() - started
+            self.latest = frame
+            self.frames += 1
+            viewers = list(self.viewers)
+            behind = sum(1 for viewer in viewers if not viewer.offer(frame))
+            self._adapt(behind / len(viewers) if viewers else 0.0, capture_s)
+            await asyncio.sleep(max(0.0, 1.0 / self.fps - (loop.time() - started)))
+        # Don't greet the next viewer with an old frame
+        self.latest = None
+        log.info(f"[{self.drone_id}] Stopped streaming {self.camera_type} camera (no viewers).")
+
+    def stats(self) -> dict:
+        return {
+            "droneId": self.drone_id,
+            "camera": self.camera_type,
+            "viewers": len(self.viewers),
+            "fps": round(self.fps, 1),
+            "quality": int(self.quality),
+            "frames": self.frames,
+            "errors": self.errors,
+            "viewerDrops": sum(viewer.drops for viewer in self.viewers),
+            "frameBytes": len(self.latest) if self.latest else 0,
+        }
+
+
+class CameraStreamHub:
+    """
+    Live camera streams shared between viewers: at most one FrameProducer per
+    (drone, camera), started by the first viewer and stopped after the last
+    one leaves, so AirSim load does not grow with the number of viewers.
+    """
+    def __init__(self, camera, config: Config = None):
+        self.camera = camera
+        self.config = config or Config()
+        self.producers = {}
+
+    @property
+    def available(self) -> bool:
+        return self.camera.available
+
+    @staticmethod
+    def camera_types() -> list:
+        return list(CAMERA_IDS)
+
+    def subscribe(self, drone_id: str, camera_type: str) -> StreamViewer:
+        """Registers a viewer; it starts with the latest frame if one is available."""
+        key = (drone_id, camera_type)
+        producer = self.producers.get(key)
+        if producer is None:
+            producer = self.producers[key] = FrameProducer(self.camera, drone_id, camera_type, self.config)
+        viewer = StreamViewer(key, self.config.CAMERA_STREAM_BUFFER)
+        if producer.latest is not None:
+            viewer.offer(producer.latest)
+        producer.viewers.add(viewer)
+        if producer.task is None or producer.task.done():
+            producer.task = asyncio.create_task(producer.run())
+        return viewer
+
+    def unsubscribe(self, viewer: StreamViewer):
+        # The producer stops by itself once it has no viewers left
+        producer = self.producers.get(viewer.key)
+        if producer is not None:
+            producer.viewers.discard(viewer)
+
+    def stats(self) -> dict:
+        return {
+            "streams": [producer.stats() for producer in self.producers.values()],
+            "frameCache": self.camera.frames.stats(),
+            "captures": self.camera.store.stats(),
+            "uploads": self.camera.uploader.stats() if self.camera.uploader is not None else None,
+        }
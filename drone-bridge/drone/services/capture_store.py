@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import aiohttp
+
+log = logging.getLogger("captures")
+
+
+class CaptureStore:
+    """
+    Content-addressed photo store: each capture is saved as
+    `<root>/<h[0:2]>/<h[2:4]>/<h>.jpg`, where h is the SHA-256 of the JPEG bytes.
+    Names never collide, identical photos are stored once, and no directory
+    holds more than a few hundred files. The oldest captures are evicted once
+    the store exceeds `max_bytes` or they are older than `max_age_s`, except
+    those pinned while they wait for upload.
+
+    `put` and `evict` touch the disk; call them from a worker thread.
+    """
+    def __init__(self, root: str, max_bytes: int = 0, max_age_s: float = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # digest -> (size, mtime), oldest first
+        self._pins = collections.Counter()         # digest -> pending uploads
+        self._bytes = 0
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.jpg")
+
+    def _load(self):
+        """Indexes the captures already on disk, oldest first, and removes temp files left by a crash."""
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    try:
+                        os.remove(os.path.join(dirpath, name))
+                    except OSError as e:
+                        log.warning(f"Could not remove leftover {name}: {e}")
+                elif name.endswith(".jpg") and len(name) == 68:
+                    st = os.stat(os.path.join(dirpath, name))
+                    found.append((st.st_mtime, name[:-4], st.st_size))
+        for mtime, digest, size in sorted(found):
+            self._entries[digest] = (size, mtime)
+            self._bytes += size
+
+    def put(self, data: bytes, pin: bool = False) -> tuple:
+        """
+        Stores a JPEG and returns (digest, path). Storing the same bytes twice only
+        refreshes them. With `pin`, the capture is not evicted until `unpin`.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        now = time.time()
+        with self._lock:
+            known = digest in self._entries
+        if known and os.path.exists(path):
+            os.utime(path, (now, now))
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        with self._lock:
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._entries[digest] = (len(data), now)
+            self._bytes += len(data)
+            if pin:
+                self._pins[digest] += 1
+        self.evict(keep=digest)
+        return digest, path
+
+    def evict(self, keep: str = None) -> int:
+        """Removes the oldest captures while over the size budget, or past the maximum age."""
+        removed = []
+        cutoff = time.time() - self.max_age_s if self.max_age_s else None
+        with self._lock:
+            for digest, (size, mtime) in list(self._entries.items()):
+                over_size = self.max_bytes and self._bytes > self.max_bytes
+                too_old = cutoff is not None and mtime < cutoff
+                if not (over_size or too_old):
+                    break
+                if digest == keep or digest in self._pins:
+                    continue
+                del self._entries[digest]
+                self._bytes -= size
+                removed.append(digest)
+        for digest in removed:
+            try:
+                os.remove(self.path_for(digest))
+            except FileNotFoundError:
+                pass
+        self.evicted += len(removed)
+        return len(removed)
+
+    def unpin(self, digest: str):
+        """Releases one pin taken by `put(..., pin=True)`."""
+        with self._lock:
+            self._pins[digest] -= 1
+            if self._pins[digest] <= 0:
+                del self._pins[digest]
+
+    def stats(self) -> dict:
+        return {"captures": len(self._entries), "bytes": self._bytes, "maxBytes": self.max_bytes,
+                "pinned": len(self._pins), "evicted": self.evicted}
+
+
+class CaptureUploader:
+    """
+    Background upload queue pushing captures to the backend, so mission steps
+    never wait on the network. Uploads share one pooled aiohttp session, run a
+    few at a time, and are retried with exponential backoff. Each upload carries
+    the capture's SHA-256 as its Idempotency-Key, so a retry after a lost
+    response cannot create a duplicate on the backend.
+
+    Captures should be stored pinned in `store`; the uploader releases the pin
+    once a capture is uploaded, given up on or refused by a full queue.
+    """
+    def __init__(self, url: str, max_queue: int = 200, concurrency: int = 2, retries: int = 5, timeout_s: float = 30.0,
+                 store: CaptureStore = None):
+        self.url = url
+        self.store = store
+        self.concurrency = concurrency
+        self.retries = retries
+        self.timeout_s = timeout_s
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.uploaded = 0
+        self.failed = 0
+        self.rejected = 0
+        self._task = None
+
+    def ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def enqueue(self, capture: dict) -> bool:
+        """Queues a capture ({"sha256", "path", ...metadata}); returns False if the queue is full."""
+        self.ensure_running()
+        try:
+            self.queue.put_nowait(capture)
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self._release(capture)
+            log.warning(f"Upload queue full, capture {capture['sha256'][:12]} stays local only.")
+            return False
+
+    def _release(self, capture: dict):
+        if self.store is not None:
+            self.store.unpin(capture["sha256"])
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def _upload(self, session: aiohttp.ClientSession, capture: dict):
+        data = await asyncio.get_running_loop().run_in_executor(None, self._read, capture["path"])
+        delay = 1.0
+        for attempt in range(1, self.retries + 1):
+            form = aiohttp.FormData()
+            for key, value in capture.items():
+                if key != "path" and value is not None:
+                    form.add_field(key, str(value))
+            form.add_field("file", data, filename=os.path.basename(capture["path"]), content_type="image/jpeg")
+            try:
+                async with session.post(self.url, data=form, headers={"Idempotency-Key": capture["sha256"]}) as response:
+                    if response.status < 300:
+                        self.uploaded += 1
+                        return
+                    # Client errors will not get better by retrying
+                    if 400 <= response.status < 500 and response.status not in (408, 429):
+                        raise aiohttp.ClientResponseError(response.request_info, (), status=response.status, message="rejected")
+                    log.warning(f"Capture upload got HTTP {response.status} (attempt {attempt}/{self.retries}).")
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                log.warning(f"Capture upload failed: {e} (attempt {attempt}/{self.retries}).")
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+        raise Exception(f"gave up after {self.retries} attempts")
+
+    async def _worker(self, session: aiohttp.ClientSession):
+        while True:
+            capture = await self.queue.get()
+            try:
+                await self._upload(session, capture)
+            except Exception as e:
+                self.failed += 1
+                log.error(f"Capture {capture['sha256'][:12]} was not uploaded: {e}")
+            finally:
+                self._release(capture)
+                self.queue.task_done()
+
+    async def run(self):
+        """Uploads queued captures until cancelled."""
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout_s)) as session:
+            await asyncio.gather(*(self._worker(session) for _ in range(self.concurrency)))
+
+    async def close(self):
+        """Stops the upload workers and closes their session; queued captures stay on disk only."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "uploaded": self.uploaded, "failed": self.failed, "rejected": self.rejected}
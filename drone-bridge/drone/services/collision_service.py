@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import threading
+import time
 
 log = logging.getLogger("collision")
 
@@ -9,30 +11,91 @@ except Exception:
     airsim = None
 
 class CollisionService:
-    def __init__(self, airsim_client):
-        """Initialize with shared AirSim client"""
+    """
+    Watches AirSim for collisions without blocking the event loop.
+
+    The msgpack-RPC calls run in a dedicated polling thread with its own AirSim
+    client (clients must not be shared across threads). Collision changes are
+    handed to the loop through an asyncio queue. The thread polls every
+    `poll_interval_s` while flying, slows to `idle_interval_s` while landed, and
+    backs off exponentially while AirSim is unreachable.
+    """
+    def __init__(self, airsim_client=None, client_factory=None, vehicle_name: str = "",
+                 poll_interval_s: float = 0.1, idle_interval_s: float = 1.0, is_landed=None):
+        """
+        `airsim_client` is the caller's shared client; it only tells whether AirSim
+        is available. `client_factory` builds the thread's own client (defaults to
+        a new airsim.MultirotorClient). `is_landed`, if given, is a thread-safe
+        callable used instead of asking AirSim for the landed state.
+        """
         self.client = airsim_client
+        if client_factory is None and airsim is not None and airsim_client is not None:
+            client_factory = airsim.MultirotorClient
+        self.client_factory = client_factory
+        self.vehicle_name = vehicle_name
+        self.poll_interval_s = poll_interval_s
+        self.idle_interval_s = idle_interval_s
+        self.is_landed = is_landed
         self.collided = False
+        self.last_collision = None
+        self.polls = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _landed(self, client) -> bool:
+        if self.is_landed is not None:
+            return bool(self.is_landed())
+        # airsim.LandedState.Landed == 0
+        return client.getMultirotorState(vehicle_name=self.vehicle_name).landed_state == 0
+
+    def _poll_forever(self, loop, queue: asyncio.Queue):
+        """Polling thread: owns its AirSim client and only talks to the loop through the queue."""
+        client, backoff, collided = None, 1.0, False
+        landed, landed_checked_at = False, 0.0
+        while not self._stop.is_set():
+            try:
+                if client is None:
+                    client = self.client_factory()
+                    client.confirmConnection()
+                    backoff = 1.0
+                now = time.monotonic()
+                if now - landed_checked_at >= self.idle_interval_s:
+                    landed, landed_checked_at = self._landed(client), now
+                info = client.simGetCollisionInfo(vehicle_name=self.vehicle_name)
+                self.polls += 1
+                has_collided = bool(info and info.has_collided)
+                if has_collided != collided:
+                    collided = has_collided
+                    loop.call_soon_threadsafe(queue.put_nowait, (has_collided, getattr(info, "object_name", None)))
+                delay = self.idle_interval_s if landed and not collided else self.poll_interval_s
+            except Exception as e:
+                self.errors += 1
+                log.error(f"Collision watch error: {e}. Retrying in {backoff:.0f}s.")
+                client, delay = None, backoff
+                backoff = min(backoff * 2, 30.0)
+            self._stop.wait(delay)
 
     async def watch(self):
         # Check if the shared client is available
-        if not self.client:
+        if not self.client_factory:
             log.warning("AirSim client not available, collision detection disabled.")
             return
 
-        while True:
-            try:
-                # Use the shared self.client
-                info = self.client.simGetCollisionInfo()
-                if info and info.has_collided:
-                    if not self.collided: # Log only on the first detection
-                        log.warning(f"Collision detected with object: {info.object_name}")
-                        self.collided = True
-                else:
-                    self.collided = False
-                
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                log.error(f"Collision watch error: {e}")
-                # If connection is lost, wait longer before retrying
-                await asyncio.sleep(5.0)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_forever, args=(loop, queue), name="collision-poll", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                has_collided, object_name = await queue.get()
+                if has_collided:
+                    log.warning(f"Collision detected with object: {object_name}")
+                    self.last_collision = {"object": object_name, "at": time.time()}
+                self.collided = has_collided
+        finally:
+            self._stop.set()
+
+    def stats(self) -> dict:
+        return {"collided": self.collided, "lastCollision": self.last_collision, "polls": self.polls, "errors": self.errors}
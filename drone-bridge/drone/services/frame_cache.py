@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class CachedFrame:
+    """
+    One captured camera frame. `rgb` is a zero-copy view of the AirSim response
+    buffer; the BGR conversion and the plain JPEG encodings (per quality) are
+    computed on first use and shared by everyone reading the frame. Both methods
+    block, so call them from a worker thread.
+    """
+    __slots__ = ("camera_type", "captured_at", "rgb", "_bgr", "_jpeg", "_lock")
+
+    def __init__(self, camera_type: str, response, captured_at: float):
+        self.camera_type = camera_type
+        self.captured_at = captured_at
+        self.rgb = np.frombuffer(response.image_data_uint8, dtype=np.uint8).reshape(response.height, response.width, 3)
+        self._bgr = None
+        self._jpeg = {}
+        self._lock = threading.Lock()
+
+    def age(self) -> float:
+        return time.monotonic() - self.captured_at
+
+    def bgr(self):
+        """The frame in OpenCV's BGR order (read-only; copy it before drawing on it)."""
+        with self._lock:
+            if self._bgr is None:
+                self._bgr = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2BGR)
+                self._bgr.flags.writeable = False
+            return self._bgr
+
+    def jpeg(self, quality: int, encode) -> bytes:
+        """The frame without overlay as JPEG bytes, encoded with `encode(img, quality)` once per quality."""
+        data = self._jpeg.get(quality)
+        if data is None:
+            bgr = self.bgr()
+            with self._lock:
+                data = self._jpeg.get(quality)
+                if data is None:
+                    data = self._jpeg[quality] = encode(bgr, quality)
+        return data
+
+
+class FrameCache:
+    """
+    Latest frame of each camera, so that callers wanting a frame within the same
+    few hundred milliseconds (delivery photo, live view, status UI) share one
+    AirSim round trip and one encode. Cameras already being fetched are waited
+    for rather than requested a second time.
+    """
+    def __init__(self, ttl_s: float):
+        self.ttl_s = ttl_s
+        self.frames = {}     # camera type -> CachedFrame
+        self._inflight = {}  # camera type -> future resolved when its fetch completes
+        self.hits = 0
+        self.misses = 0
+
+    def fresh(self, camera_type: str, max_age: float = None):
+        """The cached frame of a camera if it is younger than `max_age` (default: the TTL)."""
+        frame = self.frames.get(camera_type)
+        if frame is None or frame.age() > (self.ttl_s if max_age is None else max_age):
+            return None
+        return frame
+
+    async def get(self, camera_types: list, fetch, max_age: float = None) -> list:
+        """
+        Frames for `camera_types`, in order. Cameras without a fresh frame are
+        fetched together with `await fetch(camera_types)`, which returns AirSim
+        responses in the same order. An empty response becomes None.
+        """
+        frames = {camera_type: self.fresh(camera_type, max_age) for camera_type in camera_types}
+        missing = [camera_type for camera_type, frame in frames.items() if frame is None]
+        waiting = {camera_type: self._inflight[camera_type] for camera_type in missing if camera_type in self._inflight}
+        to_fetch = [camera_type for camera_type in missing if camera_type not in waiting]
+        # Joining a fetch already in flight counts as a hit: it costs no extra round trip
+        self.hits += len(frames) - len(to_fetch)
+        self.misses += len(to_fetch)
+
+        if to_fetch:
+            done = asyncio.get_running_loop().create_future()
+            for camera_type in to_fetch:
+                self._inflight[camera_type] = done
+            try:
+                responses = await fetch(to_fetch)
+                captured_at = time.monotonic()
+                for camera_type, response in zip(to_fetch, responses):
+                    frame = CachedFrame(camera_type, response, captured_at) if response.height > 0 else None
+                    if frame is not None:
+                        self.frames[camera_type] = frame
+                    frames[camera_type] = frame
+            finally:
+                for camera_type in to_fetch:
+                    if self._inflight.get(camera_type) is done:
+                        del self._inflight[camera_type]
+                # Waiters re-read the cache, so a failed fetch simply leaves them without a frame
+                done.set_result(None)
+
+        for camera_type, done in waiting.items():
+            await asyncio.shield(done)
+            frames[camera_type] = self.fresh(camera_type, max_age)
+            if frames[camera_type] is None:
+                raise Exception(f"No frame from the {camera_type} camera")
+        return [frames[camera_type] for camera_type in camera_types]
+
+    def stats(self) -> dict:
+        return {
+            "ttlS": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "frames": {camera_type: round(frame.age(), 3) for camera_type, frame in self.frames.items()},
+        }
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from pyzbar.pyzbar import decode
+
+from config.config import Config
+
+log = logging.getLogger("qr_scanner")
+
+
+def _downscale(gray, max_side: int):
+    scale = min(1.0, max_side / max(gray.shape))
+    if scale >= 1.0:
+        return gray, 1.0
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def find_candidates(gray, max_side: int = 640, max_candidates: int = 4) -> list:
+    """
+    Regions of a grayscale frame that look like a QR code (square-ish patches
+    dense in sharp black/white edges), largest first, as (x, y, w, h) in frame
+    pixels with a margin around them. Works on a downscaled copy of the frame.
+    """
+    small, scale = _downscale(gray, max_side)
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+    _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9)))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < 16 or h < 16 or not 0.5 <= w / h <= 2.0:
+            continue
+        if cv2.countNonZero(mask[y:y + h, x:x + w]) < 0.5 * w * h:
+            continue
+        boxes.append((w * h, x, y, w, h))
+    boxes.sort(reverse=True)
+
+    height, width = gray.shape
+    regions = []
+    for _, x, y, w, h in boxes[:max_candidates]:
+        # Back to frame pixels, with a 20% margin for the quiet zone
+        margin_x, margin_y = w * 0.2, h * 0.2
+        x0, y0 = int(max(0, (x - margin_x) / scale)), int(max(0, (y - margin_y) / scale))
+        x1, y1 = int(min(width, (x + w + margin_x) / scale)), int(min(height, (y + h + margin_y) / scale))
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+    return regions
+
+
+def scan_frame(rgb, max_side: int = 640, full_frame: bool = False, expected: str = None) -> tuple:
+    """
+    Decodes the QR codes in an RGB camera frame: each candidate region is cropped,
+    downscaled and passed to pyzbar; the whole (downscaled) frame is only decoded
+    when `full_frame` is set or no candidate was found. Every candidate is decoded
+    unless `expected` is given, in which case the scan stops once that text is read
+    (another order's code in a larger crop doesn't hide it). Runs on a worker
+    thread; OpenCV and pyzbar release the GIL. Returns (texts, candidate count).
+    """
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    regions = find_candidates(gray, max_side)
+    texts = []
+    for x, y, w, h in regions:
+        crop, _ = _downscale(gray[y:y + h, x:x + w], max_side)
+        texts.extend(symbol.data.decode("utf-8", errors="replace") for symbol in decode(crop))
+        if expected is not None and expected in texts:
+            return texts, len(regions)
+    if full_frame or not regions:
+        small, _ = _downscale(gray, max_side)
+        texts.extend(symbol.data.decode("utf-8", errors="replace") for symbol in decode(small))
+    return texts, len(regions)
+
+
+class QRScanner:
+    """
+    Looks for the delivery QR code in the live frames of a drone camera (the
+    bottom one by default), to confirm a delivery from what the drone sees.
+
+    Frames come from CameraService's frame cache at up to QR_SCAN_MAX_FPS and are
+    decoded on a small thread pool; while every worker is busy, new frames are
+    skipped rather than queued, so scanning keeps pace with the camera and the
+    event loop only ever waits. The scan stops at the first code reading
+    QR_TEXT_PREFIX + order id.
+    """
+    def __init__(self, camera, workers: int = None, max_fps: float = None, max_side: int = None):
+        config = Config()
+        self.camera = camera
+        self.text_prefix = config.QR_TEXT_PREFIX
+        self.camera_type = config.QR_SCAN_CAMERA
+        self.timeout_s = config.QR_SCAN_TIMEOUT_S
+        self.workers = workers or config.QR_SCAN_WORKERS
+        self.max_fps = max_fps or config.QR_SCAN_MAX_FPS
+        self.max_side = max_side or config.QR_SCAN_MAX_SIDE
+        # Decode the whole frame every few scans too, in case the candidate search misses the code
+        self.full_frame_every = 4
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-scan")
+
+    async def scan_for(self, order_id: str, timeout_s: float = None, camera_type: str = None) -> dict:
+        """
+        Scans live frames until the order's QR code is seen or `timeout_s` passes.
+        Returns the outcome with timing and frame counts.
+        """
+        expected = f"{self.text_prefix}{order_id}"
+        camera_type = camera_type or self.camera_type
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.max_fps
+        started = loop.time()
+        deadline = started + (timeout_s or self.timeout_s)
+        next_grab = started
+        pending = {}  # decode future -> time it was submitted
+        last_frame = None
+        scanned = skipped = errors = 0
+        seen = set()
+        match = None
+        log.info(f"Scanning the {camera_type} camera for order {order_id}...")
+        try:
+            while match is None:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                if now >= next_grab:
+                    next_grab = now + interval
+                    if len(pending) >= self.workers:
+                        skipped += 1
+                    else:
+                        try:
+                            frame = await self.camera.get_frame(camera_type, max_age=interval)
+                        except Exception as e:
+                            errors += 1
+                            if errors == 1:
+                                log.warning(f"No frame from the {camera_type} camera: {e}")
+                            frame = None
+                        if frame is not None and frame is not last_frame:
+                            last_frame = frame
+                            full_frame = scanned % self.full_frame_every == 0
+                            scanned += 1
+                            future = loop.run_in_executor(self.executor, scan_frame, frame.rgb, self.max_side, full_frame, expected)
+                            pending[future] = loop.time()
+
+                wait_s = max(0.0, min(next_grab, deadline) - loop.time())
+                if not pending:
+                    await asyncio.sleep(wait_s)
+                    continue
+                done, _ = await asyncio.wait(pending, timeout=wait_s, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    submitted = pending.pop(future)
+                    try:
+                        texts, candidates = future.result()
+                    except Exception as e:
+                        errors += 1
+                        log.error(f"QR decode failed: {e}")
+                        continue
+                    if expected in texts:
+                        match = {"decodeMs": round((loop.time() - submitted) * 1000, 1), "candidates": candidates}
+                        break
+                    for text in set(texts) - seen:
+                        seen.add(text)
+                        log.warning(f"Ignoring QR code for another delivery: {text}")
+        finally:
+            # Decodes already running finish on their own; their results are dropped
+            for future in pending:
+                future.cancel()
+
+        elapsed_ms = round((loop.time() - started) * 1000, 1)
+        if match is not None:
+            log.info(f"✅ Delivery QR code for order {order_id} found in {elapsed_ms} ms ({scanned} frames scanned).")
+        else:
+            log.error(f"❌ Delivery QR code for order {order_id} not found within {elapsed_ms} ms ({scanned} frames scanned).")
+        return {
+            "ok": match is not None,
+            "orderId": order_id,
+            "text": expected if match is not None else None,
+            "camera": camera_type,
+            "elapsedMs": elapsed_ms,
+            "decodeMs": match["decodeMs"] if match else None,
+            "candidates": match["candidates"] if match else None,
+            "framesScanned": scanned,
+            "framesSkipped": skipped,
+            "errors": errors,
+            "otherCodes": sorted(seen),
+            "scannedAt": time.time(),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -1,64 +1,179 @@
-
-
 import asyncio
+import collections
 import cv2
+import multiprocessing
 import numpy as np
 import qrcode
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pyzbar.pyzbar import decode
-from config.config import QR_TEXT_PREFIX, QR_WINDOW_TITLE
+from config.config import Config
 import logging
 
 log = logging.getLogger("qr")
 
+
+def render_qr(data: str, payload_text: str, interactive: bool = False):
+    """
+    Renders the delivery QR code as an 800x800 BGR image. Runs in a worker
+    process: qrcode is pure Python and would otherwise hold the GIL.
+    """
+    qr_img = qrcode.make(data)
+    qr_img_cv = np.array(qr_img.convert('RGB'))
+    qr_img_cv = cv2.cvtColor(qr_img_cv, cv2.COLOR_RGB2BGR)
+    qr_img_cv = cv2.resize(qr_img_cv, (800, 800), interpolation=cv2.INTER_NEAREST)
+
+    # Add text overlay with better visibility
+    cv2.putText(qr_img_cv, "DRONE DELIVERY QR CODE", (50, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
+    cv2.putText(qr_img_cv, f"Order: {payload_text}", (50, 750), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    if interactive:
+        cv2.putText(qr_img_cv, "Press any key to continue...", (50, 780), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (128, 128, 128), 2)
+        cv2.putText(qr_img_cv, "ESC to cancel", (50, 810), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+    return qr_img_cv
+
+
+def decode_qr(image) -> list:
+    """Texts of the QR codes found in an image. pyzbar releases the GIL, so threads are enough."""
+    return [symbol.data.decode("utf-8", errors="replace") for symbol in decode(image)]
+
+
 class QRService:
-    def __init__(self):
-        pass
+    """
+    Renders and verifies delivery QR codes without touching the event loop.
+
+    Rendering runs in a small process pool and decoding in a thread pool, so
+    many orders can be confirmed at once. Rendered images are kept in an LRU
+    cache keyed by payload, and concurrent requests for the same payload share
+    one render. In headless mode (QR_HEADLESS, the default) `show_and_scan`
+    verifies without opening a window.
+    """
+    def __init__(self, workers: int = None, cache_size: int = None, headless: bool = None):
+        config = Config()
+        self.text_prefix = config.QR_TEXT_PREFIX
+        self.window_title = config.QR_WINDOW_TITLE
+        self.headless = config.QR_HEADLESS if headless is None else headless
+        self.workers = workers or config.QR_WORKERS
+        self.cache_size = cache_size or config.QR_RENDER_CACHE_SIZE
+        self._renders = collections.OrderedDict()  # (payload, interactive) -> future of the image
+        self._render_pool = None
+        self._decode_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-decode")
+        # HighGUI windows must always be driven from the same thread
+        self._gui = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr-gui")
+        self.cache_hits = 0
+        self.renders = 0
+
+    def _pool(self):
+        if self._render_pool is None:
+            # Spawned workers do not inherit the parent's gRPC/asyncio state
+            self._render_pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._render_pool
+
+    async def render(self, payload_text: str, interactive: bool = False):
+        """
+        The QR image for an order, from the cache when it was rendered recently (read-only).
+        The render itself runs as its own task, so a caller that is cancelled leaves it
+        running for everyone else waiting on the same payload.
+        """
+        key = (payload_text, interactive)
+        future = self._renders.get(key)
+        if future is not None:
+            self._renders.move_to_end(key)
+            self.cache_hits += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._render(key, payload_text, interactive))
+        # Mark a failure retrieved even if every caller was cancelled; callers still get it
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._renders[key] = future
+        while len(self._renders) > self.cache_size:
+            self._renders.popitem(last=False)
+        self.renders += 1
+        return await asyncio.shield(future)
+
+    async def _render(self, key, payload_text: str, interactive: bool):
+        try:
+            image = await asyncio.get_running_loop().run_in_executor(
+                self._pool(), render_qr, f"{self.text_prefix}{payload_text}", payload_text, interactive)
+        except BaseException:
+            # Forget the failed render so the next request tries again
+            if self._renders.get(key) is asyncio.current_task():
+                del self._renders[key]
+            raise
+        image.flags.writeable = False
+        return image
+
+    async def scan(self, image) -> list:
+        """Decodes the QR codes in an image on the decode pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._decode_pool, decode_qr, image)
+
+    async def verify(self, payload_text: str) -> dict:
+        """
+        Headless proof: renders the order's QR code and checks that it decodes back
+        to the expected text. Returns the outcome with render and decode times.
+        """
+        expected = f"{self.text_prefix}{payload_text}"
+        started = time.perf_counter()
+        image = await self.render(payload_text)
+        rendered = time.perf_counter()
+        texts = await self.scan(image)
+        decoded = time.perf_counter()
+        ok = expected in texts
+        if ok:
+            log.info(f"✅ QR scan successful: {expected}")
+        else:
+            log.error(f"❌ QR scan failed for order {payload_text}")
+        return {
+            "ok": ok,
+            "text": texts[0] if texts else None,
+            "renderMs": round((rendered - started) * 1000, 1),
+            "decodeMs": round((decoded - rendered) * 1000, 1),
+        }
 
     async def show_and_scan(self, payload_text: str) -> bool:
         """
         Show a QR code to simulate proof and auto-scan it locally.
         """
-        data = f"{QR_TEXT_PREFIX}{payload_text}"
-        qr_img = qrcode.make(data)
-        qr_img_cv = np.array(qr_img.convert('RGB'))
-        qr_img_cv = cv2.cvtColor(qr_img_cv, cv2.COLOR_RGB2BGR)
-        qr_img_cv = cv2.resize(qr_img_cv, (800, 800), interpolation=cv2.INTER_NEAREST)
-
-        # Add text overlay with better visibility
-        cv2.putText(qr_img_cv, "DRONE DELIVERY QR CODE", (50, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
-        cv2.putText(qr_img_cv, f"Order: {payload_text}", (50, 750), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
-        cv2.putText(qr_img_cv, "Press any key to continue...", (50, 780), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (128, 128, 128), 2)
-        cv2.putText(qr_img_cv, "ESC to cancel", (50, 810), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        if self.headless:
+            return (await self.verify(payload_text))["ok"]
 
+        qr_img_cv = await self.render(payload_text, interactive=True)
         log.info(f"📱 Displaying QR code for delivery: {payload_text}")
-        
+
         # Display with user interaction
         loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(None, lambda: self._display_interactive(qr_img_cv))
-        
+        result = await loop.run_in_executor(self._gui, lambda: self._display_interactive(qr_img_cv))
+
         # Check if user pressed ESC (key code 27)
         if result == 27:
             log.info("QR code display cancelled by user")
             return False
-        
+
         # Simulate scan
         await asyncio.sleep(0.5)
-        decoded = decode(qr_img_cv)
+        decoded = await self.scan(qr_img_cv)
         if decoded:
-            text = decoded[0].data.decode("utf-8")
-            log.info(f"✅ QR scan successful: {text}")
+            log.info(f"✅ QR scan successful: {decoded[0]}")
             return True
         log.error("❌ QR scan failed")
         return False
 
     def _display(self, image):
-        cv2.imshow(QR_WINDOW_TITLE, image)
+        cv2.imshow(self.window_title, image)
         cv2.waitKey(900)  # auto-close after 900ms to keep event loop free
         cv2.destroyAllWindows()
 
     def _display_interactive(self, image):
         """Display QR code and wait for user interaction"""
-        cv2.imshow(QR_WINDOW_TITLE, image)
+        cv2.imshow(self.window_title, image)
         key = cv2.waitKey(0) & 0xFF  # Wait for any key press and get key code
         cv2.destroyAllWindows()
         return key
+
+    def stats(self) -> dict:
+        return {"cached": len(self._renders), "cacheHits": self.cache_hits, "renders": self.renders, "workers": self.workers}
+
+    def close(self):
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False, cancel_futures=True)
+        self._decode_pool.shutdown(wait=False)
+        self._gui.shutdown(wait=False)
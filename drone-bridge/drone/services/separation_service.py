@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import math
+
+from config.config import Config
+from ..spatial_index import SpatialIndex
+
+log = logging.getLogger("separation")
+
+
+class SeparationService:
+    """
+    Keeps a SpatialIndex of the airborne drones in a StateStore up to date and
+    raises an alert as soon as two of them come closer than the minimum
+    separation, instead of waiting for AirSim to report a collision.
+
+    Alerts are sent to the backend as `separation_alert` messages and handed to
+    local subscribers (see `subscribe`). A conflict is cleared once the pair is
+    20% beyond the minimum again, so a pair hovering at the limit does not flap.
+
+    Positions come from the local state store unless `source` is given: an async
+    callable returning (drone_id, lat, lng, alt) tuples, which lets the fleet
+    supervisor watch drones hosted by several shard processes.
+    """
+    STALE_AFTER_S = 5.0
+    CLEAR_FACTOR = 1.2
+
+    def __init__(self, state_store, ws_client=None, min_separation_m: float = None,
+                 interval_s: float = None, cell_m: float = None, source=None):
+        config = Config()
+        self.state_store = state_store
+        self.ws_client = ws_client
+        self.source = source
+        self.min_separation_m = min_separation_m or config.SEPARATION_MIN_M
+        self.interval_s = interval_s or config.SEPARATION_CHECK_INTERVAL_S
+        self.index = SpatialIndex(cell_m or max(config.SPATIAL_INDEX_CELL_M, self.min_separation_m * self.CLEAR_FACTOR))
+        self.conflicts = {}  # (drone_a, drone_b) -> latest distance
+        self._subscribers = set()
+
+    def positions(self) -> list:
+        """(drone_id, lat, lng, alt) of every drone in the state store that is airborne with fresh telemetry."""
+        positions = []
+        for drone_id in self.state_store.drone_ids():
+            telemetry = self.state_store.record(drone_id).telemetry
+            lat = telemetry.get("latitude_deg") if telemetry is not None else None
+            lng = telemetry.get("longitude_deg") if telemetry is not None else None
+            if lat is None or lng is None or not (math.isfinite(lat) and math.isfinite(lng)) \
+                    or telemetry.get("in_air") is False or telemetry.last_update_age() > self.STALE_AFTER_S:
+                continue
+            positions.append((drone_id, lat, lng, telemetry.get("relative_altitude_m", 0.0)))
+        return positions
+
+    def update(self, positions):
+        """Moves the given drones into the index, and drops every drone not among them (or without a valid position)."""
+        seen = set()
+        for drone_id, lat, lng, alt in positions:
+            try:
+                self.index.update(drone_id, lat, lng, alt)
+            except (TypeError, ValueError):
+                continue
+            seen.add(drone_id)
+        for drone_id in [drone_id for drone_id in self.index if drone_id not in seen]:
+            self.index.remove(drone_id)
+
+    async def refresh(self):
+        """Re-indexes the airborne drones, from `source` when given, else from the state store."""
+        self.update(await self.source() if self.source is not None else self.positions())
+
+    def check(self) -> list:
+        """Compares the current pairs with the known conflicts and returns the new alerts."""
+        close = {(a, b): distance for a, b, distance in self.index.pairs_within(self.min_separation_m * self.CLEAR_FACTOR)}
+        alerts = []
+        for pair, distance in close.items():
+            if pair not in self.conflicts and distance <= self.min_separation_m:
+                alerts.append(self._alert("CONFLICT", pair, distance))
+            if pair in self.conflicts or distance <= self.min_separation_m:
+                self.conflicts[pair] = distance
+        for pair in [pair for pair in self.conflicts if pair not in close]:
+            del self.conflicts[pair]
+            alerts.append(self._alert("CLEARED", pair, None))
+        return alerts
+
+    def _alert(self, status: str, pair, distance) -> dict:
+        return {
+            "status": status,
+            "droneIds": list(pair),
+            "distanceM": round(distance, 1) if distance is not None else None,
+            "minSeparationM": self.min_separation_m,
+        }
+
+    def subscribe(self, maxsize: int = 100) -> asyncio.Queue:
+        """Returns a queue receiving every alert; the oldest alert is dropped if it fills up."""
+        queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    async def _publish(self, alert: dict):
+        if alert["status"] == "CONFLICT":
+            log.warning(f"Separation conflict: {alert['droneIds'][0]} and {alert['droneIds'][1]} "
+                        f"{alert['distanceM']} m apart (minimum {self.min_separation_m} m)")
+        else:
+            log.info(f"Separation restored: {alert['droneIds'][0]} and {alert['droneIds'][1]}")
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(alert)
+        if self.ws_client is not None:
+            await self.ws_client.send_message({"type": "separation_alert", "payload": alert})
+
+    async def watch(self):
+        """Re-indexes the fleet and checks separation every `interval_s`."""
+        log.info(f"Separation monitoring started (minimum {self.min_separation_m} m every {self.interval_s}s).")
+        while True:
+            try:
+                await self.refresh()
+                for alert in self.check():
+                    await self._publish(alert)
+            except Exception as e:
+                log.error(f"Separation check error: {e}")
+            await asyncio.sleep(self.interval_s)
+
+    def status(self) -> dict:
+        """Current conflicts, for status endpoints."""
+        return {
+            "minSeparationM": self.min_separation_m,
+            "trackedDrones": len(self.index),
+            "conflicts": [{"droneIds": list(pair), "distanceM": round(distance, 1)} for pair, distance in self.conflicts.items()],
+        }
@@ -1,18 +1,22 @@
 # Small helper to apply weather in AirSim if available.
 import asyncio
 
+from .airsim_pool import shared_pool
+
 try:
     import airsim
 except Exception:
     airsim = None
 
-async def apply_in_airsim(wind_m_s: float, rain: float):
-    if airsim is None:
-        return
-    client = airsim.MultirotorClient()
-    client.confirmConnection()
+def _apply(client, wind_m_s: float, rain: float):
     # AirSim weather uses enableWeather/ setWeatherParameter
     client.simEnableWeather(True)
     # Wind is not directly settable via weather params; we emulate via param names that exist (Rain, Snow, etc.)
     # For realism you can modify force fields in custom Unreal, but here we map wind to Fog param as a placeholder.
     client.simSetWeatherParameter(airsim.WeatherParameter.Rain, max(0.0, min(1.0, rain)))
+
+async def apply_in_airsim(wind_m_s: float, rain: float):
+    if airsim is None:
+        return
+    # Runs on a pooled, already-connected client instead of connecting on every update
+    await shared_pool().call(_apply, wind_m_s, rain)
@@ -0,0 +1,336 @@
+"""
+In-process kinematic multicopter simulator, usable in place of `mavsdk.System`.
+
+Every simulated drone lives in one KinematicFleet, whose state is a set of NumPy
+arrays advanced together in a fixed-step update, so a thousand drones cost about
+as much as one Python loop iteration. SimulatedSystem exposes the subset of the
+MAVSDK `core`, `telemetry` and `action` plugins that MAVSDKClient and
+MissionManager use; missions run in "stepwise" mode (there is no mission plugin).
+
+The model is deliberately simple: drones fly straight lines at cruise speed,
+climb and descend at fixed rates and stop instantly. They stay armed after
+touching down (like PX4 before its auto-disarm delay), and return-to-launch
+first climbs to the return altitude, flies home, then lands.
+"""
+import asyncio
+import enum
+import logging
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from config.config import Config
+
+METERS_PER_DEG_LAT = 111320.0
+
+ConnectionState = namedtuple("ConnectionState", "is_connected")
+Position = namedtuple("Position", "latitude_deg longitude_deg absolute_altitude_m relative_altitude_m")
+Battery = namedtuple("Battery", "remaining_percent voltage_v")
+VelocityNed = namedtuple("VelocityNed", "north_m_s east_m_s down_m_s")
+Heading = namedtuple("Heading", "heading_deg")
+Health = namedtuple("Health", "is_global_position_ok is_home_position_ok is_armable")
+
+
+class FlightMode(enum.Enum):
+    READY = 1
+    TAKEOFF = 2
+    HOLD = 3
+    RETURN_TO_LAUNCH = 5
+    LAND = 6
+
+    def __str__(self):
+        # Same as MAVSDK's enums: the bare name, e.g. "HOLD"
+        return self.name
+
+
+class LandedState(enum.Enum):
+    ON_GROUND = 1
+    IN_AIR = 2
+    TAKING_OFF = 3
+    LANDING = 4
+
+    def __str__(self):
+        return self.name
+
+
+class SimActionError(Exception):
+    """Raised when a simulated action is refused, like MAVSDK's ActionError."""
+
+
+# Internal flight phases, one per drone
+IDLE, TAKEOFF, HOLD, GOTO, LAND, RTL = range(6)
+_PHASE_MODES = (FlightMode.READY, FlightMode.TAKEOFF, FlightMode.HOLD, FlightMode.HOLD, FlightMode.LAND, FlightMode.RETURN_TO_LAUNCH)
+
+
+class KinematicFleet:
+    """
+    State of all simulated drones as NumPy arrays, advanced by `step(dt)`.
+    Positions are kept in meters north/east of each drone's home.
+    """
+    FIELDS = ("home_lat", "home_lng", "home_amsl", "north", "east", "alt", "v_north", "v_east", "v_down",
+              "target_north", "target_east", "target_alt", "takeoff_alt", "heading", "battery")
+
+    def __init__(self, step_s: float = None, time_scale: float = None, telemetry_hz: float = None,
+                 cruise_speed_m_s: float = None, climb_rate_m_s: float = 3.0, descent_rate_m_s: float = 1.5,
+                 return_alt_m: float = 15.0, battery_drain_per_s: float = 1.0 / 1800):
+        config = Config()
+        self.step_s = step_s or config.SIM_STEP_S
+        # Simulated seconds per wall-clock second; 0 runs as fast as possible
+        self.time_scale = config.SIM_TIME_SCALE if time_scale is None else time_scale
+        self.telemetry_interval_s = 1.0 / (telemetry_hz or config.SIM_TELEMETRY_HZ)
+        self.cruise_speed = cruise_speed_m_s or config.MISSION_CRUISE_SPEED_M_S
+        self.climb_rate = climb_rate_m_s
+        self.descent_rate = descent_rate_m_s
+        self.return_alt = return_alt_m
+        self.battery_drain = battery_drain_per_s
+        self.sim_time = 0.0
+        self.steps = 0
+        self.ids = []
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros(0))
+        self.phase = np.zeros(0, dtype=np.int8)
+        self.armed = np.zeros(0, dtype=bool)
+        self._tick = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_drone(self, drone_id: str, home_lat: float, home_lng: float, home_amsl: float = 0.0) -> int:
+        """Adds a drone on the ground at its home position and returns its index."""
+        index = len(self.ids)
+        self.ids.append(drone_id)
+        values = {"home_lat": home_lat, "home_lng": home_lng, "home_amsl": home_amsl, "takeoff_alt": 2.5, "battery": 1.0}
+        for name in self.FIELDS:
+            setattr(self, name, np.append(getattr(self, name), values.get(name, 0.0)))
+        self.phase = np.append(self.phase, np.int8(IDLE))
+        self.armed = np.append(self.armed, False)
+        return index
+
+    def to_local(self, index: int, lat: float, lng: float):
+        """Converts a lat/lng to meters north/east of the drone's home."""
+        north = (lat - self.home_lat[index]) * METERS_PER_DEG_LAT
+        east = (lng - self.home_lng[index]) * METERS_PER_DEG_LAT * math.cos(math.radians(self.home_lat[index]))
+        return north, east
+
+    def step(self, dt: float):
+        """Advances every drone by dt seconds."""
+        phase = self.phase
+        # Horizontal: GOTO and RTL (once at return altitude) fly straight at cruise speed
+        d_north = self.target_north - self.north
+        d_east = self.target_east - self.east
+        distance = np.hypot(d_north, d_east)
+        away = distance > 1e-3
+        rtl_climbing = (phase == RTL) & away & (self.alt < self.return_alt - 0.1)
+        moving = ((phase == GOTO) | ((phase == RTL) & ~rtl_climbing)) & away
+        speed = np.minimum(self.cruise_speed, distance / dt)
+        scale = np.where(moving, speed / np.maximum(distance, 1e-9), 0.0)
+        self.v_north = d_north * scale
+        self.v_east = d_east * scale
+        self.north += self.v_north * dt
+        self.east += self.v_east * dt
+        self.heading = np.where(moving, np.degrees(np.arctan2(self.v_east, self.v_north)) % 360.0, self.heading)
+
+        # Vertical: climb/descend towards the phase's altitude target
+        target_alt = np.select(
+            [phase == TAKEOFF, phase == GOTO, phase == LAND, rtl_climbing, (phase == RTL) & ~away],
+            [self.takeoff_alt, self.target_alt, 0.0, self.return_alt, 0.0],
+            default=self.alt,
+        )
+        climb = np.clip((target_alt - self.alt) / dt, -self.descent_rate, self.climb_rate)
+        self.v_down = -climb
+        # Snap to the ground so touchdown is not missed by floating point residue
+        alt = self.alt + climb * dt
+        self.alt = np.where(alt < 1e-3, 0.0, alt)
+
+        # Phase transitions
+        self.phase[(phase == TAKEOFF) & (self.alt >= self.takeoff_alt - 0.05)] = HOLD
+        touched_down = ((phase == LAND) | ((phase == RTL) & ~away)) & (self.alt <= 0.0)
+        self.phase[touched_down] = IDLE
+        self.battery = np.maximum(self.battery - np.where(self.armed, self.battery_drain * dt, 0.0), 0.0)
+        self.sim_time += dt
+        self.steps += 1
+
+    def _publish_tick(self):
+        """Wakes up every telemetry stream."""
+        tick, self._tick = self._tick, asyncio.Event()
+        tick.set()
+
+    async def wait_tick(self):
+        await self._tick.wait()
+
+    async def run(self):
+        """Fixed-step loop; telemetry streams are woken every telemetry interval."""
+        loop = asyncio.get_running_loop()
+        started, next_publish = loop.time(), 0.0
+        logging.info(f"Kinematic simulator running {len(self)} drones (step {self.step_s}s, time scale {self.time_scale or 'max'}).")
+        while True:
+            self.step(self.step_s)
+            if self.sim_time >= next_publish:
+                self._publish_tick()
+                next_publish = self.sim_time + self.telemetry_interval_s
+            if self.time_scale > 0:
+                await asyncio.sleep(max(0.0, started + self.sim_time / self.time_scale - loop.time()))
+            else:
+                await asyncio.sleep(0)
+
+    def ensure_running(self):
+        """Starts the update loop on first use."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+
+class _Core:
+    def __init__(self, system):
+        self._system = system
+
+    async def connection_state(self):
+        yield ConnectionState(True)
+        # The simulated link never drops
+        await asyncio.Event().wait()
+
+
+class _Telemetry:
+    def __init__(self, system):
+        self._fleet = system.fleet
+        self._i = system.index
+
+    async def _stream(self, build):
+        while True:
+            yield build()
+            await self._fleet.wait_tick()
+
+    def position(self):
+        f, i = self._fleet, self._i
+        def build():
+            lat = f.home_lat[i] + f.north[i] / METERS_PER_DEG_LAT
+            lng = f.home_lng[i] + f.east[i] / (METERS_PER_DEG_LAT * math.cos(math.radians(f.home_lat[i])))
+            return Position(float(lat), float(lng), float(f.home_amsl[i] + f.alt[i]), float(f.alt[i]))
+        return self._stream(build)
+
+    def battery(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: Battery(float(f.battery[i]), float(13.6 + 3.2 * f.battery[i])))
+
+    def velocity_ned(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: VelocityNed(float(f.v_north[i]), float(f.v_east[i]), float(f.v_down[i])))
+
+    def heading(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: Heading(float(f.heading[i])))
+
+    def flight_mode(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: _PHASE_MODES[f.phase[i]])
+
+    def armed(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: bool(f.armed[i]))
+
+    def in_air(self):
+        f, i = self._fleet, self._i
+        return self._stream(lambda: bool(f.alt[i] > 0.05))
+
+    def landed_state(self):
+        f, i = self._fleet, self._i
+        def build():
+            phase, alt = f.phase[i], f.alt[i]
+            if alt <= 0.05:
+                return LandedState.TAKING_OFF if phase == TAKEOFF else LandedState.ON_GROUND
+            return LandedState.LANDING if phase == LAND else LandedState.IN_AIR
+        return self._stream(build)
+
+    def health(self):
+        return self._stream(lambda: Health(True, True, True))
+
+
+class _Action:
+    def __init__(self, system):
+        self._fleet = system.fleet
+        self._i = system.index
+
+    def _require_armed(self, action: str):
+        if not self._fleet.armed[self._i]:
+            raise SimActionError(f"{action} refused: not armed")
+
+    async def arm(self):
+        if self._fleet.battery[self._i] <= 0.05:
+            raise SimActionError("Arm refused: battery depleted")
+        self._fleet.armed[self._i] = True
+
+    async def disarm(self):
+        if self._fleet.alt[self._i] > 0.05:
+            raise SimActionError("Disarm refused: in air")
+        self._fleet.armed[self._i] = False
+
+    async def set_takeoff_altitude(self, altitude: float):
+        self._fleet.takeoff_alt[self._i] = altitude
+
+    async def takeoff(self):
+        self._require_armed("Takeoff")
+        self._fleet.phase[self._i] = TAKEOFF
+
+    async def land(self):
+        if self._fleet.alt[self._i] <= 0.05 and self._fleet.phase[self._i] == IDLE:
+            raise SimActionError("Land refused: already landed")
+        self._fleet.phase[self._i] = LAND
+
+    async def goto_location(self, latitude_deg: float, longitude_deg: float, absolute_altitude_m: float, yaw_deg: float):
+        self._require_armed("Goto")
+        f, i = self._fleet, self._i
+        f.target_north[i], f.target_east[i] = f.to_local(i, latitude_deg, longitude_deg)
+        f.target_alt[i] = max(0.0, absolute_altitude_m - f.home_amsl[i])
+        f.phase[i] = GOTO
+
+    async def return_to_launch(self):
+        self._require_armed("Return to launch")
+        f, i = self._fleet, self._i
+        f.target_north[i] = f.target_east[i] = 0.0
+        f.phase[i] = RTL
+
+
+class SimulatedSystem:
+    """One drone of a KinematicFleet behind the `mavsdk.System` interface."""
+    def __init__(self, fleet: KinematicFleet, drone_id: str, home_lat: float, home_lng: float, home_amsl: float = 0.0):
+        self.fleet = fleet
+        self.drone_id = drone_id
+        self.index = fleet.add_drone(drone_id, home_lat, home_lng, home_amsl)
+        self.core = _Core(self)
+        self.telemetry = _Telemetry(self)
+        self.action = _Action(self)
+
+    async def connect(self, system_address: str = None):
+        self.fleet.ensure_running()
+
+
+_shared_fleet = None
+
+
+def shared_fleet() -> KinematicFleet:
+    """The fleet that every `sim://` drone in this process joins."""
+    global _shared_fleet
+    if _shared_fleet is None:
+        _shared_fleet = KinematicFleet()
+    return _shared_fleet
+
+
+def system_for_address(address: str, drone_id: str) -> SimulatedSystem:
+    """
+    Builds a simulated drone from a `sim://` address. The home position can be
+    given as `sim://<lat>,<lng>[,<amsl>]`; by default drones are spread along
+    the SIM_HOME_* position, 25 m apart, so they do not start on top of each other.
+    """
+    config = Config()
+    fleet = shared_fleet()
+    spec = address[len("sim://"):]
+    if spec:
+        parts = [float(value) for value in spec.split(",")]
+        home_lat, home_lng = parts[0], parts[1]
+        home_amsl = parts[2] if len(parts) > 2 else 0.0
+    else:
+        home_lat = config.SIM_HOME_LAT
+        home_lng = config.SIM_HOME_LNG + len(fleet) * 25.0 / (METERS_PER_DEG_LAT * math.cos(math.radians(config.SIM_HOME_LAT)))
+        home_amsl = 0.0
+    return SimulatedSystem(fleet, drone_id, home_lat, home_lng, home_amsl)
@@ -0,0 +1,182 @@
+import heapq
+import math
+
+METERS_PER_DEG_LAT = 111320.0
+
+
+class SpatialIndex:
+    """
+    Grid-bucket index of drone positions for proximity queries.
+
+    Positions are projected to meters on a local flat grid around the first
+    valid point inserted (accurate to well under a meter across a city-sized
+    area), and each drone sits in one square cell of `cell_m`. Moving a drone only
+    touches its old and new cell, and a radius query only visits the cells that
+    overlap the circle, so both stay fast with thousands of drones.
+    """
+    def __init__(self, cell_m: float = 50.0):
+        self.cell_m = cell_m
+        self._origin = None
+        self._m_per_deg_lng = None
+        self._positions = {}  # drone id -> (x, y, alt)
+        self._cell_of = {}    # drone id -> cell
+        self._cells = {}      # cell -> set of drone ids
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, drone_id):
+        return drone_id in self._positions
+
+    def __iter__(self):
+        return iter(list(self._positions))
+
+    def _local(self, lat: float, lng: float):
+        # NaN (e.g. PX4 before GPS lock) would poison the origin and every cell index
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            raise ValueError(f"Position must be finite, got ({lat}, {lng})")
+        if self._origin is None:
+            self._origin = (lat, lng)
+            self._m_per_deg_lng = METERS_PER_DEG_LAT * math.cos(math.radians(lat))
+        return (lat - self._origin[0]) * METERS_PER_DEG_LAT, (lng - self._origin[1]) * self._m_per_deg_lng
+
+    def _cell(self, x: float, y: float):
+        return int(x // self.cell_m), int(y // self.cell_m)
+
+    def update(self, drone_id, lat: float, lng: float, alt: float = 0.0):
+        """Inserts or moves a drone. Raises ValueError for a non-finite position;
+        a non-finite altitude counts as 0."""
+        x, y = self._local(lat, lng)
+        cell = self._cell(x, y)
+        old = self._cell_of.get(drone_id)
+        if old != cell:
+            if old is not None:
+                bucket = self._cells[old]
+                bucket.discard(drone_id)
+                if not bucket:
+                    del self._cells[old]
+            self._cells.setdefault(cell, set()).add(drone_id)
+            self._cell_of[drone_id] = cell
+        self._positions[drone_id] = (x, y, alt if alt and math.isfinite(alt) else 0.0)
+
+    def remove(self, drone_id):
+        """Forgets a drone (e.g. once it has landed)."""
+        cell = self._cell_of.pop(drone_id, None)
+        self._positions.pop(drone_id, None)
+        if cell is not None:
+            bucket = self._cells[cell]
+            bucket.discard(drone_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def position(self, drone_id):
+        """Local (x, y, alt) of a drone in meters, or None."""
+        return self._positions.get(drone_id)
+
+    @staticmethod
+    def _distance(a, b, vertical: bool) -> float:
+        dz = a[2] - b[2] if vertical else 0.0
+        return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + dz * dz)
+
+    def _ring(self, center, radius: int):
+        """Cells on the square ring `radius` cells away from `center`."""
+        cx, cy = center
+        if radius == 0:
+            yield center
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def _within_local(self, point, radius_m: float, vertical: bool, exclude=None) -> list:
+        reach = int(math.ceil(radius_m / self.cell_m))
+        cx, cy = self._cell(point[0], point[1])
+        if (2 * reach + 1) ** 2 > len(self._cells):
+            # A radius wider than the populated area: visit the occupied cells, not every cell in range
+            buckets = [bucket for (x, y), bucket in self._cells.items() if abs(x - cx) <= reach and abs(y - cy) <= reach]
+        else:
+            buckets = [self._cells.get((x, y), ()) for x in range(cx - reach, cx + reach + 1)
+                       for y in range(cy - reach, cy + reach + 1)]
+        found = []
+        for bucket in buckets:
+            for drone_id in bucket:
+                if drone_id == exclude:
+                    continue
+                distance = self._distance(point, self._positions[drone_id], vertical)
+                if distance <= radius_m:
+                    found.append((drone_id, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def within(self, lat: float, lng: float, radius_m: float, alt: float = None) -> list:
+        """(drone id, distance) of every drone within `radius_m` of a point, nearest first.
+        Distances are 3D when `alt` is given, horizontal otherwise."""
+        x, y = self._local(lat, lng)
+        return self._within_local((x, y, alt or 0.0), radius_m, vertical=alt is not None)
+
+    def neighbours(self, drone_id, radius_m: float, vertical: bool = True) -> list:
+        """Other drones within `radius_m` of a drone, nearest first."""
+        point = self._positions.get(drone_id)
+        if point is None:
+            return []
+        return self._within_local(point, radius_m, vertical, exclude=drone_id)
+
+    def nearest(self, drone_id, k: int = 1, vertical: bool = True) -> list:
+        """
+        The `k` drones closest to a drone, searching outwards ring by ring. Once the
+        rings would cover more cells than there are drones (a lone drone far from
+        the rest), it scans every drone instead.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        point = self._positions.get(drone_id)
+        if point is None:
+            return []
+        center = self._cell(point[0], point[1])
+        candidates = []
+        remaining = len(self._positions) - 1
+        radius = 0
+        while remaining > 0:
+            if (2 * radius + 1) ** 2 > len(self._positions):
+                others = ((other, self._distance(point, position, vertical))
+                          for other, position in self._positions.items() if other != drone_id)
+                return heapq.nsmallest(k, others, key=lambda item: item[1])
+            for cell in self._ring(center, radius):
+                for other in self._cells.get(cell, ()):
+                    if other != drone_id:
+                        candidates.append((other, self._distance(point, self._positions[other], vertical)))
+                        remaining -= 1
+            # Anything in further rings is at least `radius` cells away horizontally
+            if len(candidates) >= k:
+                candidates.sort(key=lambda item: item[1])
+                if candidates[k - 1][1] <= radius * self.cell_m:
+                    break
+            radius += 1
+        candidates.sort(key=lambda item: item[1])
+        return candidates[:k]
+
+    def pairs_within(self, radius_m: float, vertical: bool = True) -> list:
+        """Every pair of drones closer than `radius_m`, as (id_a, id_b, distance)."""
+        reach = int(math.ceil(radius_m / self.cell_m))
+        pairs = []
+        for (cx, cy), bucket in self._cells.items():
+            for dx in range(-reach, reach + 1):
+                for dy in range(-reach, reach + 1):
+                    # Visit each pair of cells once
+                    if (dx, dy) < (0, 0):
+                        continue
+                    other_bucket = bucket if (dx, dy) == (0, 0) else self._cells.get((cx + dx, cy + dy))
+                    if not other_bucket:
+                        continue
+                    for a in bucket:
+                        pa = self._positions[a]
+                        for b in other_bucket:
+                            if other_bucket is bucket and not a < b:
+                                continue
+                            distance = self._distance(pa, self._positions[b], vertical)
+                            if distance <= radius_m:
+                                pairs.append((a, b, distance) if a < b else (b, a, distance))
+        return pairs
@@ -1,10 +1,161 @@
 """
-A simple, centralized in-memory store for the drone's mission state.
+A centralized in-memory store for the state of every drone hosted by this process.
 This prevents state from being scattered across different modules.
+
+Each drone has one slot-based record holding its mission progress, a reference to
+its live telemetry cache and its link health. Every mission or link change bumps
+the record's version, and so do telemetry updates, at most TELEMETRY_MAX_RATE_HZ
+times a second. Readers can wait for the next change with
+`await store.changed(drone_id, since_version)` instead of polling.
 """
-mission_state = {
-    "is_running": False,
-    "current_waypoint": 0,
-    "total_waypoints": 0,
-    "status_message": "Idle"
-}
\ No newline at end of file
+import asyncio
+import time
+
+from config.config import Config
+
+
+class MissionRecord:
+    __slots__ = ("is_running", "current_waypoint", "total_waypoints", "status_message")
+
+    def __init__(self):
+        self.is_running = False
+        self.current_waypoint = 0
+        self.total_waypoints = 0
+        self.status_message = "Idle"
+
+    def to_dict(self) -> dict:
+        return {
+            "isRunning": self.is_running,
+            "currentWaypoint": self.current_waypoint,
+            "totalWaypoints": self.total_waypoints,
+            "statusMessage": self.status_message,
+        }
+
+
+class LinkHealth:
+    __slots__ = ("px4_connected", "connected_since")
+
+    def __init__(self):
+        self.px4_connected = False
+        self.connected_since = None
+
+    def to_dict(self) -> dict:
+        return {"px4Connected": self.px4_connected, "connectedSince": self.connected_since}
+
+
+class DroneRecord:
+    __slots__ = ("drone_id", "version", "mission", "link", "telemetry", "history", "_changed", "_telemetry_bumped_at")
+
+    def __init__(self, drone_id: str):
+        self.drone_id = drone_id
+        self.version = 0
+        self.mission = MissionRecord()
+        self.link = LinkHealth()
+        self.telemetry = None  # the drone's TelemetryCache, once attached
+        self.history = None  # the drone's TelemetryHistory, once attached
+        self._changed = asyncio.Event()
+        self._telemetry_bumped_at = float("-inf")
+
+    def bump(self):
+        """Records a change and wakes up anyone waiting on this drone."""
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def snapshot(self) -> dict:
+        telemetry = self.telemetry
+        return {
+            "droneId": self.drone_id,
+            "version": self.version,
+            "mission": self.mission.to_dict(),
+            "link": dict(self.link.to_dict(), telemetryAgeS=telemetry.last_update_age() if telemetry else None),
+            "telemetry": telemetry.snapshot() if telemetry else {},
+        }
+
+
+class StateStore:
+    """Typed per-drone state with versioned snapshots and change subscriptions."""
+
+    def __init__(self):
+        self._records = {}
+
+    def record(self, drone_id: str) -> DroneRecord:
+        """Returns the drone's record, creating it on first use."""
+        record = self._records.get(drone_id)
+        if record is None:
+            record = self._records[drone_id] = DroneRecord(drone_id)
+        return record
+
+    def drone_ids(self) -> list:
+        return list(self._records)
+
+    def attach_telemetry(self, drone_id: str, telemetry, min_interval_s: float = None):
+        """
+        Links the drone's TelemetryCache so snapshots include live telemetry. Its
+        updates bump the version at most once per `min_interval_s` (from
+        TELEMETRY_MAX_RATE_HZ by default), so a high-rate stream doesn't wake
+        every long-poller on each sample; the next sample after the interval does.
+        """
+        record = self.record(drone_id)
+        record.telemetry = telemetry
+        if min_interval_s is None:
+            min_interval_s = 1.0 / Config().TELEMETRY_MAX_RATE_HZ
+
+        def on_update(cache):
+            if record.telemetry is not cache:
+                return
+            now = time.monotonic()
+            if now - record._telemetry_bumped_at >= min_interval_s:
+                record._telemetry_bumped_at = now
+                record.bump()
+
+        telemetry.add_listener(on_update)
+
+    def attach_history(self, drone_id: str, history):
+        """Links the drone's TelemetryHistory ring buffer."""
+        self.record(drone_id).history = history
+
+    def update_mission(self, drone_id: str, **fields):
+        """Updates mission fields (is_running, current_waypoint, total_waypoints, status_message)."""
+        record = self.record(drone_id)
+        for key, value in fields.items():
+            setattr(record.mission, key, value)
+        record.bump()
+
+    def reset_mission(self, drone_id: str):
+        """Marks the drone's mission as finished, keeping its last status message."""
+        self.update_mission(drone_id, is_running=False, current_waypoint=0, total_waypoints=0)
+
+    def update_link(self, drone_id: str, px4_connected: bool):
+        """Records the flight controller link state."""
+        record = self.record(drone_id)
+        if record.link.px4_connected == px4_connected:
+            return
+        record.link.px4_connected = px4_connected
+        record.link.connected_since = time.time() if px4_connected else None
+        record.bump()
+
+    def snapshot(self, drone_id: str) -> dict:
+        return self.record(drone_id).snapshot()
+
+    async def changed(self, drone_id: str, since_version: int, timeout: float = None):
+        """
+        Waits until the drone's record is newer than `since_version` and returns its
+        snapshot. Returns None if `timeout` expires first.
+        """
+        record = self.record(drone_id)
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while record.version <= since_version:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(record._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+        return record.snapshot()
+
+
+# The process-wide store used when a component is not given its own
+store = StateStore()
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+
+class TelemetryCache:
+    """
+    Latest-value store for a single drone's telemetry.
+    The MAVSDK subscriber tasks write into it; publishers and the mission
+    manager read from it without awaiting gRPC.
+    """
+    __slots__ = ("drone_id", "version", "_values", "_stamps", "_updated", "_listeners")
+
+    def __init__(self, drone_id: str):
+        self.drone_id = drone_id
+        self.version = 0
+        self._values = {}
+        self._stamps = {}
+        self._updated = asyncio.Event()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Calls `callback(cache)` after every update; it must not block."""
+        self._listeners.append(callback)
+
+    def update(self, **fields):
+        """Stores the given fields and wakes up anyone waiting for new data."""
+        now = time.monotonic()
+        for key, value in fields.items():
+            self._values[key] = value
+            self._stamps[key] = now
+        self.version += 1
+        # Swap the event so late waiters block until the *next* update
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+        for callback in self._listeners:
+            callback(self)
+
+    def get(self, key, default=None):
+        """Returns the latest value for a field, or `default` if never received."""
+        return self._values.get(key, default)
+
+    def age(self, key) -> float:
+        """Seconds since the field was last updated (infinity if never)."""
+        stamp = self._stamps.get(key)
+        return float("inf") if stamp is None else time.monotonic() - stamp
+
+    def last_update_age(self) -> float:
+        """Seconds since any field was updated (infinity if nothing received yet)."""
+        if not self._stamps:
+            return float("inf")
+        return time.monotonic() - max(self._stamps.values())
+
+    def snapshot(self) -> dict:
+        """Returns a shallow copy of all latest values."""
+        return dict(self._values)
+
+    async def wait_for_update(self, timeout: float = None) -> bool:
+        """Waits until the next update arrives. Returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,98 @@
+import time
+from array import array
+
+
+class TelemetryHistory:
+    """
+    Fixed-capacity ring buffer of one drone's recent telemetry.
+    Each field is an array('d') column allocated once, so memory stays bounded
+    whatever the flight length; the oldest samples are overwritten first.
+    """
+    COLUMNS = ("t", "lat", "lng", "alt", "battery", "speed")
+
+    __slots__ = ("drone_id", "capacity", "min_interval_s", "columns", "_head", "_count")
+
+    def __init__(self, drone_id: str, capacity: int = 3000, min_interval_s: float = 0.2):
+        if capacity < 1:
+            raise ValueError(f"Telemetry history capacity must be at least 1, got {capacity}")
+        self.drone_id = drone_id
+        self.capacity = capacity
+        self.min_interval_s = min_interval_s
+        self.columns = {name: array('d', bytes(8 * capacity)) for name in self.COLUMNS}
+        self._head = 0  # next slot to write
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, index: int) -> int:
+        """Physical slot of the index-th oldest sample."""
+        return (self._head - self._count + index) % self.capacity
+
+    def append(self, t: float, lat: float, lng: float, alt: float, battery: float, speed: float) -> bool:
+        """Stores one sample. Samples closer than `min_interval_s` to the last one are dropped."""
+        times = self.columns["t"]
+        if self._count and t - times[self._slot(self._count - 1)] < self.min_interval_s:
+            return False
+        slot = self._head
+        for name, value in zip(self.COLUMNS, (t, lat, lng, alt, battery, speed)):
+            self.columns[name][slot] = value
+        self._head = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        return True
+
+    def record(self, telemetry, t: float = None) -> bool:
+        """Appends the latest values of a TelemetryCache (NaN for fields not received yet)."""
+        nan = float("nan")
+        get = telemetry.get
+        return self.append(
+            time.time() if t is None else t,
+            get("latitude_deg", nan),
+            get("longitude_deg", nan),
+            get("relative_altitude_m", nan),
+            get("battery_percent", nan),
+            get("ground_speed_m_s", nan),
+        )
+
+    def _first_index_since(self, since: float) -> int:
+        """Binary search for the oldest sample with t >= since."""
+        times = self.columns["t"]
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[self._slot(mid)] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, since: float = None) -> list:
+        """
+        Returns the samples with t >= since as at most two contiguous segments
+        (the buffer may wrap). Each segment maps column names to memoryviews into
+        the ring, so no data is copied; read them before the next append.
+        """
+        start = 0 if since is None else self._first_index_since(since)
+        if start >= self._count:
+            return []
+        first, last = self._slot(start), self._slot(self._count - 1) + 1
+        ranges = [(first, last)] if first < last else [(first, self.capacity), (0, last)]
+        views = {name: memoryview(column) for name, column in self.columns.items()}
+        return [{name: view[lo:hi] for name, view in views.items()} for lo, hi in ranges if hi > lo]
+
+    def to_dict(self, since: float = None, max_points: int = None) -> dict:
+        """Column-oriented copy of a window, optionally thinned to at most `max_points` (>= 1)."""
+        if max_points is not None and max_points < 1:
+            raise ValueError(f"max_points must be at least 1, got {max_points}")
+        out = {name: [] for name in self.COLUMNS}
+        for segment in self.window(since):
+            for name, view in segment.items():
+                # NaN marks fields not received yet; JSON has no NaN, so send null
+                out[name].extend(None if value != value else value for value in view.tolist())
+        count = len(out["t"])
+        if max_points and count > max_points:
+            step = -(-count // max_points)
+            out = {name: values[::step] for name, values in out.items()}
+        out["droneId"] = self.drone_id
+        out["count"] = len(out["t"])
+        return out
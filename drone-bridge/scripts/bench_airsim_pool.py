@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+AirSim call cost: a new client per call (the old weather update) vs AirSimPool.
+A fake AirSim client stands in for the simulator; connecting blocks for
+`connect_ms` and each RPC for `rpc_ms`. Also checks that no client is ever
+used by two threads at once.
+
+Usage: python scripts/bench_airsim_pool.py [connect_ms] [rpc_ms] [calls]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.services.airsim_pool import AirSimPool
+
+class FakeClient:
+    """Fake AirSim client that notices concurrent use."""
+    def __init__(self, connect_s, rpc_s):
+        self.connect_s = connect_s
+        self.rpc_s = rpc_s
+        self.owner = None
+        self.shared = False
+
+    def confirmConnection(self):
+        time.sleep(self.connect_s)
+
+    def simSetWeatherParameter(self, param, value):
+        me = threading.get_ident()
+        if self.owner not in (None, me):
+            self.shared = True
+        self.owner = me
+        time.sleep(self.rpc_s)
+
+async def main():
+    connect_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    rpc_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    calls = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    clients = []
+
+    def factory():
+        clients.append(FakeClient(connect_ms / 1000.0, rpc_ms / 1000.0))
+        return clients[-1]
+
+    loop = asyncio.get_running_loop()
+    print(f"AirSim connect {connect_ms:g} ms, RPC {rpc_ms:g} ms, {calls} calls")
+
+    def connect_and_call():
+        client = factory()
+        client.confirmConnection()
+        client.simSetWeatherParameter(0, 0.5)
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await loop.run_in_executor(None, connect_and_call)
+    elapsed = time.perf_counter() - started
+    print(f"{'new client per call':<22} {elapsed * 1000 / calls:7.2f} ms/call  clients {len(clients)}")
+
+    clients.clear()
+    pool = AirSimPool(size=2, client_factory=factory, timeout_s=5.0)
+    started = time.perf_counter()
+    for _ in range(calls):
+        await pool.call(lambda client: client.simSetWeatherParameter(0, 0.5))
+    elapsed = time.perf_counter() - started
+    print(f"{'AirSimPool sequential':<22} {elapsed * 1000 / calls:7.2f} ms/call  clients {len(clients)}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(pool.call(lambda client: client.simSetWeatherParameter(0, 0.5)) for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    print(f"{'AirSimPool concurrent':<22} {elapsed * 1000 / calls:7.2f} ms/call  clients {len(clients)}")
+    print(f"client shared between threads: {any(client.shared for client in clients)}")
+    print(pool.stats())
+    pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
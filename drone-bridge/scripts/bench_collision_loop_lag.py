@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Loop-lag comparison: polling AirSim collisions on the event loop vs CollisionService.
+A fake AirSim client stands in for the simulator; each RPC blocks for
+`rpc_ms` like a msgpack-RPC round trip. LoopLagMonitor measures how late the
+loop wakes up while each variant runs.
+
+Usage: python scripts/bench_collision_loop_lag.py [rpc_ms] [seconds]
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.loop_monitor import LoopLagMonitor
+from drone.services.collision_service import CollisionService
+
+class BlockingFakeClient:
+    """Fake AirSim client whose calls block like a real RPC round trip."""
+    def __init__(self, rpc_s):
+        self.rpc_s = rpc_s
+
+    def confirmConnection(self):
+        pass
+
+    def simGetCollisionInfo(self, vehicle_name=""):
+        time.sleep(self.rpc_s)
+        return SimpleNamespace(has_collided=False, object_name="")
+
+async def inline_poll(client):
+    # What CollisionService.watch used to do: the RPC runs on the loop
+    while True:
+        client.simGetCollisionInfo()
+        await asyncio.sleep(0.1)
+
+async def measure(watcher, seconds):
+    monitor = LoopLagMonitor(interval_s=0.01, warn_ms=float("inf"))
+    tasks = [asyncio.create_task(monitor.run()), asyncio.create_task(watcher)]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return monitor.stats()
+
+async def main():
+    rpc_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    client = BlockingFakeClient(rpc_ms / 1000.0)
+    service = CollisionService(client_factory=lambda: client, is_landed=lambda: False)
+    print(f"AirSim RPC {rpc_ms:g} ms, polled every 100 ms, {seconds:g}s per run")
+    for name, watcher in (("on the event loop", inline_poll(client)), ("CollisionService", service.watch())):
+        stats = await measure(watcher, seconds)
+        print(f"{name:<18} loop lag mean {stats['meanMs']:6.2f} ms  p99 {stats['p99Ms']:6.2f} ms  max {stats['maxMs']:6.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
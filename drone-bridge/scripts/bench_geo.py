@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: scalar haversine_m loop vs the vectorized utils.geo functions.
+Computes all 10k x 10k distances between two random point sets around Zurich
+(in row chunks, reporting each point's nearest neighbour) and checks accuracy.
+The scalar time is measured on a sample and extrapolated.
+
+Usage: python scripts/bench_geo.py [points] [chunk_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.geo import (haversine_m, haversine_np, haversine_matrix, equirectangular_m,
+                       geodetic_to_enu, enu_to_geodetic, destination_point, bearing_deg)
+
+def random_points(rng, count, spread_deg=0.05):
+    return 47.3977 + rng.uniform(-spread_deg, spread_deg, count), 8.5456 + rng.uniform(-spread_deg, spread_deg, count)
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 250
+    rng = np.random.default_rng(0)
+    lats1, lons1 = random_points(rng, points)
+    lats2, lons2 = random_points(rng, points)
+
+    # Scalar reference on a sample of pairs
+    sample = 200000
+    i, j = rng.integers(0, points, sample), rng.integers(0, points, sample)
+    a_lat, a_lon, b_lat, b_lon = (arr.tolist() for arr in (lats1[i], lons1[i], lats2[j], lons2[j]))
+    started = time.perf_counter()
+    scalar = [haversine_m(a_lat[k], a_lon[k], b_lat[k], b_lon[k]) for k in range(sample)]
+    scalar_per_pair = (time.perf_counter() - started) / sample
+
+    started = time.perf_counter()
+    nearest = np.empty(points)
+    for row in range(0, points, chunk):
+        nearest[row:row + chunk] = haversine_matrix(lats1[row:row + chunk], lons1[row:row + chunk], lats2, lons2).min(axis=1)
+    vector_seconds = time.perf_counter() - started
+
+    pairs = points * points
+    vector = haversine_np(lats1[i], lons1[i], lats2[j], lons2[j])
+    error = np.abs(vector - np.asarray(scalar)).max()
+    flat_error = np.abs(equirectangular_m(lats1[i], lons1[i], lats2[j], lons2[j]) - vector).max()
+
+    east, north, up = geodetic_to_enu(lats1, lons1, 20.0, 47.3977, 8.5456, 0.0)
+    back_lat, back_lon, back_alt = enu_to_geodetic(east, north, up, 47.3977, 8.5456, 0.0)
+    roundtrip = max(np.abs(back_lat - lats1).max() * 111320, np.abs(back_alt - 20.0).max())
+    dest_lat, dest_lon = destination_point(lats1, lons1, bearing_deg(lats1, lons1, lats2, lons2), haversine_np(lats1, lons1, lats2, lons2))
+    dest_error = haversine_np(dest_lat, dest_lon, lats2, lons2).max()
+
+    print(f"{points} x {points} = {pairs / 1e6:.0f}M distances")
+    print(f"scalar haversine_m : {scalar_per_pair * 1e9:8.1f} ns/pair -> {scalar_per_pair * pairs:8.1f} s (extrapolated)")
+    print(f"haversine_matrix   : {vector_seconds / pairs * 1e9:8.1f} ns/pair -> {vector_seconds:8.1f} s (speedup x{scalar_per_pair * pairs / vector_seconds:.0f})")
+    print(f"max |vectorized - scalar|      : {error:.2e} m")
+    print(f"max |equirectangular - haversine| over ~8 km: {flat_error:.3f} m")
+    print(f"ENU round trip error           : {roundtrip:.2e} m")
+    print(f"destination(bearing, distance) : {dest_error:.2e} m from target")
+    print(f"mean nearest-neighbour distance: {nearest.mean():.1f} m")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: cost of one fixed-step update of the kinematic simulator.
+Puts every drone in flight towards a random waypoint, then times step().
+
+Usage: python scripts/bench_kinematic_sim.py [drones] [steps]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.simulator import KinematicFleet, SimulatedSystem
+
+async def fly_all(systems, rng):
+    for system in systems:
+        await system.action.arm()
+        await system.action.set_takeoff_altitude(15.0)
+        await system.action.goto_location(47.3977 + rng.uniform(-0.01, 0.01), 8.5456 + rng.uniform(-0.01, 0.01), 20.0, 0)
+
+def main():
+    drones = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    fleet = KinematicFleet(step_s=0.05)
+    systems = [SimulatedSystem(fleet, f"SIM-{i:04d}", 47.3977, 8.5456) for i in range(drones)]
+    asyncio.run(fly_all(systems, np.random.default_rng(0)))
+
+    started = time.perf_counter()
+    for _ in range(steps):
+        fleet.step(fleet.step_s)
+    per_step = (time.perf_counter() - started) / steps
+
+    print(f"{drones} drones, {steps} steps of {fleet.step_s}s")
+    print(f"step: {per_step * 1e6:.1f} us ({per_step / drones * 1e9:.1f} ns per drone)")
+    print(f"real-time factor: x{fleet.step_s / per_step:.0f} (simulated seconds per wall second, one core)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+QR scanning on camera frames: candidate crops vs decoding the whole frame, and
+an end-to-end QRScanner run against a fake camera whose QR code comes into view
+after `appear_s` seconds, with the event-loop lag measured meanwhile.
+
+Usage: python scripts/bench_qr_scan.py [width] [height] [appear_s]
+"""
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import qrcode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from drone.loop_monitor import LoopLagMonitor
+from drone.services.qr_scanner import QRScanner, scan_frame, decode
+
+def make_frame(width, height, text=None, rng=None):
+    """Blurred noise standing in for the ground, with the QR code pasted on it."""
+    rng = rng or np.random.default_rng(1)
+    frame = cv2.GaussianBlur(rng.integers(60, 200, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    if text is not None:
+        code = np.array(qrcode.make(text).convert("RGB"))
+        side = height // 4
+        code = cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST)
+        x, y = int(width * 0.6), int(height * 0.55)
+        frame[y:y + side, x:x + side] = code
+    return frame
+
+class FakeCamera:
+    """Serves a new frame on every call; the QR code shows up after `appear_s`."""
+    def __init__(self, empty, with_code, appear_s):
+        self.empty, self.with_code = empty, with_code
+        self.appear_at = time.monotonic() + appear_s
+
+    async def get_frame(self, camera_type, max_age=None):
+        await asyncio.sleep(0.01)
+        rgb = self.with_code if time.monotonic() >= self.appear_at else self.empty
+        return SimpleNamespace(rgb=rgb)
+
+def timed(fn, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / repeat, result
+
+async def end_to_end(frame_empty, frame_code, appear_s):
+    scanner = QRScanner(FakeCamera(frame_empty, frame_code, appear_s), max_fps=10)
+    monitor = LoopLagMonitor(interval_s=0.01, warn_ms=float("inf"))
+    lag = asyncio.create_task(monitor.run())
+    result = await scanner.scan_for("ORDER-42", timeout_s=appear_s + 10)
+    lag.cancel()
+    scanner.close()
+    return result, monitor.stats()
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1280
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    appear_s = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    text = f"{Config().QR_TEXT_PREFIX}ORDER-42"
+    frame_code, frame_empty = make_frame(width, height, text), make_frame(width, height)
+    gray = cv2.cvtColor(frame_code, cv2.COLOR_RGB2GRAY)
+
+    print(f"{width}x{height} frames")
+    ms, found = timed(lambda: [s.data.decode() for s in decode(gray)])
+    print(f"{'full frame':<20} {ms:7.1f} ms/frame  found {text in found}")
+    ms, (found, candidates) = timed(lambda: scan_frame(frame_code, expected=text))
+    print(f"{'candidate crops':<20} {ms:7.1f} ms/frame  found {text in found}  ({candidates} candidates)")
+    ms, (found, candidates) = timed(lambda: scan_frame(frame_empty))
+    print(f"{'no code in view':<20} {ms:7.1f} ms/frame  ({candidates} candidates)")
+
+    result, lag = asyncio.run(end_to_end(frame_empty, frame_code, appear_s))
+    print(f"QRScanner: found {result['ok']} after {result['elapsedMs']} ms (code visible after {appear_s * 1000:.0f} ms), "
+          f"{result['framesScanned']} frames scanned, {result['framesSkipped']} skipped")
+    print(f"loop lag meanwhile: mean {lag['meanMs']} ms  p99 {lag['p99Ms']} ms  max {lag['maxMs']} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: grid-bucket SpatialIndex vs an O(N^2) scan for fleet proximity.
+Places N drones at random over a ~5 x 6 km area and times the queries the
+separation monitor and the /nearby endpoint make.
+
+Usage: python scripts/bench_spatial_index.py [drones] [separation_m]
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.spatial_index import SpatialIndex
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+def main():
+    drones = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    separation = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+    random.seed(0)
+    index = SpatialIndex(cell_m=50.0)
+    ids = [f"D{i:05d}" for i in range(drones)]
+    _, insert_s = timed(lambda: [index.update(d, 47.3977 + random.uniform(-0.025, 0.025),
+                                              8.5456 + random.uniform(-0.04, 0.04), random.uniform(10, 60)) for d in ids])
+    points = {d: index.position(d) for d in ids}
+
+    def brute_pairs():
+        return [(a, b) for i, a in enumerate(ids) for b in ids[i + 1:] if math.dist(points[a], points[b]) <= separation]
+
+    brute, brute_s = timed(brute_pairs)
+    grid, grid_s = timed(lambda: index.pairs_within(separation), repeat=5)
+    _, nearest_s = timed(lambda: index.nearest(ids[0], 1), repeat=1000)
+    _, radius_s = timed(lambda: index.neighbours(ids[0], 50.0), repeat=1000)
+
+    print(f"{drones} drones, separation {separation} m, {len(grid)} close pairs (brute force found {len(brute)})")
+    print(f"insert/move all     : {insert_s * 1e3:8.2f} ms")
+    print(f"O(N^2) pair scan    : {brute_s * 1e3:8.2f} ms")
+    print(f"grid pairs_within   : {grid_s * 1e3:8.2f} ms (x{brute_s / grid_s:.0f})")
+    print(f"nearest neighbour   : {nearest_s * 1e6:8.2f} us")
+    print(f"radius query (50 m) : {radius_s * 1e6:8.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON vs compact binary telemetry frames.
+Compares encode cost and frame size for a full telemetry payload.
+
+Usage: python scripts/bench_telemetry_codec.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drone.communication.codec import JsonCodec, TelemetryStructCodec, decode_telemetry
+
+SAMPLE = {
+    "type": "drone_telemetry",
+    "payload": {
+        "droneId": "DRONE-001",
+        "latitude_deg": 47.397742,
+        "longitude_deg": 8.545594,
+        "absolute_altitude_m": 503.412,
+        "relative_altitude_m": 15.027,
+        "battery_percent": 87.4,
+        "battery_voltage_v": 12.31,
+        "velocity_north_m_s": 4.12,
+        "velocity_east_m_s": -1.37,
+        "velocity_down_m_s": 0.02,
+        "ground_speed_m_s": 4.34,
+        "heading_deg": 341.5,
+        "flight_mode": "MISSION",
+        "armed": True,
+        "in_air": True,
+        "landed_state": "IN_AIR",
+        "is_global_position_ok": True,
+        "is_home_position_ok": True,
+        "is_armable": True,
+    },
+}
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    results = []
+    for codec in (JsonCodec(), TelemetryStructCodec()):
+        frame = codec.encode(SAMPLE)
+        size = len(frame.encode("utf-8") if isinstance(frame, str) else frame)
+        seconds = timeit.timeit(lambda: codec.encode(SAMPLE), number=iterations)
+        results.append((codec.subprotocol, size, seconds / iterations * 1e6))
+
+    binary = TelemetryStructCodec().encode(SAMPLE)
+    decode_us = timeit.timeit(lambda: decode_telemetry(binary), number=iterations) / iterations * 1e6
+
+    print(f"{'encoding':<28}{'bytes':>8}{'encode us':>12}")
+    for name, size, encode_us in results:
+        print(f"{name:<28}{size:>8}{encode_us:>12.2f}")
+    json_size, binary_size = results[0][1], results[1][1]
+    print(f"\nbinary frame is {binary_size / json_size:.0%} of the JSON frame, "
+          f"encode speedup x{results[0][2] / results[1][2]:.1f}, decode {decode_us:.2f} us")
+
+if __name__ == "__main__":
+    main()
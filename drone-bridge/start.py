@@ -4,7 +4,32 @@ from config.config import Config
 from drone.mavsdk_client import MAVSDKClient
 from drone.mission_manager import MissionManager
 from drone.communication.ws_client import WebSocketClient
+from drone.communication.telemetry_batcher import TelemetryBatcher
 from drone.communication.enhanced_http_server import EnhancedHTTPServer
+from drone.fleet import FleetRunner, load_fleet_config
+from drone.fleet_supervisor import FleetSupervisor
+from drone.replay import replayer_from_config
+from drone.loop_monitor import LoopLagMonitor
+
+async def run_replay(config: Config):
+    """Replays the configured flight log through the normal WebSocket path."""
+    ws_client = WebSocketClient(uri=config.BACKEND_WS_URL)
+    # At max speed every frame goes out on its own; a batcher would merge them per tick
+    use_batcher = config.TELEMETRY_BATCH_INTERVAL_S > 0 and config.REPLAY_SPEED > 0
+    batcher = TelemetryBatcher(ws_client) if use_batcher else None
+    background = [asyncio.create_task(ws_client.connect())]
+    if batcher:
+        background.append(asyncio.create_task(batcher.run()))
+    try:
+        await replayer_from_config(ws_client, batcher, config).run()
+        try:
+            await asyncio.wait_for(ws_client.wait_drained(), timeout=config.REPLAY_DRAIN_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            logging.warning(f"Replay finished with {ws_client.queue_depth()} messages still undelivered "
+                            f"after waiting {config.REPLAY_DRAIN_TIMEOUT_S:g}s for the backend.")
+    finally:
+        for task in background:
+            task.cancel()
 
 async def main():
     """
@@ -17,34 +42,90 @@ async def main():
     # 2. Load configuration
     config = Config()
     
+    #    Fleet mode: host every drone from the fleet file in this one process
+    #    and, with FLEET_SHARDS > 1, spread the drones across worker processes
+    if config.FLEET_CONFIG_FILE:
+        drones = load_fleet_config(config.FLEET_CONFIG_FILE)
+        if config.FLEET_SHARDS > 1:
+            await FleetSupervisor(drones, config.FLEET_SHARDS, config).run()
+        else:
+            await FleetRunner(drones, config).run()
+        return
+    
+    #    Replay mode: stream a recorded flight as REPLAY_DRONES synthetic drones,
+    #    without PX4, to load-test the backend
+    if config.REPLAY_FLIGHT_FILE:
+        await run_replay(config)
+        return
+    
     # 3. Initialize the WebSocket client to connect to the Node.js backend
     ws_client = WebSocketClient(uri=config.BACKEND_WS_URL)
     
+    #    Optionally batch telemetry frames (one frame per tick for all drones)
+    batcher = TelemetryBatcher(ws_client) if config.TELEMETRY_BATCH_INTERVAL_S > 0 else None
+    
     # 4. Initialize the MAVSDK client to connect to the drone
     mavsdk_client = MAVSDKClient(
         mavsdk_server_address=config.MAVSDK_SERVER_ADDRESS,
-        ws_client=ws_client
+        ws_client=ws_client,
+        drone_id=config.DRONE_ID,
+        telemetry_sink=batcher
     )
     
     # 5. Connect to the drone
     await mavsdk_client.connect()
     
-    # 6. Initialize the Mission Manager, passing it the drone object and the ws_client
-    mission_manager = MissionManager(drone=mavsdk_client.drone, ws_client=ws_client)
+    # 6. Initialize the Mission Manager, passing it the drone object, the ws_client
+    #    and the telemetry cache fed by the MAVSDK subscribers
+    mission_manager = MissionManager(
+        drone=mavsdk_client.drone,
+        ws_client=ws_client,
+        telemetry=mavsdk_client.telemetry,
+        recorder=mavsdk_client.recorder
+    )
     
     # 7. Initialize the HTTP Server to listen for commands from the backend
+    #    (GET /api/v1/status/loop reports event-loop lag)
+    #    (GET /api/v1/camera/{type}/stream serves live MJPEG when CAMERA_STREAM_ENABLED)
+    #    (POST /api/v1/delivery/scan looks for the order's QR code when QR_SCAN_ENABLED)
+    loop_monitor = LoopLagMonitor()
+    camera = camera_streams = qr_scanner = None
+    if config.CAMERA_STREAM_ENABLED or config.QR_SCAN_ENABLED:
+        from drone.services.camera_service import CameraService
+        from drone.services.airsim_pool import shared_pool
+        camera = CameraService(None, pool=shared_pool())
+    if config.CAMERA_STREAM_ENABLED:
+        from drone.services.camera_stream import CameraStreamHub
+        camera_streams = CameraStreamHub(camera)
+    if config.QR_SCAN_ENABLED:
+        from drone.services.qr_scanner import QRScanner
+        qr_scanner = QRScanner(camera)
     http_server = EnhancedHTTPServer(
         host=config.HTTP_HOST,
         port=config.HTTP_PORT,
-        mission_manager=mission_manager
+        mission_manager=mission_manager,
+        loop_monitor=loop_monitor,
+        camera_streams=camera_streams,
+        qr_scanner=qr_scanner
     )
     
     # 8. Start all services to run concurrently
     logging.info("Starting all services...")
-    await asyncio.gather(
+    services = [
         ws_client.connect(),      # Task to maintain WebSocket connection
-        http_server.start()       # Task to run the HTTP command server
-    )
+        http_server.start(),      # Task to run the HTTP command server
+        loop_monitor.run()        # Task to measure event-loop lag
+    ]
+    if batcher:
+        services.append(batcher.run())  # Task to flush batched telemetry frames
+    try:
+        await asyncio.gather(*services)
+    finally:
+        # Stop the QR decode threads, background capture uploads and encode threads
+        if qr_scanner is not None:
+            qr_scanner.close()
+        if camera is not None:
+            await camera.close()
 
 if __name__ == "__main__":
     try:
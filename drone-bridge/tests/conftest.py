@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Unit tests import the bridge packages (config, drone, utils) from the drone-bridge directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,92 @@
+"""Content-addressed capture store: naming, eviction and pins."""
+import hashlib
+import os
+import time
+
+from drone.services.capture_store import CaptureStore
+
+
+def jpeg(n, size=100):
+    return bytes([n % 256]) * size
+
+
+def test_put_names_captures_by_content(tmp_path):
+    store = CaptureStore(str(tmp_path))
+    digest, path = store.put(jpeg(1))
+    assert digest == hashlib.sha256(jpeg(1)).hexdigest()
+    assert path == os.path.join(str(tmp_path), digest[:2], digest[2:4], f"{digest}.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == jpeg(1)
+    assert store.put(jpeg(1)) == (digest, path)
+    assert store.stats()["captures"] == 1
+    assert store.stats()["bytes"] == 100
+
+
+def test_oldest_captures_are_evicted_over_the_size_budget(tmp_path):
+    store = CaptureStore(str(tmp_path), max_bytes=350)
+    paths = [store.put(jpeg(n))[1] for n in range(5)]
+    assert [os.path.exists(p) for p in paths] == [False, False, True, True, True]
+    assert store.stats()["bytes"] == 300
+    assert store.evicted == 2
+
+
+def test_storing_again_refreshes_a_capture(tmp_path):
+    store = CaptureStore(str(tmp_path), max_bytes=350)
+    first = store.put(jpeg(0))[1]
+    store.put(jpeg(1))
+    store.put(jpeg(2))
+    store.put(jpeg(0))  # now the newest
+    second = store.put(jpeg(3))
+    assert os.path.exists(first)
+    assert os.path.exists(second[1])
+    assert store.stats()["captures"] == 3
+
+
+def test_pinned_captures_are_kept_until_unpinned(tmp_path):
+    store = CaptureStore(str(tmp_path), max_bytes=250)
+    pinned_digest, pinned = store.put(jpeg(0), pin=True)
+    for n in range(1, 5):
+        store.put(jpeg(n))
+    assert os.path.exists(pinned)
+    assert store.stats()["pinned"] == 1
+
+    store.unpin(pinned_digest)
+    assert store.stats()["pinned"] == 0
+    store.put(jpeg(5))
+    assert not os.path.exists(pinned)
+
+
+def test_pins_are_counted(tmp_path):
+    store = CaptureStore(str(tmp_path), max_bytes=150)
+    digest, path = store.put(jpeg(0), pin=True)
+    store.put(jpeg(0), pin=True)
+    store.unpin(digest)
+    store.put(jpeg(1))
+    assert os.path.exists(path)
+    store.unpin(digest)
+    store.put(jpeg(2))
+    assert not os.path.exists(path)
+
+
+def test_captures_past_the_maximum_age_are_evicted(tmp_path):
+    store = CaptureStore(str(tmp_path), max_age_s=60)
+    _, old = store.put(jpeg(0))
+    _, fresh = store.put(jpeg(1))
+    store._entries[next(iter(store._entries))] = (100, time.time() - 120)
+    assert store.evict() == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+
+
+def test_reload_indexes_existing_captures_and_drops_temp_files(tmp_path):
+    store = CaptureStore(str(tmp_path))
+    digest, path = store.put(jpeg(0))
+    leftover = f"{path}.1234.tmp"
+    with open(leftover, "wb") as f:
+        f.write(b"partial")
+
+    reloaded = CaptureStore(str(tmp_path))
+    assert not os.path.exists(leftover)
+    assert reloaded.stats()["captures"] == 1
+    assert reloaded.stats()["bytes"] == 100
+    assert reloaded.put(jpeg(0)) == (digest, path)
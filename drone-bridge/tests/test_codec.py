@@ -0,0 +1,95 @@
+"""Wire encodings for backend messages, in particular the binary telemetry frames."""
+import json
+import math
+
+import pytest
+
+from drone.communication.codec import (
+    JsonCodec, TelemetryStructCodec, codec_for, decode_telemetry, encode_telemetry,
+    offered_subprotocols, SUBPROTOCOL_JSON, SUBPROTOCOL_TELEMETRY_V1,
+)
+
+FULL = {
+    "droneId": "Drone1", "latitude_deg": 47.641468, "longitude_deg": -122.140165,
+    "absolute_altitude_m": 120.5, "relative_altitude_m": 20.25, "battery_percent": 87.5,
+    "battery_voltage_v": 15.75, "velocity_north_m_s": 1.5, "velocity_east_m_s": -2.25,
+    "velocity_down_m_s": 0.0, "ground_speed_m_s": 2.75, "heading_deg": 270.0,
+    "flight_mode": "MISSION", "armed": True, "in_air": True, "landed_state": "IN_AIR",
+    "is_global_position_ok": True, "is_home_position_ok": False, "is_armable": True,
+}
+
+
+def test_full_payload_round_trip():
+    decoded = decode_telemetry(encode_telemetry(FULL))
+    assert decoded.keys() == FULL.keys()
+    for key, value in FULL.items():
+        if isinstance(value, float):
+            assert decoded[key] == pytest.approx(value, rel=1e-6), key
+        else:
+            assert decoded[key] == value, key
+
+
+def test_coordinates_keep_float64_precision():
+    decoded = decode_telemetry(encode_telemetry(FULL))
+    assert decoded["latitude_deg"] == FULL["latitude_deg"]
+    assert decoded["longitude_deg"] == FULL["longitude_deg"]
+
+
+def test_missing_fields_stay_missing():
+    decoded = decode_telemetry(encode_telemetry({"droneId": "Drone2", "latitude_deg": 1.0}))
+    assert decoded == {"droneId": "Drone2", "latitude_deg": 1.0, "flight_mode": "UNKNOWN"}
+
+
+def test_nan_and_none_are_omitted():
+    payload = dict(FULL, battery_percent=float("nan"), heading_deg=None)
+    decoded = decode_telemetry(encode_telemetry(payload))
+    assert "battery_percent" not in decoded
+    assert "heading_deg" not in decoded
+    assert not any(isinstance(v, float) and math.isnan(v) for v in decoded.values())
+
+
+def test_false_flags_are_kept_apart_from_unknown():
+    decoded = decode_telemetry(encode_telemetry({"droneId": "D", "armed": False, "in_air": False}))
+    assert decoded["armed"] is False
+    assert decoded["in_air"] is False
+    assert "is_armable" not in decoded
+
+
+def test_enum_names_and_unknown_modes():
+    decoded = decode_telemetry(encode_telemetry({"droneId": "D", "flight_mode": "FlightMode.HOLD",
+                                                 "landed_state": "LandedState.ON_GROUND"}))
+    assert decoded["flight_mode"] == "HOLD"
+    assert decoded["landed_state"] == "ON_GROUND"
+    decoded = decode_telemetry(encode_telemetry({"droneId": "D", "flight_mode": "SOMETHING_NEW"}))
+    assert decoded["flight_mode"] == "UNKNOWN"
+
+
+def test_frame_without_landed_state_byte():
+    frame = encode_telemetry(FULL)[:-1]
+    decoded = decode_telemetry(frame)
+    assert "landed_state" not in decoded
+    assert decoded["in_air"] is True
+
+
+def test_unsupported_version_is_rejected():
+    frame = bytearray(encode_telemetry(FULL))
+    frame[0] = 2
+    with pytest.raises(ValueError):
+        decode_telemetry(bytes(frame))
+
+
+def test_struct_codec_falls_back_to_json():
+    codec = TelemetryStructCodec()
+    assert isinstance(codec.encode({"type": "drone_telemetry", "payload": FULL}), bytes)
+    extra = {"type": "drone_telemetry", "payload": dict(FULL, note="not in the layout")}
+    assert json.loads(codec.encode(extra)) == extra
+    mission = {"type": "mission_update", "payload": {"status": "started"}}
+    assert json.loads(codec.encode(mission)) == mission
+
+
+def test_negotiation():
+    assert isinstance(codec_for(None), JsonCodec)
+    assert codec_for(SUBPROTOCOL_TELEMETRY_V1).subprotocol == SUBPROTOCOL_TELEMETRY_V1
+    assert codec_for("unknown").subprotocol == SUBPROTOCOL_JSON
+    assert offered_subprotocols("json") == []
+    assert offered_subprotocols("binary") == [SUBPROTOCOL_TELEMETRY_V1, SUBPROTOCOL_JSON]
@@ -0,0 +1,114 @@
+"""Binary flight log: recording, flushing and reading back."""
+import asyncio
+import glob
+import os
+
+import pytest
+
+from drone.flight_recorder import FlightLog, FlightRecorder, HEADER_SIZE, RECORD
+
+
+def sample(t, armed=True, **fields):
+    return dict({"latitude_deg": 47.0 + t * 1e-5, "longitude_deg": 8.0, "relative_altitude_m": 10.0 + t,
+                 "battery_percent": 90.0, "flight_mode": "MISSION", "armed": armed, "in_air": True,
+                 "landed_state": "IN_AIR"}, **fields)
+
+
+def flights(directory):
+    return sorted(glob.glob(os.path.join(str(directory), "*.flight")))
+
+
+def test_records_read_back(tmp_path):
+    recorder = FlightRecorder("Drone1", str(tmp_path))
+    for t in range(5):
+        recorder.record_telemetry(sample(t), t=1000.0 + t)
+    recorder.record_event({"status": "HEADING_TO_WAYPOINT", "currentWaypoint": 2, "totalWaypoints": 3}, t=1005.0)
+    asyncio.run(recorder.flush())
+    recorder._close_file()
+
+    [path] = flights(tmp_path)
+    with FlightLog(path) as log:
+        assert log.drone_id == "Drone1"
+        assert log.started_at == 1000.0
+        assert len(log) == 6
+        records = list(log.records())
+    first = records[0]
+    assert first["kind"] == "telemetry"
+    assert first["t"] == 1000.0
+    assert first["latitude_deg"] == 47.0
+    assert first["relative_altitude_m"] == 10.0
+    assert first["flight_mode"] == "MISSION"
+    assert first["landed_state"] == "IN_AIR"
+    assert first["armed"] is True and first["in_air"] is True
+    assert "heading_deg" not in first
+    event = records[-1]
+    assert event == {"t": 1005.0, "kind": "event", "status": "HEADING_TO_WAYPOINT",
+                     "currentWaypoint": 2, "totalWaypoints": 3, "progress": None}
+
+
+def test_time_range_queries(tmp_path):
+    recorder = FlightRecorder("Drone1", str(tmp_path))
+    for t in range(100):
+        recorder.record_telemetry(sample(t), t=float(t))
+    asyncio.run(recorder.flush())
+    recorder._close_file()
+
+    with FlightLog(flights(tmp_path)[0]) as log:
+        assert log.index_at(-1.0) == 0
+        assert log.index_at(42.5) == 43
+        assert log.index_at(1000.0) == 100
+        assert [r["t"] for r in log.records(10.0, 13.0)] == [10.0, 11.0, 12.0]
+        assert len(list(log.raw(start=95.0))) == 5
+
+
+def test_each_arming_starts_a_new_flight(tmp_path):
+    recorder = FlightRecorder("Drone1", str(tmp_path))
+    recorder.record_telemetry(sample(0, armed=True), t=1.0)
+    recorder.record_telemetry(sample(1, armed=False), t=2.0)
+    recorder.record_telemetry(sample(2, armed=True), t=3.0)
+    asyncio.run(recorder.flush())
+    recorder._close_file()
+
+    paths = flights(tmp_path)
+    assert len(paths) == 2
+    with FlightLog(paths[1]) as log:
+        assert [r["t"] for r in log.records()] == [3.0]
+
+
+def test_log_cut_short_is_read_up_to_the_last_complete_record(tmp_path):
+    recorder = FlightRecorder("Drone1", str(tmp_path))
+    for t in range(3):
+        recorder.record_telemetry(sample(t), t=float(t))
+    asyncio.run(recorder.flush())
+    recorder._close_file()
+    [path] = flights(tmp_path)
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE + 2 * RECORD.size + 10)
+
+    with FlightLog(path) as log:
+        assert len(log) == 2
+        assert [r["t"] for r in log.records()] == [0.0, 1.0]
+
+
+def test_cancelled_run_writes_the_remainder(tmp_path):
+    async def run():
+        recorder = FlightRecorder("Drone1", str(tmp_path), flush_interval_s=60)
+        task = asyncio.create_task(recorder.run())
+        recorder.record_telemetry(sample(0), t=1.0)
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return recorder
+
+    recorder = asyncio.run(run())
+    assert recorder._file is None
+    with FlightLog(flights(tmp_path)[0]) as log:
+        assert len(log) == 1
+
+
+def test_not_a_flight_log(tmp_path):
+    path = tmp_path / "bogus.flight"
+    path.write_bytes(b"\0" * 256)
+    with pytest.raises(ValueError):
+        FlightLog(str(path))
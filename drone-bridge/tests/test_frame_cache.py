@@ -0,0 +1,93 @@
+"""Latest-frame cache shared between captures and live streams."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from drone.services.frame_cache import FrameCache
+
+
+def response(width=4, height=3):
+    return SimpleNamespace(image_data_uint8=bytes(width * height * 3), width=width, height=height)
+
+
+class CountingFetch:
+    """Stands in for the AirSim round trip, counting calls and the cameras asked for."""
+    def __init__(self, delay=0.01, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, camera_types):
+        self.calls.append(list(camera_types))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise Exception("AirSim down")
+        return [response() for _ in camera_types]
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def run():
+        cache, fetch = FrameCache(ttl_s=1.0), CountingFetch()
+        results = await asyncio.gather(*(cache.get(["front"], fetch) for _ in range(5)))
+        return cache, fetch, results
+
+    cache, fetch, results = asyncio.run(run())
+    assert fetch.calls == [["front"]]
+    assert all(frames[0] is results[0][0] for frames in results)
+    assert cache.misses == 1 and cache.hits == 4
+
+
+def test_only_missing_cameras_are_fetched():
+    async def run():
+        cache, fetch = FrameCache(ttl_s=1.0), CountingFetch()
+        await cache.get(["front"], fetch)
+        frames = await cache.get(["front", "bottom"], fetch)
+        return fetch, frames
+
+    fetch, frames = asyncio.run(run())
+    assert fetch.calls == [["front"], ["bottom"]]
+    assert [frame.camera_type for frame in frames] == ["front", "bottom"]
+    assert frames[0].rgb.shape == (3, 4, 3)
+
+
+def test_frames_older_than_max_age_are_fetched_again():
+    async def run():
+        cache, fetch = FrameCache(ttl_s=1.0), CountingFetch(delay=0)
+        await cache.get(["front"], fetch)
+        await cache.get(["front"], fetch)
+        await asyncio.sleep(0.02)
+        await cache.get(["front"], fetch, max_age=0.01)
+        return fetch
+
+    assert len(asyncio.run(run()).calls) == 2
+
+
+def test_waiters_of_a_failed_fetch_get_an_error():
+    async def run():
+        cache, fetch = FrameCache(ttl_s=1.0), CountingFetch(fail=True)
+        results = await asyncio.gather(cache.get(["front"], fetch), cache.get(["front"], fetch), return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert all(isinstance(result, Exception) for result in results)
+    assert not cache._inflight
+
+
+def test_jpeg_is_encoded_once_per_quality():
+    async def run():
+        return (await FrameCache(ttl_s=1.0).get(["front"], CountingFetch()))[0]
+
+    frame = asyncio.run(run())
+    encodes = []
+
+    def encode(img, quality):
+        encodes.append(quality)
+        return b"jpeg-%d" % quality
+
+    assert frame.jpeg(80, encode) == b"jpeg-80"
+    assert frame.jpeg(80, encode) == b"jpeg-80"
+    assert frame.jpeg(50, encode) == b"jpeg-50"
+    assert encodes == [80, 50]
@@ -0,0 +1,43 @@
+"""Scalar and vectorized geodesy helpers."""
+import numpy as np
+import pytest
+
+from utils.geo import (
+    bearing_deg, destination_point, enu_to_geodetic, equirectangular_m, geodetic_to_enu,
+    haversine_m, haversine_matrix, haversine_np,
+)
+
+LATS = np.array([47.6414, 47.6420, 47.6500, -33.86, 0.0])
+LNGS = np.array([-122.1401, -122.1390, -122.1000, 151.21, 179.999])
+
+
+def test_vectorized_haversine_matches_the_scalar_one():
+    expected = [haversine_m(LATS[0], LNGS[0], lat, lng) for lat, lng in zip(LATS, LNGS)]
+    assert haversine_np(LATS[0], LNGS[0], LATS, LNGS) == pytest.approx(expected, rel=1e-12, abs=1e-9)
+
+
+def test_matrix_is_symmetric_with_a_zero_diagonal():
+    matrix = haversine_matrix(LATS, LNGS, LATS, LNGS)
+    assert matrix.shape == (5, 5)
+    assert np.allclose(matrix, matrix.T)
+    assert np.allclose(np.diag(matrix), 0.0)
+
+
+def test_destination_point_inverts_distance_and_bearing():
+    lat, lng = destination_point(47.6414, -122.1401, 30.0, 1500.0)
+    assert haversine_m(47.6414, -122.1401, float(lat), float(lng)) == pytest.approx(1500.0, rel=1e-9)
+    assert float(bearing_deg(47.6414, -122.1401, lat, lng)) == pytest.approx(30.0, abs=1e-6)
+
+
+def test_equirectangular_is_close_over_short_distances():
+    fast = equirectangular_m(LATS[0], LNGS[0], LATS[:3], LNGS[:3])
+    exact = haversine_np(LATS[0], LNGS[0], LATS[:3], LNGS[:3])
+    assert fast == pytest.approx(exact, rel=1e-3, abs=1e-6)
+
+
+def test_enu_round_trip():
+    east, north, up = geodetic_to_enu(LATS[:3], LNGS[:3], 120.0, LATS[0], LNGS[0], 100.0)
+    lat, lng, alt = enu_to_geodetic(east, north, up, LATS[0], LNGS[0], 100.0)
+    assert lat == pytest.approx(LATS[:3], abs=1e-9)
+    assert lng == pytest.approx(LNGS[:3], abs=1e-9)
+    assert alt == pytest.approx([120.0] * 3, abs=1e-4)
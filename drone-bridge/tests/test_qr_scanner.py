@@ -0,0 +1,47 @@
+"""Candidate search and decoding of QR codes in camera frames."""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+qrcode = pytest.importorskip("qrcode")
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from drone.services.qr_scanner import find_candidates, scan_frame
+
+
+def make_frame(width=640, height=480, codes=()):
+    """Blurred noise standing in for the ground, with QR codes pasted on it as (text, x, y, side)."""
+    rng = np.random.default_rng(1)
+    frame = cv2.GaussianBlur(rng.integers(60, 200, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    for text, x, y, side in codes:
+        code = np.array(qrcode.make(text).convert("RGB"))
+        frame[y:y + side, x:x + side] = cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST)
+    return frame
+
+
+def test_candidate_covers_the_code():
+    frame = make_frame(codes=[("DELIVERY:ORDER-1", 380, 260, 120)])
+    regions = find_candidates(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY))
+    assert regions
+    x, y, w, h = regions[0]
+    assert x <= 380 and y <= 260 and x + w >= 500 and y + h >= 380
+
+
+def test_scan_frame_reads_the_code():
+    frame = make_frame(codes=[("DELIVERY:ORDER-1", 380, 260, 120)])
+    texts, candidates = scan_frame(frame)
+    assert "DELIVERY:ORDER-1" in texts
+    assert candidates >= 1
+
+
+def test_scan_frame_without_code():
+    texts, _ = scan_frame(make_frame(), full_frame=True)
+    assert texts == []
+
+
+def test_larger_code_of_another_order_does_not_hide_the_expected_one():
+    frame = make_frame(width=960, codes=[("DELIVERY:ORDER-2", 60, 60, 180), ("DELIVERY:ORDER-1", 600, 300, 120)])
+    texts, _ = scan_frame(frame, expected="DELIVERY:ORDER-1")
+    assert "DELIVERY:ORDER-1" in texts
+    texts, _ = scan_frame(frame)
+    assert {"DELIVERY:ORDER-1", "DELIVERY:ORDER-2"} <= set(texts)
@@ -0,0 +1,89 @@
+"""Shared, cached rendering of delivery QR codes."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("qrcode")
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)
+
+from drone.services import qr_service
+from drone.services.qr_service import QRService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """A QRService rendering on a thread with a render that waits for `release`."""
+    release = threading.Event()
+    calls = []
+
+    def fake_render(data, payload_text, interactive=False):
+        calls.append(payload_text)
+        release.wait(5)
+        if payload_text == "BAD":
+            raise RuntimeError("render failed")
+        return np.zeros((8, 8, 3), dtype=np.uint8)
+
+    monkeypatch.setattr(qr_service, "render_qr", fake_render)
+    qr = QRService(workers=1, cache_size=4, headless=True)
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(qr, "_pool", lambda: pool)
+    yield qr, release, calls
+    release.set()
+    pool.shutdown(wait=True)
+    qr.close()
+
+
+def test_concurrent_requests_share_one_render(service):
+    qr, release, calls = service
+
+    async def run():
+        waiters = [asyncio.create_task(qr.render("ORD-1")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    images = asyncio.run(run())
+    assert calls == ["ORD-1"]
+    assert all(image is images[0] for image in images)
+    assert not images[0].flags.writeable
+
+
+def test_cancelling_the_first_caller_leaves_the_render_to_the_others(service):
+    qr, release, calls = service
+
+    async def run():
+        first = asyncio.create_task(qr.render("ORD-1"))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(qr.render("ORD-1"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        await asyncio.sleep(0.02)
+        release.set()
+        image = await second
+        # The finished render stays cached for later requests
+        again = await qr.render("ORD-1")
+        return first, image, again
+
+    first, image, again = asyncio.run(run())
+    assert first.cancelled()
+    assert image is again
+    assert calls == ["ORD-1"]
+    assert qr.cache_hits == 2
+
+
+def test_failed_render_is_retried(service):
+    qr, release, calls = service
+    release.set()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await qr.render("BAD")
+
+    asyncio.run(run())
+    assert calls == ["BAD", "BAD"]
+    assert qr.stats()["cached"] == 0
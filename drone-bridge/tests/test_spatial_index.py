@@ -0,0 +1,105 @@
+"""Grid index of drone positions, checked against brute-force distances."""
+import math
+import random
+import time
+
+import pytest
+
+from drone.services.separation_service import SeparationService
+from drone.spatial_index import METERS_PER_DEG_LAT, SpatialIndex
+
+LAT0, LNG0 = 47.6414, -122.1401
+
+
+def scattered(count, spread_m=2000.0, seed=7):
+    """Drones scattered over a square of `spread_m` around LAT0, LNG0."""
+    rng = random.Random(seed)
+    m_per_deg_lng = METERS_PER_DEG_LAT * math.cos(math.radians(LAT0))
+    return {f"d{i}": (LAT0 + rng.uniform(0, spread_m) / METERS_PER_DEG_LAT,
+                      LNG0 + rng.uniform(0, spread_m) / m_per_deg_lng,
+                      rng.uniform(10, 60)) for i in range(count)}
+
+
+def indexed(points, cell_m=50.0):
+    index = SpatialIndex(cell_m)
+    for drone_id, (lat, lng, alt) in points.items():
+        index.update(drone_id, lat, lng, alt)
+    return index
+
+
+def brute_force(index, drone_id, vertical=True):
+    """Every other drone and its distance, nearest first, from the index's own projection."""
+    point = index.position(drone_id)
+    others = [(other, SpatialIndex._distance(point, index.position(other), vertical)) for other in index if other != drone_id]
+    return sorted(others, key=lambda item: item[1])
+
+
+@pytest.mark.parametrize("radius_m", [10.0, 50.0, 120.0, 5000.0])
+def test_neighbours_match_brute_force(radius_m):
+    index = indexed(scattered(300))
+    for drone_id in ["d0", "d17", "d299"]:
+        expected = [(other, d) for other, d in brute_force(index, drone_id) if d <= radius_m]
+        assert index.neighbours(drone_id, radius_m) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 299, 1000])
+def test_nearest_matches_brute_force(k):
+    index = indexed(scattered(300))
+    for drone_id in ["d0", "d17", "d299"]:
+        expected = [d for _, d in brute_force(index, drone_id)[:k]]
+        assert [d for _, d in index.nearest(drone_id, k)] == pytest.approx(expected)
+
+
+def test_pairs_within_match_brute_force():
+    index = indexed(scattered(200, spread_m=500.0))
+    expected = {tuple(sorted((a, b))) for a in index for b, d in brute_force(index, a) if d <= 30.0}
+    assert {(a, b) for a, b, _ in index.pairs_within(30.0)} == expected
+
+
+def test_moving_and_removing_drones():
+    index = indexed(scattered(50))
+    index.update("d0", LAT0, LNG0, 20.0)
+    index.update("d1", LAT0 + 10 / METERS_PER_DEG_LAT, LNG0, 20.0)
+    assert index.nearest("d0", 1)[0][0] == "d1"
+    index.remove("d1")
+    assert "d1" not in index
+    assert all(other != "d1" for other, _ in index.neighbours("d0", 5000.0))
+    assert len(index) == 49
+
+
+def test_lone_far_drone_does_not_walk_every_ring():
+    index = indexed(scattered(100))
+    index.update("far", LAT0 - 0.5, LNG0 - 0.5)  # ~50 km away, a thousand cells
+    started = time.perf_counter()
+    found = index.nearest("far", 1)
+    assert time.perf_counter() - started < 0.5
+    assert found[0][1] == pytest.approx(brute_force(index, "far")[0][1])
+
+
+def test_nearest_rejects_k_below_one():
+    index = indexed(scattered(5))
+    with pytest.raises(ValueError):
+        index.nearest("d0", 0)
+    with pytest.raises(ValueError):
+        index.nearest("d0", -1)
+
+
+def test_non_finite_first_position_leaves_the_origin_unset():
+    index = SpatialIndex()
+    with pytest.raises(ValueError):
+        index.update("d0", float("nan"), float("nan"))
+    assert "d0" not in index
+    index.update("d0", LAT0, LNG0, float("nan"))
+    index.update("d1", LAT0, LNG0 + 0.0001, 0.0)
+    assert index.position("d0") == (0.0, 0.0, 0.0)
+    assert index.nearest("d0", 1)[0][0] == "d1"
+
+
+def test_separation_update_skips_drones_without_a_fix():
+    service = SeparationService(None, min_separation_m=10.0, cell_m=50.0)
+    service.update([("a", float("nan"), float("nan"), 20.0), ("b", LAT0, LNG0, 20.0),
+                    ("c", LAT0 + 5 / METERS_PER_DEG_LAT, LNG0, 20.0)])
+    assert set(service.index) == {"b", "c"}
+    [alert] = service.check()
+    assert alert["status"] == "CONFLICT"
+    assert alert["droneIds"] == ["b", "c"]
@@ -0,0 +1,68 @@
+"""Versioned drone state and change subscriptions."""
+import asyncio
+
+from drone.state_store import StateStore
+from drone.telemetry_cache import TelemetryCache
+
+
+def test_mission_and_link_changes_bump_the_version():
+    store = StateStore()
+    assert store.snapshot("D1")["version"] == 0
+    store.update_mission("D1", is_running=True, total_waypoints=3)
+    store.update_link("D1", True)
+    store.update_link("D1", True)  # unchanged, no bump
+    snapshot = store.snapshot("D1")
+    assert snapshot["version"] == 2
+    assert snapshot["mission"]["isRunning"] is True
+    assert snapshot["mission"]["totalWaypoints"] == 3
+    assert snapshot["link"]["px4Connected"] is True
+    store.reset_mission("D1")
+    assert store.snapshot("D1")["mission"]["isRunning"] is False
+    assert store.drone_ids() == ["D1"]
+
+
+def test_changed_returns_at_once_for_an_old_version():
+    store = StateStore()
+    store.update_mission("D1", status_message="Flying")
+    snapshot = asyncio.run(store.changed("D1", 0, timeout=0.1))
+    assert snapshot["version"] == 1
+
+
+def test_changed_waits_for_the_next_change():
+    async def run():
+        store = StateStore()
+        waiter = asyncio.create_task(store.changed("D1", 0, timeout=1))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        store.update_mission("D1", current_waypoint=2)
+        return await waiter
+
+    assert asyncio.run(run())["mission"]["currentWaypoint"] == 2
+
+
+def test_changed_times_out():
+    assert asyncio.run(StateStore().changed("D1", 0, timeout=0.01)) is None
+
+
+def test_telemetry_updates_bump_the_version_rate_limited():
+    async def run():
+        store = StateStore()
+        cache = TelemetryCache("D1")
+        store.attach_telemetry("D1", cache, min_interval_s=0.05)
+        waiter = asyncio.create_task(store.changed("D1", 0, timeout=1))
+        await asyncio.sleep(0)
+        cache.update(latitude_deg=47.0, longitude_deg=8.0)
+        snapshot = await waiter
+        for _ in range(10):
+            cache.update(absolute_altitude_m=10.0)
+        burst_version = store.snapshot("D1")["version"]
+        await asyncio.sleep(0.06)
+        cache.update(absolute_altitude_m=11.0)
+        return snapshot, burst_version, store.snapshot("D1")
+
+    snapshot, burst_version, latest = asyncio.run(run())
+    assert snapshot["version"] == 1
+    assert snapshot["telemetry"]["latitude_deg"] == 47.0
+    assert burst_version == 1
+    assert latest["version"] == 2
+    assert latest["telemetry"]["absolute_altitude_m"] == 11.0
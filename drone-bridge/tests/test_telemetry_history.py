@@ -0,0 +1,77 @@
+"""Ring buffer of recent telemetry per drone."""
+import pytest
+
+from drone.telemetry_cache import TelemetryCache
+from drone.telemetry_history import TelemetryHistory
+
+
+def filled(capacity, samples, min_interval_s=0.0):
+    history = TelemetryHistory("D1", capacity=capacity, min_interval_s=min_interval_s)
+    for t in range(samples):
+        history.append(float(t), 47.0 + t, 8.0, 10.0, 100.0 - t, 5.0)
+    return history
+
+
+def test_keeps_samples_in_order_before_wrapping():
+    history = filled(5, 3)
+    assert len(history) == 3
+    assert history.to_dict()["t"] == [0.0, 1.0, 2.0]
+
+
+def test_overwrites_the_oldest_once_full():
+    history = filled(5, 12)
+    assert len(history) == 5
+    out = history.to_dict()
+    assert out["t"] == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert out["lat"] == [54.0, 55.0, 56.0, 57.0, 58.0]
+    # A wrapped buffer is read back as two segments
+    assert len(history.window()) == 2
+
+
+@pytest.mark.parametrize("samples", [3, 5, 8, 12])
+def test_since_window(samples):
+    history = filled(5, samples)
+    kept = [float(t) for t in range(max(0, samples - 5), samples)]
+    for since in [-1.0, 0.0, 2.5, 7.0, 9.0, 11.0, 50.0]:
+        assert history.to_dict(since)["t"] == [t for t in kept if t >= since], since
+
+
+def test_max_points_thins_evenly():
+    history = filled(100, 100)
+    out = history.to_dict(max_points=10)
+    assert out["count"] == 10
+    assert out["t"] == [float(t) for t in range(0, 100, 10)]
+    assert history.to_dict(max_points=1000)["count"] == 100
+
+
+def test_rejects_invalid_sizes():
+    with pytest.raises(ValueError):
+        TelemetryHistory("D1", capacity=0)
+    with pytest.raises(ValueError):
+        filled(5, 3).to_dict(max_points=0)
+    with pytest.raises(ValueError):
+        filled(5, 3).to_dict(max_points=-1)
+
+
+def test_capacity_of_one():
+    history = filled(1, 3)
+    assert history.to_dict()["t"] == [2.0]
+
+
+def test_samples_closer_than_the_interval_are_dropped():
+    history = TelemetryHistory("D1", capacity=10, min_interval_s=0.2)
+    assert history.append(0.0, 1, 1, 1, 1, 1)
+    assert not history.append(0.1, 1, 1, 1, 1, 1)
+    assert history.append(0.2, 1, 1, 1, 1, 1)
+    assert len(history) == 2
+
+
+def test_missing_fields_are_null():
+    cache = TelemetryCache("D1")
+    cache.update(latitude_deg=47.0, longitude_deg=8.0)
+    history = TelemetryHistory("D1", capacity=10)
+    history.record(cache, t=1.0)
+    out = history.to_dict()
+    assert out["lat"] == [47.0]
+    assert out["battery"] == [None]
+    assert out["droneId"] == "D1"
@@ -0,0 +1,78 @@
+"""Outbound queueing of the backend WebSocket client."""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("websockets.exceptions")
+
+from drone.communication.ws_client import WebSocketClient
+
+
+def mission_update(n):
+    return {"type": "mission_update", "payload": {"n": n}}
+
+
+class FlakySocket:
+    """Stands in for a connected socket whose first `failures` sends raise."""
+    subprotocol = None
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    async def send(self, frame):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("send failed")
+        self.sent.append(frame)
+
+
+def test_full_mission_queue_drops_the_oldest_without_waiting():
+    async def run():
+        client = WebSocketClient("ws://unused", max_mission_queue_size=3)
+        for n in range(5):
+            await asyncio.wait_for(client.send_mission_update({"n": n}), 0.1)
+        return client
+
+    client = asyncio.run(run())
+    assert [m["payload"]["n"] for m in client._must_deliver] == [2, 3, 4]
+    assert client.dropped["mission_overflow"] == 2
+
+
+def test_failed_send_is_requeued_in_order(monkeypatch):
+    async def no_pause(_):
+        pass
+
+    async def run():
+        client = WebSocketClient("ws://unused")
+        client.websocket = FlakySocket(failures=1)
+        client._connected.set()
+        for n in range(3):
+            client.enqueue(mission_update(n))
+        client._writer_task = asyncio.create_task(client._writer())
+        await asyncio.wait_for(client.wait_drained(), 1)
+        client._writer_task.cancel()
+        return client
+
+    monkeypatch.setattr("drone.communication.ws_client.asyncio.sleep", no_pause)
+    client = asyncio.run(run())
+    assert [json.loads(frame)["payload"]["n"] for frame in client.websocket.sent] == [0, 1, 2]
+    assert client.sent_count == 3
+
+
+def test_unencodable_message_is_dropped():
+    async def run():
+        client = WebSocketClient("ws://unused")
+        client.websocket = FlakySocket()
+        client._connected.set()
+        client.enqueue({"type": "alert", "payload": {"bad": object()}})
+        client.enqueue(mission_update(1))
+        client._writer_task = asyncio.create_task(client._writer())
+        await asyncio.wait_for(client.wait_drained(), 1)
+        client._writer_task.cancel()
+        return client
+
+    client = asyncio.run(run())
+    assert client.dropped["encode_failed"] == 1
+    assert client.sent_count == 1